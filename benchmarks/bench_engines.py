@@ -0,0 +1,116 @@
+"""
+Compare the thread-pool and asyncio download engines on many small files.
+
+Every transfer goes through DownloadManager, its history database and the
+progress bus, so the numbers include the per-task bookkeeping of each engine.
+
+Usage:
+    python benchmarks/bench_engines.py --files 500 --size-kb 256 --rate-kb 512
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from local_server import serve
+from video_downloader.src.core.download_history import DownloadHistory
+from video_downloader.src.core.download_manager import (
+    ASYNC_ENGINE, THREAD_ENGINE, DownloadManager
+)
+from video_downloader.src.core.download_types import DownloadStatus, DownloadTask
+from video_downloader.src.core.downloader import BaseVideoDownloader, ResolvedMedia
+from video_downloader.src.core.transfer import SegmentedTransfer
+
+
+class LocalDownloader(BaseVideoDownloader):
+    """Treats every URL as a direct media URL on the local server."""
+    def download(self, url, download_path, video_format, resolution,
+                 connections=None, progress_callback=None, throttle=None,
+                 cancel_token=None):
+        return self.transfer.download(
+            url, self._destination(url, download_path),
+            connections=1, progress=progress_callback, throttle=throttle, cancel=cancel_token
+        )
+
+    def resolve_media(self, url, download_path=None, video_format='mp4', resolution='720p',
+                      refresh=False):
+        return ResolvedMedia(url=url, destination=self._destination(url, download_path))
+
+    def _destination(self, url, download_path):
+        return os.path.join(self._validate_path(download_path), url.rsplit("/", 1)[1])
+
+
+def client_threads():
+    """Threads alive in this process, not counting the local server's handlers."""
+    return sum(
+        1 for thread in threading.enumerate() if "process_request" not in thread.name
+    )
+
+
+def run(engine, concurrency, urls, workdir):
+    """Download every URL through a fresh manager and return elapsed seconds."""
+    download_path = os.path.join(workdir, f"{engine}-{concurrency}")
+    os.makedirs(download_path)
+    manager = DownloadManager(
+        max_concurrent=concurrency,
+        downloader=LocalDownloader(transfer=SegmentedTransfer(connections=1)),
+        engine=engine,
+        history=DownloadHistory(Path(workdir) / f"{engine}-{concurrency}.db")
+    )
+    try:
+        threads_before = client_threads()
+        peak_threads = threads_before
+        started = time.perf_counter()
+        for url in urls:
+            manager.add_download(DownloadTask(
+                url=url, download_path=download_path, video_format="mp4",
+                resolution="720p", max_retries=0
+            ))
+        while not manager.wait_until_idle(timeout=0.05):
+            peak_threads = max(peak_threads, client_threads())
+        elapsed = time.perf_counter() - started
+
+        failed = [task for task in manager.completed_downloads + manager.failed_downloads
+                  if task.status != DownloadStatus.COMPLETED]
+        if failed:
+            raise SystemExit(f"{engine} at {concurrency}: {len(failed)} failed, "
+                             f"first error: {failed[0].error_message}")
+        return elapsed, peak_threads - threads_before
+    finally:
+        manager.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=500, help="Number of files to fetch")
+    parser.add_argument("--size-kb", type=int, default=256, help="Size of each file in KiB")
+    parser.add_argument("--rate-kb", type=float, default=512.0,
+                        help="Per-connection rate cap in KiB/s (0 disables the cap)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--engines", nargs="+", default=[THREAD_ENGINE, ASYNC_ENGINE])
+    args = parser.parse_args()
+
+    payloads = {f"clip-{i}.bin": os.urandom(args.size_kb * 1024) for i in range(args.files)}
+    rate = args.rate_kb * 1024 or None
+
+    with serve(payloads, per_connection_rate=rate) as base_url:
+        urls = [f"{base_url}/{name}" for name in payloads]
+        with tempfile.TemporaryDirectory() as workdir:
+            print(f"{'engine':>8}  {'concurrency':>11}  {'seconds':>8}  "
+                  f"{'files/s':>8}  {'threads':>7}")
+            for concurrency in args.concurrency:
+                for engine in args.engines:
+                    elapsed, threads = run(engine, concurrency, urls, workdir)
+                    print(f"{engine:>8}  {concurrency:>11}  {elapsed:>8.2f}  "
+                          f"{args.files / elapsed:>8.1f}  {threads:>7}")
+
+
+if __name__ == "__main__":
+    main()
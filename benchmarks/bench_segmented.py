@@ -0,0 +1,51 @@
+"""
+Benchmark the segmented transfer engine against a local Range-capable server.
+
+Usage:
+    python benchmarks/bench_segmented.py --size-mb 64 --rate-mb 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from local_server import serve
+from video_downloader.src.core.transfer import SegmentedTransfer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=64, help="Payload size in MiB")
+    parser.add_argument("--rate-mb", type=float, default=8.0,
+                        help="Per-connection rate cap in MiB/s (0 disables the cap)")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size_mb * 1024 * 1024)
+    rate = args.rate_mb * 1024 * 1024 or None
+
+    with serve({"media.bin": payload}, per_connection_rate=rate) as base_url:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"{'connections':>11}  {'seconds':>8}  {'MiB/s':>8}")
+            for connections in args.connections:
+                destination = os.path.join(tmp, f"media-{connections}.bin")
+                engine = SegmentedTransfer(connections=connections)
+                started = time.perf_counter()
+                engine.download(f"{base_url}/media.bin", destination)
+                elapsed = time.perf_counter() - started
+
+                with open(destination, "rb") as result:
+                    if result.read() != payload:
+                        raise SystemExit(f"Corrupt output with {connections} connections")
+                os.remove(destination)
+
+                print(f"{connections:>11}  {elapsed:>8.2f}  {args.size_mb / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Measure cold-start time of the application and record it over time.
+
+Each measurement runs in a fresh interpreter, so module imports are paid in
+full every time:
+
+- ``import``: importing the core download manager
+- ``headless``: constructing a DownloadManager against an empty data
+  directory and shutting it down
+- ``first_paint``: building the GUI and drawing its first frame (skipped
+  without tkinter, ttkbootstrap or a display)
+
+Medians are appended as one JSON line per run to ``--history`` so that
+regressions show up across commits. ``--profile`` prints the modules that
+dominate ``python -X importtime`` for a headless start.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --budget 1.0
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_history.jsonl")
+
+SNIPPETS = {
+    "import": """
+import video_downloader.src.core.download_manager
+""",
+    "headless": """
+from video_downloader.src.core.download_manager import DownloadManager
+DownloadManager().shutdown()
+""",
+    "first_paint": """
+from video_downloader.src.ui.video_downloader_gui import VideoDownloaderGUI
+app = VideoDownloaderGUI()
+app.master.update()
+""",
+}
+
+
+def measure(name, home):
+    """
+    Wall-clock seconds of one fresh-interpreter run of a snippet, including
+    interpreter start-up, or None and the error if it cannot run.
+    """
+    env = dict(os.environ, HOME=home, PYTHONPATH=project_root)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", SNIPPETS[name]],
+        cwd=home, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:] or ["failed"]
+    return elapsed, None
+
+
+def import_profile(home, top):
+    """Modules with the largest cumulative import time in a headless start."""
+    env = dict(os.environ, HOME=home, PYTHONPATH=project_root)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPETS["headless"]],
+        cwd=home, env=env, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Seconds the headless start and first paint must stay under")
+    parser.add_argument("--history", default=DEFAULT_HISTORY,
+                        help="JSONL file the results are appended to")
+    parser.add_argument("--no-record", action="store_true", help="Do not append to the history")
+    parser.add_argument("--profile", type=int, default=0, metavar="N",
+                        help="Print the N slowest imports of a headless start")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as home:
+        for name in SNIPPETS:
+            times = []
+            for _ in range(args.runs):
+                elapsed, error = measure(name, home)
+                if elapsed is None:
+                    print(f"{name:>12}  skipped: {error[0]}")
+                    break
+                times.append(elapsed)
+            if times:
+                results[name] = statistics.median(times)
+                print(f"{name:>12}  {results[name] * 1000:>8.1f} ms  "
+                      f"(min {min(times) * 1000:.1f}, max {max(times) * 1000:.1f})")
+
+        if args.profile:
+            print(f"\n{'cumulative':>12}  {'self':>8}  module")
+            for cumulative_us, self_us, module in import_profile(home, args.profile):
+                print(f"{cumulative_us / 1000:>9.1f} ms  {self_us / 1000:>5.1f} ms  {module}")
+
+    if not args.no_record:
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "seconds": results,
+        }
+        with open(args.history, "a") as history:
+            history.write(json.dumps(record) + "\n")
+
+    over = [name for name in ("headless", "first_paint")
+            if results.get(name, 0) > args.budget]
+    if over:
+        print(f"\nOver the {args.budget:.2f} s budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Local HTTP server with Range support used by the benchmarks.
+
+Serves in-memory payloads at ``/<name>`` and can cap the rate of every
+individual connection to mimic origins that throttle single streams.
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)")
+WRITE_SIZE = 64 * 1024
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        payload = self.server.payloads.get(self.path.lstrip("/"))
+        if payload is None:
+            self.send_error(404)
+            return
+
+        size = len(payload)
+        start, end = 0, size - 1
+        match = RANGE_PATTERN.fullmatch(self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Content-Type", "application/octet-stream")
+        self.end_headers()
+        try:
+            self._write_throttled(memoryview(payload)[start:end + 1])
+        except ConnectionError:
+            # Clients hang up mid-body when a transfer is interrupted
+            self.close_connection = True
+
+    def _write_throttled(self, body):
+        rate = self.server.per_connection_rate
+        started = time.monotonic()
+        sent = 0
+        for offset in range(0, len(body), WRITE_SIZE):
+            chunk = body[offset:offset + WRITE_SIZE]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if rate:
+                delay = sent / rate - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+
+@contextmanager
+def serve(payloads: Dict[str, bytes], per_connection_rate: Optional[float] = None):
+    """Run a local server for the duration of the block and yield its base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    server.payloads = payloads
+    server.per_connection_rate = per_connection_rate
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
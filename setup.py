@@ -18,6 +18,12 @@ setup(
     entry_points={
         'console_scripts': [
             'video-downloader=video_downloader.src.main:main',
+            'video-downloader-cli=video_downloader.src.cli:main',
+        ],
+        # Downloader adapters, loaded on first use; other packages may add more
+        'video_downloader.platforms': [
+            'youtube=video_downloader.src.core.platforms.youtube:YouTubeDownloader',
+            'generic=video_downloader.src.core.platforms.generic:GenericDownloader',
         ],
     },
     python_requires='>=3.13',
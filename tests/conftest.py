@@ -0,0 +1,47 @@
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# Add project root and the benchmarks' local server to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "benchmarks"))
+
+from video_downloader.src.core.download_history import DownloadHistory
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    """Keep databases and discovery files out of the real home directory."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def history(home):
+    history = DownloadHistory(db_path=home / "history.db")
+    yield history
+    history.close()
+
+
+@pytest.fixture
+def http_server():
+    """Start a local server for a handler class and return its base URL."""
+    servers = []
+
+    def start(handler, **attributes):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        for name, value in attributes.items():
+            setattr(server, name, value)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,113 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from video_downloader.src.core.control_api import ControlServer
+
+TOKEN = "secret-token"
+
+
+class RecordingManager:
+    """Accepts tasks without downloading them."""
+    def __init__(self):
+        self.added = []
+
+    def add_download(self, task):
+        self.added.append(task)
+
+    def add_downloads_from(self, tasks):
+        self.added.extend(tasks)
+
+    def find_task(self, task_id):
+        return next((task for task in self.added if task.task_id == task_id), None)
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    # Shared by the module: stopping a server waits out its poll interval
+    directory = tmp_path_factory.mktemp("control")
+    server = ControlServer(RecordingManager(), port=0, token=TOKEN, default_path=str(directory),
+                           discovery_file=directory / "control.json").start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def api(server):
+    server.manager.added.clear()
+    return server
+
+
+def _call(server, method, path, body=None, token=TOKEN, raw=None):
+    data = raw if raw is not None else (None if body is None else json.dumps(body).encode())
+    headers = {"Content-Type": "application/json"}
+    if token is not None:
+        headers["Authorization"] = f"Bearer {token}"
+    request = urllib.request.Request(server.url + path, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+
+@pytest.mark.parametrize("token", [None, "wrong", ""])
+def test_requests_without_the_token_are_refused(api, token):
+    status, payload = _call(api, "GET", "/tasks/abc", token=token)
+    assert status == 401
+    assert "token" in payload["error"]
+
+    status, _ = _call(api, "POST", "/tasks", {"url": "https://youtu.be/abc"}, token=token)
+    assert status == 401
+    assert api.manager.added == []
+
+
+def test_discovery_file_is_private(api):
+    assert api.discovery_file.stat().st_mode & 0o777 == 0o600
+    published = json.loads(api.discovery_file.read_text())
+    assert (published["url"], published["token"]) == (api.url, TOKEN)
+
+
+def test_enqueue_accepts_a_supported_url(api):
+    status, payload = _call(api, "POST", "/tasks", {"url": "https://youtu.be/abc", "resolution": "480p"})
+    assert status == 201
+    assert payload["status"] == "pending"
+    assert payload["resolution"] == "480p"
+    assert _call(api, "GET", f"/tasks/{payload['task_id']}")[1]["url"] == "https://youtu.be/abc"
+
+
+@pytest.mark.parametrize("path, raw, status", [
+    ("/tasks", b"{not json", 400),
+    ("/tasks", b'"https://youtu.be/abc"', 400),
+    ("/tasks/bulk", b'["https://youtu.be/abc"]', 400),
+    ("/tasks/bulk", b"{}", 400),
+    ("/tasks/bulk", b'{"urls": "https://youtu.be/abc"}', 400),
+    ("/tasks", b"{}", 400),
+    ("/tasks", b'{"url": "https://unsupported.invalid/x"}', 422),
+    ("/tasks", b'{"url": "https://youtu.be/abc", "video_format": "exe"}', 422),
+    ("/tasks", b'{"url": "https://youtu.be/abc", "rate_limit": "fast"}', 422),
+])
+def test_invalid_requests_are_rejected(api, path, raw, status):
+    code, payload = _call(api, "POST", path, raw=raw)
+    assert code == status
+    assert payload["error"]
+    assert api.manager.added == []
+
+
+def test_bulk_reports_rejected_items_and_queues_the_rest(api):
+    status, payload = _call(api, "POST", "/tasks/bulk", {
+        "urls": ["https://youtu.be/a", "https://unsupported.invalid/x", "https://youtu.be/b"],
+        "video_format": "webm",
+    })
+    assert status == 202
+    assert len(payload["accepted"]) == 2
+    assert [item["item"] for item in payload["rejected"]] == [{"url": "https://unsupported.invalid/x"}]
+    assert {task.video_format for task in api.manager.added} == {"webm"}
+
+
+def test_bad_query_parameters_are_rejected(api):
+    assert _call(api, "GET", "/tasks?limit=ten")[0] == 400
+    assert _call(api, "GET", "/tasks?cursor=-1")[0] == 400
+    assert _call(api, "GET", "/nothing")[0] == 404
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from video_downloader.src.core.download_history import DownloadHistory
+from video_downloader.src.core.download_types import DownloadStatus, DownloadTask
+from video_downloader.src.core.queue_journal import QueueJournal
+
+
+@pytest.fixture
+def second_history(home, history):
+    """Another instance's connection to the same database."""
+    other = DownloadHistory(db_path=history.db_path)
+    yield other
+    other.close()
+
+
+def _add(history: DownloadHistory, name: str,
+         status: DownloadStatus = DownloadStatus.PENDING) -> DownloadTask:
+    task = DownloadTask(url=f"https://youtu.be/{name}", download_path="/tmp",
+                        video_format="mp4", resolution="720p")
+    history.add_download(task)
+    if status != DownloadStatus.PENDING:
+        history.update_status(task, status)
+    return task
+
+
+def test_crashed_instance_rows_are_recovered_in_order_once_leases_lapse(history, second_history):
+    crashed = QueueJournal(history, lease_seconds=0.3)
+    _add(history, "first")
+    _add(history, "running", DownloadStatus.IN_PROGRESS)
+    _add(history, "done", DownloadStatus.COMPLETED)
+    _add(history, "last", DownloadStatus.QUEUED)
+    # The crashed instance never renews or releases its leases
+
+    survivor = QueueJournal(second_history, page_size=1)
+    started = time.monotonic()
+    rows = list(survivor.recover())
+
+    assert time.monotonic() - started >= 0.2
+    assert [row["url"].rsplit("/", 1)[1] for row in rows] == ["first", "running", "last"]
+    assert [row["queue_status"] for row in rows] == ["pending", "in_progress", "queued"]
+    # Claimed rows are leased to the survivor now
+    assert crashed.history.claim_queue_rows(crashed.owner, time.time() + 30, 10) == []
+
+
+def test_rows_of_a_live_instance_are_never_taken(history, second_history):
+    alive = QueueJournal(history, lease_seconds=0.3, heartbeat_interval=0.05)
+    alive.start()
+    _add(history, "busy")
+    other = QueueJournal(second_history)
+
+    time.sleep(0.5)
+    assert second_history.claim_queue_rows(other.owner, time.time() + 30, 10) == []
+
+    # A clean shutdown releases the leases for immediate recovery
+    alive.stop()
+    started = time.monotonic()
+    rows = list(other.recover())
+    assert time.monotonic() - started < 0.2
+    assert [row["url"] for row in rows] == ["https://youtu.be/busy"]
+
+
+def test_finished_tasks_leave_the_journal(history):
+    journal = QueueJournal(history)
+    task = _add(history, "video")
+    history.update_status(task, DownloadStatus.FAILED, "HTTP 404")
+    history.release_queue_leases(journal.owner)
+
+    assert history.claim_queue_rows("other", time.time() + 30, 10) == []
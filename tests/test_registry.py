@@ -0,0 +1,39 @@
+from video_downloader.src.core.platforms.registry import DomainTrie, url_hostname
+
+
+def _trie() -> DomainTrie:
+    trie = DomainTrie()
+    trie.insert("youtube.com", "youtube")
+    trie.insert("youtu.be", "youtube")
+    trie.insert("example.com", "example")
+    trie.insert("video.example.com", "example-video")
+    return trie
+
+
+def test_host_matches_registered_domain_and_subdomains():
+    trie = _trie()
+    assert trie.lookup("youtube.com") == "youtube"
+    assert trie.lookup("www.youtube.com") == "youtube"
+    assert trie.lookup("m.music.youtube.com") == "youtube"
+    assert trie.lookup("youtu.be") == "youtube"
+
+
+def test_longest_registered_suffix_wins():
+    trie = _trie()
+    assert trie.lookup("example.com") == "example"
+    assert trie.lookup("cdn.example.com") == "example"
+    assert trie.lookup("video.example.com") == "example-video"
+    assert trie.lookup("eu.video.example.com") == "example-video"
+
+
+def test_only_whole_labels_match():
+    trie = _trie()
+    assert trie.lookup("notyoutube.com") is None
+    assert trie.lookup("youtube.com.evil.net") is None
+    assert trie.lookup("com") is None
+
+
+def test_url_hostname_normalises_hosts():
+    assert url_hostname("https://WWW.YouTube.com./watch?v=abc") == "www.youtube.com"
+    assert url_hostname("youtu.be/abc") == "youtu.be"
+    assert url_hostname("http://[::1") is None
@@ -0,0 +1,65 @@
+from video_downloader.src.core.retry import ErrorKind, classify
+from video_downloader.src.core.transfer import HTTPStatusError
+
+URL = "https://example.com/video.mp4"
+
+
+def _raised_from(error: BaseException, cause: BaseException) -> BaseException:
+    try:
+        raise error from cause
+    except BaseException as raised:
+        return raised
+
+
+def test_wrapper_defers_to_its_cause():
+    error = _raised_from(ValueError("Failed to download video"), HTTPStatusError(404, URL))
+    assert classify(error).kind == ErrorKind.PERMANENT
+
+    # A summary naming a status does not override a transient cause
+    error = _raised_from(ValueError("Failed to download video: HTTP 404"), TimeoutError("timed out"))
+    assert classify(error).kind == ErrorKind.TRANSIENT
+
+
+def test_error_raised_while_handling_another_is_classified_by_both():
+    try:
+        try:
+            raise HTTPStatusError(410, URL)
+        except HTTPStatusError:
+            raise RuntimeError("cleanup failed")
+    except RuntimeError as error:
+        assert classify(error).kind == ErrorKind.PERMANENT
+
+
+def test_rate_limit_keeps_retry_after_through_a_chain():
+    error = _raised_from(ValueError("Failed"), HTTPStatusError(503, URL, {"Retry-After": "12"}))
+    classification = classify(error)
+    assert classification.kind == ErrorKind.RATE_LIMITED
+    assert classification.retry_after == 12.0
+
+
+def test_group_is_retried_if_any_attempt_could_succeed():
+    group = ExceptionGroup("backends failed", [
+        HTTPStatusError(404, URL),
+        ConnectionResetError("connection reset"),
+    ])
+    assert classify(group).kind == ErrorKind.TRANSIENT
+    assert classify(_raised_from(ValueError("Failed"), group)).retryable
+
+
+def test_group_of_permanent_attempts_is_permanent():
+    group = ExceptionGroup("backends failed", [
+        HTTPStatusError(404, URL),
+        ValueError("ERROR: Private video. Sign in if you've been granted access"),
+    ])
+    assert classify(group).kind == ErrorKind.PERMANENT
+
+
+def test_group_waits_for_the_longest_rate_limit():
+    group = ExceptionGroup("backends failed", [
+        HTTPStatusError(429, URL, {"Retry-After": "5"}),
+        HTTPStatusError(429, URL, {"Retry-After": "30"}),
+        TimeoutError("timed out"),
+    ])
+    classification = classify(group)
+    assert classification.kind == ErrorKind.RATE_LIMITED
+    assert classification.retry_after == 30.0
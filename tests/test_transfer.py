@@ -0,0 +1,119 @@
+import os
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from local_server import RangeRequestHandler
+from video_downloader.src.core.transfer import PART_SUFFIX, SegmentedTransfer, TransferError
+
+PROBE_RANGE = "bytes=0-0"
+
+
+class RecordingRangeHandler(RangeRequestHandler):
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get("Range"))
+        super().do_GET()
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """Honours Range requests only when told to, and can cut one body short."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        payload, state = self.server.payload, self.server.state
+        requested = self.headers.get("Range", "")
+        state["ranges"].append(requested)
+        start = 0
+        if state["honour_ranges"] and requested and requested != PROBE_RANGE:
+            start = int(requested[len("bytes="):].partition("-")[0])
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(payload) - start))
+        self.end_headers()
+
+        body = payload[start:]
+        if state["cut"] and requested != PROBE_RANGE:
+            body = body[:state["cut"]]
+            state["cut"] = None
+            self.close_connection = True
+        try:
+            self.wfile.write(body)
+        except ConnectionError:
+            # The probe hangs up after reading the headers
+            self.close_connection = True
+
+
+def test_segmented_download_resumes_from_checkpoint(tmp_path, history, http_server):
+    payload = os.urandom(1024 * 1024)
+    half = len(payload) // 2
+    ranges = []
+    base = http_server(RecordingRangeHandler, payloads={"video.bin": payload},
+                       per_connection_rate=None, ranges=ranges)
+    destination = str(tmp_path / "video.bin")
+    part_path = destination + PART_SUFFIX
+    with open(part_path, "wb") as part:
+        part.write(payload[:half])
+        part.truncate(len(payload))
+    history.save_checkpoint(part_path, f"{base}/video.bin", len(payload), None, None,
+                            [(0, half - 1)])
+
+    transfer = SegmentedTransfer(connections=4, min_segment_size=64 * 1024,
+                                 checkpoint_store=history)
+    assert transfer.download(f"{base}/video.bin", destination) == destination
+
+    with open(destination, "rb") as result:
+        assert result.read() == payload
+    starts = [int(r[len("bytes="):].partition("-")[0]) for r in ranges if r != PROBE_RANGE]
+    assert starts and min(starts) >= half
+    assert history.load_checkpoint(part_path) is None
+    assert not os.path.exists(part_path)
+
+
+def test_truncated_single_stream_is_rejected_and_resumed(tmp_path, history, http_server):
+    payload = os.urandom(1_000_000)
+    cut = 400_000
+    state = {"ranges": [], "honour_ranges": False, "cut": cut}
+    base = http_server(StreamHandler, payload=payload, state=state)
+    destination = str(tmp_path / "stream.bin")
+    part_path = destination + PART_SUFFIX
+    transfer = SegmentedTransfer(checkpoint_store=history)
+
+    with pytest.raises(TransferError, match=f"after {cut} of {len(payload)} bytes"):
+        transfer.download(f"{base}/stream.bin", destination)
+    assert not os.path.exists(destination)
+    checkpoint = history.load_checkpoint(part_path)
+    assert [tuple(r) for r in checkpoint["ranges"]] == [(0, cut - 1)]
+
+    # The probe still sees no range support, but the resumed stream is
+    # answered with the rest of the file
+    state["honour_ranges"] = True
+    state["ranges"].clear()
+    transfer.download(f"{base}/stream.bin", destination)
+
+    with open(destination, "rb") as result:
+        assert result.read() == payload
+    assert state["ranges"][-1] == f"bytes={cut}-"
+    assert history.load_checkpoint(part_path) is None
+
+
+def test_single_stream_restarts_when_range_is_ignored(tmp_path, history, http_server):
+    payload = os.urandom(300_000)
+    state = {"ranges": [], "honour_ranges": False, "cut": 100_000}
+    base = http_server(StreamHandler, payload=payload, state=state)
+    destination = str(tmp_path / "stream.bin")
+    transfer = SegmentedTransfer(checkpoint_store=history)
+
+    with pytest.raises(TransferError):
+        transfer.download(f"{base}/stream.bin", destination)
+    # A 200 to the resume request replaces the partial file instead of
+    # being appended to it
+    transfer.download(f"{base}/stream.bin", destination)
+
+    with open(destination, "rb") as result:
+        assert result.read() == payload
+    assert state["ranges"][-1] == "bytes=100000-"
@@ -0,0 +1,344 @@
+"""
+Headless command-line and daemon entry point.
+
+Runs the download manager without Tk: URLs are streamed from files, stdin
+or a spool directory with constant memory, and every state change is
+printed to stdout as one JSON object per line. Logs go to stderr and
+``video_downloader.log`` so stdout stays machine-readable.
+
+Batch mode reads its inputs, waits for every download and exits with:
+
+    0  every download completed
+    1  at least one download failed or was cancelled, or a URL was rejected
+    2  invalid command line
+    130  interrupted
+
+Daemon mode (``--spool DIR``) runs until SIGTERM or SIGINT and exits 0. It
+claims each file dropped into DIR by moving it to ``DIR/processing``, queues
+its URLs and moves it to ``DIR/done`` once every line has been queued.
+Producers should write files under a name starting with ``.`` and rename
+them when complete; such names are never picked up.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+from .core.download_manager import CONCURRENCY_LIMITS, THREAD_ENGINE, DownloadManager
+from .core.download_types import (
+    FINISHED_STATUSES, DownloadStatus, DownloadTask, RESOLUTIONS, VIDEO_FORMATS
+)
+from .core.bandwidth import BandwidthLimiter
+from .core.control_api import ControlServer
+from .core.playlist import DEFAULT_MAX_PENDING
+from .core.postprocess import PostProcessor
+from .core.platforms.supported_sites import get_site_by_url
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_INTERRUPTED = 130
+
+SPOOL_PROCESSING = "processing"
+SPOOL_DONE = "done"
+# Finished tasks the manager keeps in memory; all are in history
+KEEP_FINISHED = 1000
+
+
+class EventWriter:
+    """Writes one JSON event per line, safe to call from any thread."""
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields) -> None:
+        record = {"event": event, "time": round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class HeadlessRunner:
+    """
+    Feeds URLs into a DownloadManager and reports their outcomes.
+
+    Only tasks still in flight are tracked, so memory stays constant
+    however many URLs pass through.
+    """
+    def __init__(self, manager: DownloadManager, args: argparse.Namespace, events: EventWriter):
+        self.manager = manager
+        self.args = args
+        self.events = events
+        self.stop = threading.Event()
+        self._pending: Dict[str, DownloadTask] = {}
+        self._pending_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def tasks(self, urls: Iterable[str]) -> Iterator[DownloadTask]:
+        """Turn URLs into tasks, expanding collections and rejecting unsupported URLs."""
+        for url in urls:
+            site = get_site_by_url(url)
+            if site is None:
+                self.rejected += 1
+                self.events.emit("rejected", url=url, reason="unsupported platform")
+                continue
+            template = DownloadTask(
+                url=url,
+                download_path=self.args.output,
+                video_format=self.args.format,
+                resolution=self.args.resolution,
+                platform=site.name
+            )
+            if site.is_collection(url):
+                self.events.emit("expanding", url=url)
+                expanded = self.manager.expand_collection(template)
+            else:
+                expanded = (template,)
+            for task in expanded:
+                with self._pending_lock:
+                    self._pending[task.task_id] = task
+                self.events.emit("queued", task_id=task.task_id, url=task.url)
+                yield task
+
+    def report(self) -> None:
+        """Emit progress for running tasks and the outcome of finished ones."""
+        for event in self.manager.progress_bus.drain():
+            with self._pending_lock:
+                task = self._pending.get(event.task_id)
+            if task is None:
+                continue
+            self.events.emit(
+                "progress", task_id=event.task_id, url=task.url,
+                bytes_done=event.bytes_done, total_bytes=event.total_bytes,
+                rate=round(event.rate, 1),
+                eta=None if event.eta is None else round(event.eta, 1)
+            )
+
+        with self._pending_lock:
+            finished = [
+                task for task in self._pending.values()
+                if task.status in FINISHED_STATUSES
+            ]
+            for task in finished:
+                del self._pending[task.task_id]
+
+        for task in finished:
+            if task.status == DownloadStatus.COMPLETED:
+                self.completed += 1
+                self.events.emit("completed", task_id=task.task_id, url=task.url,
+                                 file=task.file_path, bytes=task.bytes_done,
+                                 checksum=task.checksum, thumbnail=task.thumbnail_path)
+            elif task.status == DownloadStatus.CANCELLED:
+                self.cancelled += 1
+                self.events.emit("cancelled", task_id=task.task_id, url=task.url)
+            else:
+                self.failed += 1
+                self.events.emit("failed", task_id=task.task_id, url=task.url,
+                                 error=task.error_message, retries=task.retries)
+
+    @property
+    def in_flight(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+    def run(self, urls: Iterable[str], daemon: bool = False) -> int:
+        """Feed URLs until exhausted (or stopped, in daemon mode) and return an exit code."""
+        started = time.monotonic()
+        feed = self.manager.add_downloads_from(self.tasks(urls), self.args.max_pending)
+
+        while not self.stop.is_set():
+            self.stop.wait(self.args.progress_interval)
+            self.report()
+            # Batches of any size, not just the daemon, stay in constant memory
+            self.manager.trim_finished(KEEP_FINISHED)
+            if not daemon and feed.done.is_set() and not self.in_flight:
+                break
+
+        feed.cancel()
+        if feed.error is not None:
+            self.events.emit("error", error=str(feed.error))
+        self.events.emit(
+            "summary", completed=self.completed, failed=self.failed,
+            cancelled=self.cancelled, rejected=self.rejected, unfinished=self.in_flight,
+            seconds=round(time.monotonic() - started, 3)
+        )
+        if self.stop.is_set() and not daemon:
+            return EXIT_INTERRUPTED
+        if self.failed or self.cancelled or self.rejected or feed.error is not None:
+            return EXIT_FAILURES
+        return EXIT_OK
+
+
+def read_urls(sources: Iterable[str]) -> Iterator[str]:
+    """Yield URLs line by line from files (``-`` for stdin), skipping blanks and ``#`` comments."""
+    for source in sources:
+        stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def spool_urls(spool: str, stop: threading.Event, poll_interval: float,
+               events: EventWriter) -> Iterator[str]:
+    """Yield URLs from files dropped into a spool directory until stopped."""
+    processing = os.path.join(spool, SPOOL_PROCESSING)
+    done = os.path.join(spool, SPOOL_DONE)
+    os.makedirs(processing, exist_ok=True)
+    os.makedirs(done, exist_ok=True)
+
+    # Files claimed by a run that did not finish reading them are read again;
+    # URLs already downloaded are coalesced or served from the content store
+    for name in os.listdir(processing):
+        os.replace(os.path.join(processing, name), os.path.join(spool, name))
+
+    while not stop.is_set():
+        claimed = _claim_spool_file(spool, processing)
+        if claimed is None:
+            stop.wait(poll_interval)
+            continue
+        events.emit("spool_file", file=os.path.basename(claimed))
+        yield from read_urls([claimed])
+        os.replace(claimed, os.path.join(done, os.path.basename(claimed)))
+
+
+def _claim_spool_file(spool: str, processing: str) -> Optional[str]:
+    """Move the oldest waiting spool file into ``processing``; None if there is none."""
+    waiting = []
+    for entry in os.scandir(spool):
+        if entry.is_file() and not entry.name.startswith("."):
+            waiting.append((entry.stat().st_mtime, entry.name))
+    for _, name in sorted(waiting):
+        target = os.path.join(processing, name)
+        try:
+            os.replace(os.path.join(spool, name), target)
+        except FileNotFoundError:
+            # Claimed by another daemon sharing the directory
+            continue
+        return target
+    return None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="video-downloader-cli",
+        description="Download videos without a GUI, reporting progress as JSON lines."
+    )
+    parser.add_argument("inputs", nargs="*", metavar="FILE",
+                        help="Files with one URL per line; '-' or nothing reads stdin")
+    parser.add_argument("-u", "--url", action="append", default=[],
+                        help="URL to download; may be repeated")
+    parser.add_argument("-o", "--output", default=os.getcwd(), help="Download directory")
+    parser.add_argument("-f", "--format", choices=VIDEO_FORMATS, default="mp4")
+    parser.add_argument("-r", "--resolution", choices=RESOLUTIONS, default="720p")
+    parser.add_argument("--spool", metavar="DIR",
+                        help="Run as a daemon draining URL files dropped into DIR")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds between spool directory scans")
+    parser.add_argument("--progress-interval", type=float, default=1.0,
+                        help="Seconds between progress reports")
+    parser.add_argument("--max-concurrent", type=int, default=3)
+    parser.add_argument("--auto-concurrency", action="store_true",
+                        help="Tune the number of concurrent downloads from throughput")
+    parser.add_argument("--engine", choices=sorted(CONCURRENCY_LIMITS), default=THREAD_ENGINE)
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Queued downloads above which reading input pauses")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Total bandwidth cap in MB/s (0 = unlimited)")
+    parser.add_argument("--content-store", action="store_true",
+                        help="Deduplicate downloads through the content store")
+    parser.add_argument("--postprocess-workers", type=int, metavar="N",
+                        help="Processes merging, converting and hashing finished "
+                             "downloads (default: half the CPUs)")
+    parser.add_argument("--no-checksum", action="store_true",
+                        help="Do not compute SHA-256 checksums of finished files")
+    parser.add_argument("--thumbnails", action="store_true",
+                        help="Save a JPEG thumbnail next to each video (needs ffmpeg)")
+    parser.add_argument("--control-port", type=int, metavar="PORT",
+                        help="Serve the local control API on PORT (0 picks a free port)")
+    parser.add_argument("--log-level", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Level of log messages written to stderr")
+    return parser
+
+
+def _configure_logging(level: str) -> None:
+    stderr = logging.StreamHandler(sys.stderr)
+    stderr.setLevel(level)
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[stderr, logging.FileHandler('video_downloader.log')],
+        force=True
+    )
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.spool and (args.inputs or args.url):
+        parser.error("--spool cannot be combined with input files or --url")
+    limit = CONCURRENCY_LIMITS[args.engine]
+    if not 1 <= args.max_concurrent <= limit:
+        parser.error(f"--max-concurrent must be between 1 and {limit} for {args.engine}")
+    if args.postprocess_workers is not None and args.postprocess_workers < 1:
+        parser.error("--postprocess-workers must be at least 1")
+    _configure_logging(args.log_level)
+
+    events = EventWriter(sys.stdout)
+    bandwidth = BandwidthLimiter(args.rate_limit * 1024 * 1024 or None)
+    manager = DownloadManager(
+        max_concurrent=args.max_concurrent,
+        engine=args.engine,
+        auto_concurrency=args.auto_concurrency,
+        bandwidth=bandwidth,
+        content_store=args.content_store,
+        postprocessor=PostProcessor(
+            max_workers=args.postprocess_workers,
+            checksum=not args.no_checksum,
+            thumbnails=args.thumbnails
+        )
+    )
+    runner = HeadlessRunner(manager, args, events)
+    control = None
+    if args.control_port is not None:
+        control = ControlServer(manager, port=args.control_port, default_path=args.output).start()
+        events.emit("control_api", url=control.url)
+
+    def request_stop(signum, frame):
+        logger.info(f"Received signal {signum}, stopping")
+        runner.stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    try:
+        if args.spool:
+            urls = spool_urls(args.spool, runner.stop, args.poll_interval, events)
+            return runner.run(urls, daemon=True)
+        urls = itertools.chain(args.url, read_urls(args.inputs or ([] if args.url else ["-"])))
+        return runner.run(urls)
+    finally:
+        if control is not None:
+            control.stop()
+        manager.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
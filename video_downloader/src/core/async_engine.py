@@ -0,0 +1,516 @@
+"""
+asyncio download engine for running hundreds of transfers at once.
+
+One event loop thread drives every transfer with non-blocking sockets, so
+thousands of small clips do not each hold a pool thread while they wait on
+the network. Downloaders still resolve page URLs with their own blocking
+libraries; that work runs in a small resolver pool, and downloaders that
+cannot hand out a direct media URL are run whole in a blocking pool.
+
+Results are delivered to a completion thread rather than the loop thread,
+so callbacks may take locks and touch the database freely.
+
+Cancelling a task's token interrupts its fetch coroutine at once, even
+while it waits on a stalled connection; the part file is kept.
+
+Part files resume only from a checkpoint in the same store the segmented
+engine uses, and only while the remote file's validators still match; a
+part file without one is downloaded again from the start. The store is a
+database, so it is only touched from a checkpoint thread of its own: loads
+are awaited, while writes are queued behind one another and never hold up
+a transfer.
+"""
+import asyncio
+import logging
+import os
+import ssl
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .download_types import CancellationToken, DownloadCancelled, DownloadTask
+from .transfer import (
+    CHECKPOINT_INTERVAL, CHUNK_SIZE, PART_SUFFIX, USER_AGENT, HTTPStatusError,
+    ProgressCallback, RemoteFile, Throttle, TransferError
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_REDIRECTS = 10
+RESOLVER_WORKERS = 16
+BLOCKING_WORKERS = 10
+DoneCallback = Callable[[DownloadTask, Optional[str], Optional[BaseException]], None]
+# Receives the bytes written so far and queues them for the checkpoint store
+Checkpoint = Callable[[int], None]
+
+
+def _log_store_failure(future: Future) -> None:
+    """Report a queued checkpoint write that failed; nobody waits on it."""
+    error = future.exception()
+    if error is not None:
+        logger.warning(f"Could not update transfer checkpoint: {error}")
+
+
+def _content_range(headers: Dict[str, str]) -> Tuple[Optional[int], Optional[int]]:
+    """Parse the first byte and total size of a Content-Range header."""
+    unit, _, spec = headers.get("content-range", "").partition(" ")
+    span, _, total = spec.partition("/")
+    start = span.partition("-")[0]
+    if unit.lower() != "bytes":
+        return None, None
+    return (int(start) if start.isdigit() else None,
+            int(total) if total.isdigit() else None)
+
+
+async def _wait(throttle: Optional[Throttle], amount: int) -> None:
+    """Charge a chunk to the bandwidth limiter and sleep off any debt."""
+    if throttle is not None:
+        delay = throttle(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncDownloadEngine:
+    """
+    Runs download tasks as coroutines on a dedicated event loop thread.
+
+    Args:
+        timeout: Seconds to wait for a connection or for each read
+        resolver_workers: Threads resolving page URLs to media URLs
+        blocking_workers: Threads running downloaders without ``resolve_media``
+        checkpoint_store: Records how much of each part file is on disk
+                          (see ``SegmentedTransfer``); without one, part
+                          files are never resumed
+    """
+    def __init__(self, timeout: float = 30.0,
+                 resolver_workers: int = RESOLVER_WORKERS,
+                 blocking_workers: int = BLOCKING_WORKERS,
+                 headers: Optional[Dict[str, str]] = None,
+                 checkpoint_store=None):
+        self.timeout = timeout
+        self.checkpoint_store = checkpoint_store
+        self.headers = {"User-Agent": USER_AGENT}
+        self.headers.update(headers or {})
+        self._resolver = ThreadPoolExecutor(resolver_workers, thread_name_prefix="resolve")
+        self._blocking = ThreadPoolExecutor(blocking_workers, thread_name_prefix="blocking")
+        self._callbacks = ThreadPoolExecutor(1, thread_name_prefix="async-done")
+        # One thread, so checkpoint writes land in the order they were made
+        self._checkpoints = ThreadPoolExecutor(1, thread_name_prefix="checkpoint")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def submit(self, task: DownloadTask, downloader, connections: Optional[int],
+               progress: Optional[ProgressCallback], done: DoneCallback,
+               throttle: Optional[Throttle] = None,
+               cancel: Optional[CancellationToken] = None) -> Future:
+        """
+        Start downloading a task on the loop; safe to call from any thread.
+
+        ``done`` is called on the completion thread with the task, the
+        downloaded file (or None) and the exception (or None).
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(task, downloader, connections, progress, throttle, cancel),
+            self._ensure_loop()
+        )
+
+        def deliver(finished: Future) -> None:
+            error = finished.exception()
+            result = None if error else finished.result()
+            self._callbacks.submit(done, task, result, error)
+
+        future.add_done_callback(deliver)
+        return future
+
+    def close(self) -> None:
+        """Stop the event loop and worker pools."""
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        self._resolver.shutdown(wait=False)
+        self._blocking.shutdown(wait=False)
+        self._callbacks.shutdown(wait=True)
+        # Let queued checkpoint writes reach the database
+        self._checkpoints.shutdown(wait=True)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread on first use."""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="async-downloads", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _run(self, task: DownloadTask, downloader, connections: Optional[int],
+                   progress: Optional[ProgressCallback],
+                   throttle: Optional[Throttle] = None,
+                   cancel: Optional[CancellationToken] = None) -> str:
+        """Resolve a task and fetch its media, falling back to a blocking download."""
+        loop = asyncio.get_running_loop()
+        media = await loop.run_in_executor(
+            self._resolver, downloader.resolve_media,
+            task.url, task.download_path, task.video_format, task.resolution
+        )
+        if media is None:
+            return await loop.run_in_executor(
+                self._blocking,
+                lambda: downloader.download(
+                    task.url, task.download_path, task.video_format, task.resolution,
+                    connections=connections, progress_callback=progress, throttle=throttle,
+                    cancel_token=cancel
+                )
+            )
+        try:
+            return await self._fetch_media(media, progress, throttle, cancel)
+        except (OSError, asyncio.TimeoutError, TransferError):
+            if not media.from_cache:
+                raise
+        # Cached stream URLs can be revoked before they expire
+        media = await loop.run_in_executor(
+            self._resolver,
+            lambda: downloader.resolve_media(
+                task.url, task.download_path, task.video_format, task.resolution,
+                refresh=True
+            )
+        )
+        if media is None:
+            raise TransferError(f"Could not resolve {task.url}")
+        return await self._fetch_media(media, progress, throttle, cancel)
+
+    async def _fetch_media(self, media, progress: Optional[ProgressCallback],
+                           throttle: Optional[Throttle],
+                           cancel: Optional[CancellationToken]) -> str:
+        """Fetch resolved media and report the outcome to its resolver."""
+        try:
+            path = await self.fetch(
+                media.url, media.destination, media.headers, progress, throttle, cancel
+            )
+        except DownloadCancelled:
+            # Says nothing about the media URL
+            raise
+        except Exception as e:
+            # A revoked cached URL is resolved again and reported then
+            if media.on_fetched is not None and not media.from_cache:
+                self._callbacks.submit(media.on_fetched, e)
+            raise
+        if media.on_fetched is not None:
+            # Reported from the completion thread, ahead of the task's result
+            self._callbacks.submit(media.on_fetched, None)
+        return path
+
+    async def fetch(self, url: str, destination: str,
+                    headers: Optional[Dict[str, str]] = None,
+                    progress: Optional[ProgressCallback] = None,
+                    throttle: Optional[Throttle] = None,
+                    cancel: Optional[CancellationToken] = None) -> str:
+        """
+        Download a URL to a file over one connection, resuming a part file.
+
+        Returns:
+            str: Path to the downloaded file
+
+        Raises:
+            TransferError: If the server response is unusable
+            DownloadCancelled: If ``cancel`` was set; the part file is kept
+        """
+        if cancel is None:
+            return await self._fetch(url, destination, headers, progress, throttle)
+
+        cancel.raise_if_cancelled()
+        loop = asyncio.get_running_loop()
+        current = asyncio.current_task()
+        fetching = True
+
+        def interrupt() -> None:
+            # Runs on the loop thread, so it cannot race the finally below
+            if fetching:
+                current.cancel()
+
+        cancel.on_cancel(lambda: loop.call_soon_threadsafe(interrupt))
+        try:
+            return await self._fetch(url, destination, headers, progress, throttle)
+        except asyncio.CancelledError:
+            if not cancel.cancelled:
+                raise
+            cancel.raise_if_cancelled()
+        finally:
+            fetching = False
+
+    async def _fetch(self, url: str, destination: str,
+                     headers: Optional[Dict[str, str]],
+                     progress: Optional[ProgressCallback],
+                     throttle: Optional[Throttle]) -> str:
+        """Fetch a URL, following redirects and appending to its part file."""
+        part_path = destination + PART_SUFFIX
+        offset, remote = await self._resume_point(part_path)
+
+        for _ in range(MAX_REDIRECTS):
+            extra = {}
+            if offset:
+                extra["Range"] = f"bytes={offset}-"
+                if remote.validator:
+                    extra["If-Range"] = remote.validator
+            reader, writer, status, response_headers = await self._open(url, headers, extra)
+            try:
+                if status in (301, 302, 303, 307, 308) and "location" in response_headers:
+                    url = urljoin(url, response_headers["location"])
+                    continue
+                if status == 416 and offset:
+                    total = _content_range(response_headers)[1]
+                    if total == offset == os.path.getsize(part_path):
+                        # The part file already holds the whole body
+                        break
+                    offset = self._restart(part_path)
+                    continue
+                if status not in (200, 206):
+                    raise HTTPStatusError(status, url, response_headers)
+
+                if status == 206:
+                    start, total = _content_range(response_headers)
+                    if start != offset:
+                        raise TransferError(
+                            f"Unexpected Content-Range: {response_headers.get('content-range')!r}"
+                        )
+                    if remote.size is not None and total != remote.size:
+                        # Without validators a changed file only shows in its size
+                        offset = self._restart(part_path)
+                        continue
+                else:
+                    # A full body replaces whatever the part file held
+                    offset = self._restart(part_path) if offset else 0
+                    length = response_headers.get("content-length")
+                    total = int(length) if length and length.isdigit() else None
+                remote = RemoteFile(
+                    url, total, status == 206 or "bytes" in response_headers.get(
+                        "accept-ranges", ""
+                    ),
+                    response_headers.get("etag", remote.etag if offset else None),
+                    response_headers.get(
+                        "last-modified", remote.last_modified if offset else None
+                    )
+                )
+                await self._receive(
+                    reader, response_headers, part_path, offset, total, progress, throttle,
+                    self._checkpointer(part_path, remote)
+                )
+                if total is not None and os.path.getsize(part_path) != total:
+                    raise TransferError(
+                        f"Expected {total} bytes but the part file holds "
+                        f"{os.path.getsize(part_path)}"
+                    )
+                break
+            finally:
+                writer.close()
+        else:
+            raise TransferError(f"Too many redirects for {url}")
+
+        os.replace(part_path, destination)
+        self._restart(part_path)
+        return destination
+
+    async def _resume_point(self, part_path: str) -> Tuple[int, RemoteFile]:
+        """
+        Return how many leading bytes of a part file can be kept.
+
+        Only a checkpointed prefix counts: a part file the segmented engine
+        preallocated holds zeros wherever no range was written.
+        """
+        checkpoint = None
+        if self.checkpoint_store is not None and os.path.exists(part_path):
+            checkpoint = await asyncio.wrap_future(
+                self._checkpoints.submit(self.checkpoint_store.load_checkpoint, part_path)
+            )
+        if not checkpoint:
+            return 0, RemoteFile("", None, False)
+
+        remote = RemoteFile(
+            checkpoint["url"], checkpoint["size"], True,
+            checkpoint["etag"], checkpoint["last_modified"]
+        )
+        ranges = checkpoint["ranges"]
+        offset = ranges[0][1] + 1 if ranges and ranges[0][0] == 0 else 0
+        if not offset or os.path.getsize(part_path) < offset:
+            return self._restart(part_path), remote
+        return offset, remote
+
+    def _restart(self, part_path: str) -> int:
+        """Forget a part file's checkpoint so it is downloaded from the start."""
+        if self.checkpoint_store is not None:
+            self._queue_store_write(self.checkpoint_store.clear_checkpoint, part_path)
+        return 0
+
+    def _checkpointer(self, part_path: str, remote: RemoteFile) -> Optional[Checkpoint]:
+        """Build the callback recording a part file's contiguous prefix."""
+        store = self.checkpoint_store
+        # Without a size a cut-off file cannot be told from a finished one
+        if store is None or not remote.accepts_ranges or remote.size is None:
+            return None
+
+        def save(written: int) -> None:
+            if written:
+                self._queue_store_write(
+                    store.save_checkpoint, part_path, url=remote.url, size=remote.size,
+                    etag=remote.etag, last_modified=remote.last_modified,
+                    ranges=[(0, written - 1)]
+                )
+        return save
+
+    def _queue_store_write(self, method, *args, **kwargs) -> None:
+        """Run a checkpoint store write on the checkpoint thread without waiting for it."""
+        self._checkpoints.submit(method, *args, **kwargs).add_done_callback(_log_store_failure)
+
+    async def _open(self, url: str, headers: Optional[Dict[str, str]],
+                    extra: Dict[str, str]) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter,
+                                                    int, Dict[str, str]]:
+        """Send a GET request and read the status line and headers."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise TransferError(f"Unsupported URL scheme: {parts.scheme!r}")
+        secure = parts.scheme == "https"
+        port = parts.port or (443 if secure else 80)
+        if secure and self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                parts.hostname, port,
+                ssl=self._ssl_context if secure else None,
+                limit=CHUNK_SIZE * 2
+            ),
+            self.timeout
+        )
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        merged = dict(self.headers)
+        merged.update(headers or {})
+        merged.update(extra)
+        merged.update({
+            "Host": parts.netloc,
+            "Accept-Encoding": "identity",
+            "Connection": "close",
+        })
+        request = f"GET {path} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in merged.items()
+        ) + "\r\n"
+        writer.write(request.encode("latin-1"))
+
+        try:
+            await asyncio.wait_for(writer.drain(), self.timeout)
+            status_line = await self._readline(reader)
+            fields = status_line.split(None, 2)
+            if len(fields) < 2 or not fields[1].isdigit():
+                raise TransferError(f"Malformed status line: {status_line!r}")
+
+            response_headers = {}
+            while True:
+                line = await self._readline(reader)
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer, int(fields[1]), response_headers
+
+    async def _receive(self, reader: asyncio.StreamReader, headers: Dict[str, str],
+                       part_path: str, offset: int, total: Optional[int],
+                       progress: Optional[ProgressCallback],
+                       throttle: Optional[Throttle] = None,
+                       checkpoint: Optional[Checkpoint] = None) -> None:
+        """
+        Write a response body into the part file, appending after ``offset``.
+
+        ``checkpoint`` is called every few seconds and when the body is cut
+        short, after the bytes it records have been flushed.
+        """
+        with open(part_path, "r+b" if offset else "wb") as output:
+            output.seek(offset)
+            output.truncate()
+            try:
+                await self._receive_body(
+                    reader, headers, output, offset, total, progress, throttle, checkpoint
+                )
+            except BaseException:
+                if checkpoint is not None:
+                    output.flush()
+                    checkpoint(output.tell())
+                raise
+
+    async def _receive_body(self, reader: asyncio.StreamReader, headers: Dict[str, str],
+                            output, offset: int, total: Optional[int],
+                            progress: Optional[ProgressCallback],
+                            throttle: Optional[Throttle],
+                            checkpoint: Optional[Checkpoint]) -> None:
+        """Copy a plain or chunked response body into an open part file."""
+        length = headers.get("content-length")
+        remaining = int(length) if length and length.isdigit() else None
+        chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+        written = offset
+        last_saved = time.monotonic()
+
+        def advance(amount: int) -> None:
+            nonlocal written, last_saved
+            written += amount
+            if progress is not None:
+                progress(written, total)
+            if checkpoint is not None and time.monotonic() - last_saved >= CHECKPOINT_INTERVAL:
+                last_saved = time.monotonic()
+                output.flush()
+                checkpoint(written)
+
+        if chunked:
+            while True:
+                size_line = await self._readline(reader)
+                size = int(size_line.split(";")[0], 16)
+                if size == 0:
+                    break
+                while size > 0:
+                    chunk = await self._read(reader, min(CHUNK_SIZE, size))
+                    output.write(chunk)
+                    size -= len(chunk)
+                    advance(len(chunk))
+                    await _wait(throttle, len(chunk))
+                await self._readline(reader)
+            return
+
+        while remaining is None or remaining > 0:
+            chunk = await asyncio.wait_for(
+                reader.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)),
+                self.timeout
+            )
+            if not chunk:
+                if remaining is None:
+                    break
+                raise TransferError(f"Connection closed with {remaining} bytes left")
+            output.write(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+            advance(len(chunk))
+            await _wait(throttle, len(chunk))
+
+    async def _read(self, reader: asyncio.StreamReader, size: int) -> bytes:
+        """Read up to ``size`` bytes, failing if the connection closes."""
+        chunk = await asyncio.wait_for(reader.read(size), self.timeout)
+        if not chunk:
+            raise TransferError("Connection closed inside a chunk")
+        return chunk
+
+    async def _readline(self, reader: asyncio.StreamReader) -> str:
+        """Read one CRLF-terminated header line without its terminator."""
+        line = await asyncio.wait_for(reader.readline(), self.timeout)
+        if not line.endswith(b"\n"):
+            raise TransferError("Connection closed while reading headers")
+        return line.decode("latin-1").rstrip("\r\n")
@@ -0,0 +1,167 @@
+"""
+Health-based ordering of the resolver backends a downloader can use.
+
+Outcomes are recorded per (platform, format, backend) in the history
+database with exponential decay, so recent results dominate. Backends are
+tried in order of smoothed success rate, with latency breaking ties.
+A circuit breaker takes a backend out of rotation after consecutive
+failures. Once its cooldown has passed, one download probes it: success
+closes the circuit, and failure reopens it with a doubled cooldown.
+Backends ranked below the best are also tried first once per cooldown, so
+a backend demoted by a few failures can earn its place back.
+"""
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Weight kept by past outcomes each time a new one is recorded
+DECAY = 0.95
+# Success rates closer than this are treated as equal and latency decides
+RATE_RESOLUTION = 0.1
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class BackendSelector:
+    """
+    Orders backends by recorded health and keeps failing ones out of rotation.
+
+    Args:
+        history: DownloadHistory persisting the statistics; in memory only if None
+        failure_threshold: Consecutive failures that open a backend's circuit
+        cooldown: Seconds before an open circuit is first probed
+        max_cooldown: Upper bound for the cooldown as it doubles
+    """
+    def __init__(self, history=None, failure_threshold: int = 3,
+                 cooldown: float = 60.0, max_cooldown: float = 3600.0):
+        self.history = history
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        # Statistics by (platform, video_format), then by backend
+        self._stats: Dict[Tuple[str, str], Dict[str, dict]] = {}
+        # Start times of probes in flight by (platform, video_format, backend)
+        self._probes: Dict[Tuple[str, str, str], float] = {}
+
+    def order(self, platform: str, video_format: str, candidates: Iterable[str]) -> List[str]:
+        """
+        Backends a request should try, best first.
+
+        Backends with an open circuit are left out, and those due for a
+        probe go first. If every circuit is open, all candidates are returned
+        anyway: skipping them would fail the download without an attempt.
+        """
+        candidates = list(candidates)
+        now = time.time()
+        with self._lock:
+            stats = self._load(platform, video_format)
+
+            def rank(backend):
+                entry = stats.get(backend) or {}
+                successes = entry.get("successes", 0.0)
+                failures = entry.get("failures", 0.0)
+                rate = (successes + 1) / (successes + failures + 2)
+                return (-round(rate / RATE_RESOLUTION), entry.get("mean_seconds") or 0.0,
+                        candidates.index(backend))
+
+            probes, healthy = [], []
+            for backend in candidates:
+                state = self._state(stats.get(backend), now)
+                if state == CircuitState.CLOSED:
+                    healthy.append(backend)
+                elif state == CircuitState.HALF_OPEN and self._claim_probe(
+                        platform, video_format, backend, now):
+                    probes.append(backend)
+            healthy.sort(key=rank)
+            for backend in healthy[1:]:
+                # Backends never tried keep their place as fallbacks
+                last_attempt = (stats.get(backend) or {}).get("last_attempt")
+                if (last_attempt is not None and now - last_attempt >= self.cooldown
+                        and self._claim_probe(platform, video_format, backend, now)):
+                    probes.append(backend)
+
+            ordered = probes + [backend for backend in healthy if backend not in probes]
+            return ordered or sorted(candidates, key=rank)
+
+    def record(self, platform: str, video_format: str, backend: str, success: bool,
+               seconds: Optional[float] = None, error: Optional[str] = None) -> None:
+        """Record one attempt; ``seconds`` only counts towards latency on success."""
+        now = time.time()
+        with self._lock:
+            stats = self._load(platform, video_format)
+            entry = stats.setdefault(backend, {
+                "successes": 0.0, "failures": 0.0, "mean_seconds": None,
+                "consecutive_failures": 0, "last_failure": None, "last_error": None,
+                "last_attempt": None,
+            })
+            was_open = entry["consecutive_failures"] >= self.failure_threshold
+            entry["successes"] = entry["successes"] * DECAY + (1 if success else 0)
+            entry["failures"] = entry["failures"] * DECAY + (0 if success else 1)
+            entry["last_attempt"] = now
+            if success:
+                if seconds is not None:
+                    mean = entry["mean_seconds"]
+                    entry["mean_seconds"] = seconds if mean is None else mean * 0.8 + seconds * 0.2
+                entry["consecutive_failures"] = 0
+            else:
+                entry["consecutive_failures"] += 1
+                entry["last_failure"] = now
+                entry["last_error"] = error
+            self._probes.pop((platform, video_format, backend), None)
+            if self.history is not None:
+                self.history.save_backend_stats(platform, video_format, backend, entry)
+
+        if success and was_open:
+            logger.info(f"{backend} recovered for {platform} {video_format}; circuit closed")
+        elif entry["consecutive_failures"] >= self.failure_threshold:
+            logger.warning(
+                f"{backend} failed {entry['consecutive_failures']} times in a row for "
+                f"{platform} {video_format}; circuit open for "
+                f"{self._cooldown_for(entry['consecutive_failures']):.0f}s"
+            )
+
+    def state(self, platform: str, video_format: str, backend: str) -> CircuitState:
+        """Current circuit state of a backend."""
+        with self._lock:
+            return self._state(self._load(platform, video_format).get(backend), time.time())
+
+    def _load(self, platform: str, video_format: str) -> Dict[str, dict]:
+        """Statistics for a platform and format, read from history on first use."""
+        key = (platform, video_format)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = {}
+            if self.history is not None:
+                for row in self.history.get_backend_stats(platform, video_format):
+                    stats[row.pop("backend")] = row
+            self._stats[key] = stats
+        return stats
+
+    def _state(self, entry: Optional[dict], now: float) -> CircuitState:
+        if entry is None or entry["consecutive_failures"] < self.failure_threshold:
+            return CircuitState.CLOSED
+        if now - (entry["last_failure"] or 0) < self._cooldown_for(entry["consecutive_failures"]):
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    def _claim_probe(self, platform: str, video_format: str, backend: str, now: float) -> bool:
+        """Let one request at a time probe a backend; a stalled probe expires."""
+        key = (platform, video_format, backend)
+        started = self._probes.get(key)
+        if started is not None and now - started < self.cooldown:
+            return False
+        self._probes[key] = now
+        return True
+
+    def _cooldown_for(self, consecutive_failures: int) -> float:
+        doublings = max(0, consecutive_failures - self.failure_threshold)
+        return min(self.max_cooldown, self.cooldown * 2 ** doublings)
@@ -0,0 +1,266 @@
+"""
+Hierarchical token-bucket bandwidth shaping.
+
+Every transfer path reports the bytes it receives to a ``BandwidthLimiter``
+and waits for the delay it returns. Each chunk is charged to the global
+bucket, the bucket of its host or platform, and the bucket of its task, so
+the slowest applicable cap sets the pace. Buckets run into debt instead of
+refusing a chunk, which keeps the accounting exact for any chunk size.
+
+The global cap may follow a time-of-day schedule. When a global cap is set,
+priority tasks may borrow its unused budget, skipping their host and
+default per-task caps while the global bucket has tokens to spare.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as dtime
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from .download_types import DownloadTask
+
+# Seconds of traffic a bucket may save up and send in one burst
+BURST_SECONDS = 1.0
+MIN_BURST = 256 * 1024
+# How often the global schedule is re-evaluated
+SCHEDULE_CHECK_INTERVAL = 1.0
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``rate`` bytes/second; None means unlimited.
+    """
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._rate: Optional[float] = None
+        self._updated = time.monotonic()
+        self.set_rate(rate, burst)
+        self._tokens = self._burst
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    def set_rate(self, rate: Optional[float], burst: Optional[float] = None) -> None:
+        """Change the refill rate; takes effect for the next chunk."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._rate = rate if rate and rate > 0 else None
+            self._burst = burst or max(MIN_BURST, (self._rate or 0) * BURST_SECONDS)
+            self._tokens = min(self._tokens, self._burst)
+
+    def available(self) -> float:
+        """Tokens that can be spent without waiting."""
+        with self._lock:
+            if self._rate is None:
+                return float("inf")
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def consume(self, amount: int) -> float:
+        """Spend ``amount`` tokens and return the seconds until the debt is repaid."""
+        with self._lock:
+            if self._rate is None:
+                return 0.0
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            return -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+    def _refill(self, now: float) -> None:
+        if self._rate is not None:
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+@dataclass
+class RateWindow:
+    """A daily time window with its own rate; wraps past midnight if end < start."""
+    start: dtime
+    end: dtime
+    rate: Optional[float]
+
+    def contains(self, moment: dtime) -> bool:
+        if self.start <= self.end:
+            return self.start <= moment < self.end
+        return moment >= self.start or moment < self.end
+
+
+class BandwidthSchedule:
+    """
+    Global rate by time of day, e.g. unlimited 01:00-06:00 and 5 MB/s otherwise::
+
+        BandwidthSchedule([RateWindow(time(1), time(6), None)], default_rate=5e6)
+    """
+    def __init__(self, windows: Iterable[RateWindow], default_rate: Optional[float] = None):
+        self.windows = list(windows)
+        self.default_rate = default_rate
+
+    def rate_at(self, when: Optional[datetime] = None) -> Optional[float]:
+        """Rate in force at ``when`` (default now); the first matching window wins."""
+        moment = (when or datetime.now()).time()
+        for window in self.windows:
+            if window.contains(moment):
+                return window.rate
+        return self.default_rate
+
+
+class BandwidthLimiter:
+    """
+    Shapes all transfers against global, per-host/platform and per-task caps.
+
+    Args:
+        global_rate: Cap on the sum of all transfers in bytes/second
+        host_rates: Caps keyed by platform name or host name; a host key
+                    also covers its subdomains
+        task_rate: Default cap for each task without its own ``rate_limit``
+        schedule: Time-of-day schedule for the global cap
+    """
+    def __init__(self, global_rate: Optional[float] = None,
+                 host_rates: Optional[Dict[str, float]] = None,
+                 task_rate: Optional[float] = None,
+                 schedule: Optional[BandwidthSchedule] = None):
+        self._lock = threading.Lock()
+        self.global_bucket = TokenBucket(global_rate)
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self._task_buckets: Dict[str, TokenBucket] = {}
+        self.task_rate = task_rate
+        self.schedule = schedule
+        self._schedule_checked = 0.0
+        for host, rate in (host_rates or {}).items():
+            self.set_host_rate(host, rate)
+        self._apply_schedule(force=True)
+
+    @property
+    def global_rate(self) -> Optional[float]:
+        return self.global_bucket.rate
+
+    def set_global_rate(self, rate: Optional[float]) -> None:
+        """Set a fixed global cap, replacing any schedule."""
+        self.schedule = None
+        self.global_bucket.set_rate(rate)
+
+    def set_schedule(self, schedule: Optional[BandwidthSchedule]) -> None:
+        """Make the global cap follow a time-of-day schedule."""
+        self.schedule = schedule
+        self._apply_schedule(force=True)
+
+    def set_host_rate(self, host: str, rate: Optional[float]) -> None:
+        """Cap a platform or host (and its subdomains); None removes the cap."""
+        key = host.lower()
+        with self._lock:
+            if rate:
+                bucket = self._host_buckets.get(key)
+                if bucket is None:
+                    self._host_buckets[key] = TokenBucket(rate)
+                else:
+                    bucket.set_rate(rate)
+            else:
+                self._host_buckets.pop(key, None)
+
+    def set_task_rate(self, task: DownloadTask, rate: Optional[float]) -> None:
+        """Change the cap of a single task, including one already running."""
+        task.rate_limit = rate
+        with self._lock:
+            bucket = self._task_buckets.get(task.task_id)
+        if bucket is not None:
+            bucket.set_rate(rate or self.task_rate)
+
+    def throttle_for(self, task: DownloadTask) -> "TaskThrottle":
+        """Bind the limiter to a task for use by a transfer engine."""
+        return TaskThrottle(self, task)
+
+    def reserve(self, task: DownloadTask, amount: int) -> float:
+        """Charge ``amount`` bytes of a task and return the seconds to wait."""
+        self._apply_schedule()
+        host_bucket = self._host_bucket(task)
+        task_bucket = self._task_bucket(task)
+
+        if self._may_borrow(task, amount):
+            # Borrow unused global budget past the host and default task caps
+            delays = [self.global_bucket.consume(amount)]
+            if task.rate_limit:
+                delays.append(task_bucket.consume(amount))
+            return max(delays)
+
+        delays = [self.global_bucket.consume(amount), task_bucket.consume(amount)]
+        if host_bucket is not None:
+            delays.append(host_bucket.consume(amount))
+        return max(delays)
+
+    def effective_rate(self, task: DownloadTask) -> Optional[float]:
+        """Tightest cap currently applying to a task, or None if unlimited."""
+        self._apply_schedule()
+        rates = [self.global_bucket.rate, task.rate_limit]
+        if not self._may_borrow(task, 0):
+            host_bucket = self._host_bucket(task)
+            rates.append(host_bucket.rate if host_bucket else None)
+            rates.append(self.task_rate)
+        rates = [rate for rate in rates if rate]
+        return min(rates) if rates else None
+
+    def forget(self, task: DownloadTask) -> None:
+        """Drop the bucket of a finished task."""
+        with self._lock:
+            self._task_buckets.pop(task.task_id, None)
+
+    def _may_borrow(self, task: DownloadTask, amount: int) -> bool:
+        """Whether a priority task can run on spare global budget."""
+        return (task.priority and self.global_bucket.rate is not None
+                and self.global_bucket.available() >= amount)
+
+    def _task_bucket(self, task: DownloadTask) -> TokenBucket:
+        with self._lock:
+            bucket = self._task_buckets.get(task.task_id)
+            if bucket is None:
+                bucket = self._task_buckets[task.task_id] = TokenBucket(
+                    task.rate_limit or self.task_rate
+                )
+            return bucket
+
+    def _host_bucket(self, task: DownloadTask) -> Optional[TokenBucket]:
+        """Bucket of the task's platform, else of its host or a parent domain."""
+        with self._lock:
+            if not self._host_buckets:
+                return None
+            if task.platform and task.platform.lower() in self._host_buckets:
+                return self._host_buckets[task.platform.lower()]
+            labels = (urlsplit(task.url).hostname or "").split(".")
+            for index in range(len(labels)):
+                bucket = self._host_buckets.get(".".join(labels[index:]))
+                if bucket is not None:
+                    return bucket
+            return None
+
+    def _apply_schedule(self, force: bool = False) -> None:
+        """Move the global cap to the scheduled rate, at most once per interval."""
+        schedule = self.schedule
+        if schedule is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._schedule_checked < SCHEDULE_CHECK_INTERVAL:
+            return
+        self._schedule_checked = now
+        rate = schedule.rate_at()
+        if rate != self.global_bucket.rate:
+            self.global_bucket.set_rate(rate)
+
+
+class TaskThrottle:
+    """
+    A limiter bound to one task, called with each chunk size.
+
+    ``rate`` exposes the task's current tightest cap for engines such as
+    yt-dlp that pace themselves from a single number.
+    """
+    def __init__(self, limiter: BandwidthLimiter, task: DownloadTask):
+        self.limiter = limiter
+        self.task = task
+
+    def __call__(self, amount: int) -> float:
+        return self.limiter.reserve(self.task, amount)
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self.limiter.effective_rate(self.task)
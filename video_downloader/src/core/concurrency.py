@@ -0,0 +1,138 @@
+"""
+Adaptive control of the number of concurrent downloads.
+
+The controller samples the aggregate throughput reported on the progress bus
+and adjusts the manager's limit AIMD-style: while another download raises
+throughput the limit grows by one; when throughput falls or downloads start
+failing it is cut multiplicatively. When an added download brings no gain,
+the limit steps back, which keeps it near the point where extra parallelism
+stops helping on the current site and network.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 5.0
+GAIN_THRESHOLD = 0.05
+DROP_THRESHOLD = 0.15
+DECREASE_FACTOR = 0.75
+
+
+class AdaptiveConcurrencyController:
+    """
+    Periodically retunes ``DownloadManager.max_concurrent`` from throughput.
+
+    Args:
+        manager: The download manager to tune
+        min_limit: Lowest limit the controller will set
+        max_limit: Highest limit; defaults to the engine's ceiling
+        interval: Seconds of throughput measured per adjustment
+        gain_threshold: Relative gain needed to count as an improvement
+        drop_threshold: Relative loss that triggers a multiplicative decrease
+        decrease_factor: Multiplier applied to the limit on a decrease
+    """
+    def __init__(self, manager, min_limit: int = 1, max_limit: Optional[int] = None,
+                 interval: float = SAMPLE_INTERVAL,
+                 gain_threshold: float = GAIN_THRESHOLD,
+                 drop_threshold: float = DROP_THRESHOLD,
+                 decrease_factor: float = DECREASE_FACTOR):
+        self.manager = manager
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max_limit or manager.max_concurrent_limit
+        self.interval = interval
+        self.gain_threshold = gain_threshold
+        self.drop_threshold = drop_threshold
+        self.decrease_factor = decrease_factor
+        self.throughput = 0.0
+        self._baseline: Optional[float] = None
+        self._last_change = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start tuning in a background thread."""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._baseline = None
+        self._last_change = 0
+        self._thread = threading.Thread(
+            target=self._run, name="concurrency-control", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop tuning and leave the limit where it is."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        bus = self.manager.progress_bus
+        last_bytes = bus.bytes_transferred
+        last_failures = self.manager.failure_count
+        last_time = time.monotonic()
+        while not self._stop_event.wait(self.interval):
+            now = time.monotonic()
+            transferred = bus.bytes_transferred
+            failures = self.manager.failure_count
+            self.throughput = (transferred - last_bytes) / max(now - last_time, 1e-6)
+            try:
+                self.adjust(self.throughput, failed=failures > last_failures)
+            except Exception as e:
+                logger.error(f"Concurrency adjustment failed: {e}")
+            last_bytes, last_failures, last_time = transferred, failures, now
+
+    def adjust(self, throughput: float, failed: bool = False) -> int:
+        """
+        Apply one AIMD step for a measured throughput and return the new limit.
+
+        Args:
+            throughput: Aggregate bytes/second over the last interval
+            failed: Whether downloads failed during the interval
+        """
+        limit = self.manager.max_concurrent
+        if failed:
+            return self._decrease(limit, throughput)
+        if not self.manager.saturated:
+            # Spare slots already: more concurrency cannot be the bottleneck
+            self._baseline = throughput
+            self._last_change = 0
+            return limit
+
+        baseline = self._baseline
+        if baseline is None or throughput > baseline * (1 + self.gain_threshold):
+            self._baseline = throughput
+            return self._set(limit + 1)
+        if throughput < baseline * (1 - self.drop_threshold):
+            return self._decrease(limit, throughput)
+        if self._last_change > 0:
+            # The last download added nothing: step back and hold there
+            self._baseline = max(baseline, throughput)
+            return self._set(limit - 1, change=0)
+        # On a plateau, keep probing upward so a recovered network is noticed
+        self._baseline = max(baseline, throughput)
+        return self._set(limit + 1)
+
+    def _decrease(self, limit: int, throughput: float) -> int:
+        self._baseline = throughput
+        return self._set(int(limit * self.decrease_factor))
+
+    def _set(self, limit: int, change: Optional[int] = None) -> int:
+        """Clamp and apply a new limit, remembering the direction of the change."""
+        previous = self.manager.max_concurrent
+        limit = max(self.min_limit, min(self.max_limit, limit))
+        self._last_change = (limit - previous) if change is None else change
+        if limit != previous:
+            logger.info(f"Adjusting concurrent downloads {previous} -> {limit} "
+                        f"at {self.throughput / 1024:.0f} KiB/s")
+            self.manager.set_max_concurrent(limit)
+        return limit
@@ -0,0 +1,179 @@
+"""
+Content-addressed storage for downloaded files.
+
+Finished downloads are hashed and stored once under their SHA-256 digest in
+``~/.video_downloader/store``. Every requested destination becomes a
+hardlink to the stored object, or a reflink where hardlinks are not
+possible, falling back to a plain copy across filesystems. The
+digest-to-path index lives in the history database, so a later request for
+content the store already holds completes without a transfer.
+
+Hardlinked destinations share their bytes: editing one in place changes all
+of them. Tools that rewrite files (renaming over the original) are unaffected.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from .download_history import DownloadHistory
+from .download_types import DownloadTask
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Linux ioctl that makes a copy-on-write clone of a whole file
+FICLONE = 0x40049409
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents as hex."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(source: str, target: str) -> bool:
+    """Clone a file copy-on-write if the platform and filesystem support it."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+    shutil.copystat(source, target)
+    return True
+
+
+def place_file(source: str, target: str) -> str:
+    """
+    Make ``target`` hold the same bytes as ``source`` using the cheapest method.
+
+    Tries a hardlink, then a reflink, then copies. An existing ``target`` is
+    replaced atomically.
+
+    Returns:
+        str: How the file was placed: "hardlink", "reflink" or "copy"
+    """
+    directory = os.path.dirname(os.path.abspath(target))
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return "hardlink"
+
+    # Build the new file next to the target, then swap it in
+    handle, staging = tempfile.mkstemp(dir=directory, prefix=".store-")
+    os.close(handle)
+    os.remove(staging)
+    try:
+        try:
+            os.link(source, staging)
+            method = "hardlink"
+        except OSError:
+            # Other filesystem, link limit reached or no hardlink support
+            if _reflink(source, staging):
+                method = "reflink"
+            else:
+                shutil.copy2(source, staging)
+                method = "copy"
+        os.replace(staging, target)
+    except BaseException:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+    return method
+
+
+class ContentStore:
+    """
+    Stores each distinct file once by digest and links destinations to it.
+
+    Args:
+        history: Database holding the digest-to-path index
+        root: Store directory; defaults to ``store`` next to the database
+    """
+    def __init__(self, history: DownloadHistory, root: Optional[Path] = None):
+        self.history = history
+        self.root = Path(root or Path(history.db_path).parent / "store")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def ingest(self, path: str, task: Optional[DownloadTask] = None,
+               digest: Optional[str] = None) -> str:
+        """
+        Hash a finished file, store it once and turn ``path`` into a link.
+
+        If the store already holds the same bytes, ``path`` is replaced by a
+        link to the existing object and the duplicate copy is freed. A
+        ``digest`` already computed by post-processing skips the hashing.
+
+        Returns:
+            str: The file's digest
+        """
+        path = os.path.abspath(path)
+        digest = digest or file_digest(path)
+        stored = self.object_path(digest)
+
+        known = self.history.get_content(digest)
+        if known is None or not stored.exists():
+            stored.parent.mkdir(exist_ok=True)
+            place_file(path, str(stored))
+            self.history.record_content(digest, os.path.getsize(stored), str(stored))
+        else:
+            method = place_file(str(stored), path)
+            logger.info(f"Deduplicated {path} against stored {digest[:12]} ({method})")
+
+        self.history.record_content_link(path, digest)
+        if task is not None and task.video_key:
+            self.history.record_content_source(
+                task.video_key, task.video_format, task.resolution,
+                digest, os.path.basename(path)
+            )
+        return digest
+
+    def place(self, source: str, target: str) -> str:
+        """Place a copy of a stored file at ``target`` and index the new link."""
+        target = os.path.abspath(target)
+        place_file(source, target)
+        digest = self.history.get_link_digest(os.path.abspath(source))
+        if digest is not None:
+            self.history.record_content_link(target, digest)
+        return target
+
+    def materialize(self, task: DownloadTask) -> Optional[str]:
+        """
+        Place stored content for a request into its download folder.
+
+        Returns:
+            str or None: Path of the placed file, or None if the content is
+            not in the store
+        """
+        if not task.video_key:
+            return None
+        source = self.history.find_content_source(
+            task.video_key, task.video_format, task.resolution
+        )
+        if source is None:
+            return None
+        stored = source["store_path"]
+        if not os.path.exists(stored):
+            # The object was removed behind our back; forget it
+            self.history.delete_content(source["digest"])
+            return None
+
+        directory = os.path.abspath(os.path.expanduser(task.download_path))
+        target = os.path.join(directory, source["filename"])
+        place_file(stored, target)
+        self.history.record_content_link(target, source["digest"])
+        return target
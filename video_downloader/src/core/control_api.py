@@ -0,0 +1,408 @@
+"""
+Local HTTP/JSON control API for a running downloader.
+
+Other tools on the machine can enqueue, inspect, pause, resume, cancel and
+retry downloads
+and follow progress as Server-Sent Events instead of polling the history
+database. Requests are served on their own threads and only call the
+manager's locked methods, so clients never wait on the Tk main loop.
+
+The server binds to 127.0.0.1 and requires a bearer token. Its address and
+token are written to ``~/.video_downloader/control.json`` (readable only by
+the owner) for clients to discover.
+
+Endpoints::
+
+    POST /tasks                 {"url": ..., "download_path", "video_format",
+                                 "resolution", "priority", "rate_limit"}
+    POST /tasks/bulk            {"urls": [...], <same defaults>} or {"tasks": [...]}
+    GET  /tasks?cursor=&limit=&status=    tasks this instance holds in memory
+    GET  /tasks/<task_id>
+    POST /tasks/<task_id>/cancel
+    POST /tasks/<task_id>/pause
+    POST /tasks/<task_id>/resume
+    POST /tasks/<task_id>/retry
+    POST /tasks/cancel-all      also stops playlist feeds
+    POST /tasks/pause-all       also pauses playlist feeds
+    POST /tasks/resume-all
+    GET  /events                text/event-stream of status and progress
+"""
+import json
+import logging
+import os
+import secrets
+import threading
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .download_types import DownloadTask, RESOLUTIONS, VIDEO_FORMATS
+from .platforms.supported_sites import get_site_by_url
+from .progress import StatusEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BODY_BYTES = 8 * 1024 * 1024
+# Seconds between keep-alive comments on an idle event stream
+EVENT_HEARTBEAT = 15.0
+# Paths under /tasks acting on every task, and the manager method prefix
+BATCH_ACTIONS = {"cancel-all": "cancel", "pause-all": "pause", "resume-all": "resume"}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def task_to_dict(task: DownloadTask) -> Dict[str, Any]:
+    """JSON-ready view of a task."""
+    return {
+        "task_id": task.task_id,
+        "history_id": task.history_id,
+        "url": task.url,
+        "title": task.title,
+        "platform": task.platform,
+        "status": task.status.value,
+        "download_path": task.download_path,
+        "video_format": task.video_format,
+        "resolution": task.resolution,
+        "bytes_done": task.bytes_done,
+        "total_bytes": task.total_bytes,
+        "rate": task.rate,
+        "eta": task.eta,
+        "retries": task.retries,
+        "error_message": task.error_message,
+        "file_path": task.file_path,
+        "checksum": task.checksum,
+        "thumbnail_path": task.thumbnail_path,
+        "scheduled_time": task.scheduled_time.isoformat() if task.scheduled_time else None,
+        "retry_at": task.retry_at.isoformat() if task.retry_at else None,
+    }
+
+
+class ControlServer:
+    """
+    Serves the control API for a DownloadManager on a background thread.
+
+    Args:
+        manager: Manager to control
+        port: TCP port on 127.0.0.1; 0 picks a free port
+        token: Bearer token clients must send; generated if omitted
+        default_path: Download directory for requests that do not name one
+        discovery_file: Where the address and token are published
+    """
+    def __init__(self, manager, port: int = DEFAULT_PORT, token: Optional[str] = None,
+                 default_path: Optional[str] = None,
+                 discovery_file: Optional[Path] = None):
+        self.manager = manager
+        self.token = token or secrets.token_urlsafe(32)
+        self.default_path = default_path or os.path.expanduser("~/Downloads")
+        self.discovery_file = discovery_file or Path.home() / ".video_downloader" / "control.json"
+        self._stopping = threading.Event()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ControlServer":
+        self._publish_discovery()
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="control-api", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Control API listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        try:
+            if json.loads(self.discovery_file.read_text()).get("url") == self.url:
+                self.discovery_file.unlink()
+        except (OSError, ValueError):
+            pass
+
+    def _publish_discovery(self) -> None:
+        """Write the address and token to a file only the owner can read."""
+        self.discovery_file.parent.mkdir(parents=True, exist_ok=True)
+        descriptor = os.open(self.discovery_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as discovery:
+            json.dump({"url": self.url, "token": self.token, "pid": os.getpid()}, discovery)
+
+    # Request handling, called from the server's threads
+
+    def enqueue(self, body: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Add one download; playlist and channel URLs are expanded in the background."""
+        task = self._build_task(body, defaults or {})
+        site = get_site_by_url(task.url)
+        if site.is_collection(task.url):
+            self.manager.add_collection(task)
+            return {"expanding": True, "url": task.url}
+        self.manager.add_download(task)
+        return task_to_dict(task)
+
+    def enqueue_bulk(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        items = body.get("tasks")
+        if items is None:
+            urls = body.get("urls")
+            items = [{"url": url} for url in urls] if isinstance(urls, list) else urls
+        if not isinstance(items, list) or not items:
+            raise ApiError(400, "Expected a non-empty 'urls' or 'tasks' list")
+
+        defaults = {key: value for key, value in body.items() if key not in ("urls", "tasks")}
+        accepted, rejected, collections = [], [], []
+        for item in items:
+            try:
+                task = self._build_task(item, defaults)
+            except ApiError as e:
+                rejected.append({"item": item, "error": str(e)})
+                continue
+            if get_site_by_url(task.url).is_collection(task.url):
+                self.manager.add_collection(task)
+                collections.append(task.url)
+            else:
+                accepted.append(task)
+        if accepted:
+            # Added through a feed so a large batch does not flood the queue
+            self.manager.add_downloads_from(iter(accepted))
+        return {
+            "accepted": [task.task_id for task in accepted],
+            "expanding": collections,
+            "rejected": rejected,
+        }
+
+    def list_tasks(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        """
+        Page through tasks in creation order; ``cursor`` is the last history_id seen.
+
+        Only covers the tasks the manager holds in memory (live ones and the
+        finished ones it has not trimmed), not the whole history database;
+        ``history_id`` is just a stable sort key across pages.
+        """
+        cursor = _int_param(query, "cursor", 0)
+        limit = max(1, min(_int_param(query, "limit", DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        statuses = set(query.get("status", []))
+
+        snapshot = self.manager.snapshot()
+        tasks = [
+            task for group in (snapshot.completed, snapshot.failed, snapshot.scheduled,
+                               snapshot.paused, snapshot.active, snapshot.queued)
+            for task in group
+            if (task.history_id or 0) > cursor
+            and (not statuses or task.status.value in statuses)
+        ]
+        tasks.sort(key=lambda task: task.history_id or 0)
+        page = tasks[:limit]
+        more = len(tasks) > limit
+        return {
+            "tasks": [task_to_dict(task) for task in page],
+            "next_cursor": page[-1].history_id if more else None,
+        }
+
+    def get_task(self, task_id: str) -> Dict[str, Any]:
+        task = self.manager.find_task(task_id)
+        if task is None:
+            raise ApiError(404, f"No task {task_id}")
+        return task_to_dict(task)
+
+    def cancel(self, task_id: str) -> Dict[str, Any]:
+        task = self.manager.cancel_download(task_id)
+        if task is None:
+            self.get_task(task_id)
+            raise ApiError(409, f"Task {task_id} has already finished")
+        return task_to_dict(task)
+
+    def pause(self, task_id: str) -> Dict[str, Any]:
+        task = self.manager.pause_download(task_id)
+        if task is None:
+            self.get_task(task_id)
+            raise ApiError(409, f"Task {task_id} is not queued, running or retrying")
+        return task_to_dict(task)
+
+    def resume(self, task_id: str) -> Dict[str, Any]:
+        task = self.manager.resume_download(task_id)
+        if task is None:
+            self.get_task(task_id)
+            raise ApiError(409, f"Task {task_id} is not paused, or is still stopping")
+        return task_to_dict(task)
+
+    def apply_to_all(self, action: str) -> Dict[str, Any]:
+        """Cancel, pause or resume every eligible task."""
+        tasks = getattr(self.manager, f"{action}_all")()
+        return {"tasks": [task.task_id for task in tasks]}
+
+    def retry(self, task_id: str) -> Dict[str, Any]:
+        task = self.manager.retry_download(task_id)
+        if task is None:
+            self.get_task(task_id)
+            raise ApiError(409, f"Task {task_id} has not failed or been cancelled")
+        return task_to_dict(task)
+
+    def _build_task(self, item: Any, defaults: Dict[str, Any]) -> DownloadTask:
+        if isinstance(item, str):
+            item = {"url": item}
+        if not isinstance(item, dict):
+            raise ApiError(400, "Each task must be an object or a URL string")
+        options = dict(defaults)
+        options.update(item)
+
+        url = options.get("url")
+        if not isinstance(url, str) or not url.strip():
+            raise ApiError(400, "Missing 'url'")
+        url = url.strip()
+        site = get_site_by_url(url)
+        if site is None:
+            raise ApiError(422, f"Unsupported platform: {url}")
+        video_format = options.get("video_format", "mp4")
+        if video_format not in VIDEO_FORMATS:
+            raise ApiError(422, f"video_format must be one of {VIDEO_FORMATS}")
+        resolution = options.get("resolution", "720p")
+        if resolution not in RESOLUTIONS:
+            raise ApiError(422, f"resolution must be one of {RESOLUTIONS}")
+        rate_limit = options.get("rate_limit")
+        if rate_limit is not None and not isinstance(rate_limit, (int, float)):
+            raise ApiError(422, "rate_limit must be a number of bytes per second")
+
+        return DownloadTask(
+            url=url,
+            download_path=options.get("download_path") or self.default_path,
+            video_format=video_format,
+            resolution=resolution,
+            platform=site.name,
+            priority=bool(options.get("priority", False)),
+            rate_limit=rate_limit
+        )
+
+    def stream_events(self, handler: "BaseHTTPRequestHandler") -> None:
+        """Write status and progress events to a client until it disconnects."""
+        subscription = self.manager.progress_bus.subscribe()
+        try:
+            handler.wfile.write(b": connected\n\n")
+            handler.wfile.flush()
+            while not self._stopping.is_set():
+                events = subscription.wait(EVENT_HEARTBEAT)
+                if not events:
+                    handler.wfile.write(b": keep-alive\n\n")
+                for event in events:
+                    kind = "status" if isinstance(event, StatusEvent) else "progress"
+                    data = json.dumps(asdict(event))
+                    handler.wfile.write(f"event: {kind}\ndata: {data}\n\n".encode("utf-8"))
+                handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            subscription.close()
+
+
+def _int_param(query: Dict[str, List[str]], name: str, default: int) -> int:
+    values = query.get(name)
+    if not values or values[0] == "":
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer")
+    if value < 0:
+        raise ApiError(400, f"'{name}' must not be negative")
+    return value
+
+
+def _make_handler(server: ControlServer):
+    class ControlRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+        def _dispatch(self, method: str) -> None:
+            parts = urlsplit(self.path)
+            segments = [segment for segment in parts.path.split("/") if segment]
+            try:
+                if not secrets.compare_digest(
+                    self.headers.get("Authorization", "").encode("utf-8", "replace"),
+                    f"Bearer {server.token}".encode("utf-8")
+                ):
+                    raise ApiError(401, "Missing or wrong bearer token")
+                if method == "GET" and segments == ["events"]:
+                    self._start_event_stream()
+                    return
+                status, payload = self._route(method, segments, parse_qs(parts.query))
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                logger.error(f"Control API request {method} {self.path} failed: {e}", exc_info=True)
+                status, payload = 500, {"error": "Internal error"}
+            self._send_json(status, payload)
+
+        def _route(self, method: str, segments: List[str],
+                   query: Dict[str, List[str]]) -> Tuple[int, Dict[str, Any]]:
+            if segments == ["tasks"]:
+                if method == "GET":
+                    return 200, server.list_tasks(query)
+                result = server.enqueue(self._read_json())
+                return (202 if result.get("expanding") else 201), result
+            if segments == ["tasks", "bulk"] and method == "POST":
+                return 202, server.enqueue_bulk(self._read_json())
+            if (len(segments) == 2 and segments[1] in BATCH_ACTIONS
+                    and segments[0] == "tasks" and method == "POST"):
+                return 200, server.apply_to_all(BATCH_ACTIONS[segments[1]])
+            if len(segments) == 2 and segments[0] == "tasks" and method == "GET":
+                return 200, server.get_task(segments[1])
+            if len(segments) == 3 and segments[0] == "tasks" and method == "POST":
+                if segments[2] == "cancel":
+                    return 200, server.cancel(segments[1])
+                if segments[2] == "pause":
+                    return 200, server.pause(segments[1])
+                if segments[2] == "resume":
+                    return 200, server.resume(segments[1])
+                if segments[2] == "retry":
+                    return 200, server.retry(segments[1])
+            raise ApiError(404, f"No endpoint {method} {self.path}")
+
+        def _read_json(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise ApiError(413, "Request body too large")
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                raise ApiError(400, "Request body is not valid JSON")
+            if not isinstance(body, dict):
+                raise ApiError(400, "Request body must be a JSON object")
+            return body
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _start_event_stream(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            server.stream_events(self)
+
+    return ControlRequestHandler
@@ -1,29 +1,293 @@
 """
 Download history management using SQLite database.
 """
+import json
 import os
+import queue
 import sqlite3
-from datetime import datetime
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple, Union
 
-from .download_manager import DownloadTask, DownloadStatus
+from .download_types import DownloadTask, DownloadStatus, FINISHED_STATUSES
+
+# Idle connections kept open for reuse across threads
+POOL_SIZE = 4
+# Prepared statements cached per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_SECONDS = 5.0
+
+# Applied to every connection when it is opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA foreign_keys = ON",
+)
+
+# Columns added after the first release, created on upgrade
+DOWNLOAD_COLUMNS = (
+    ("title", "TEXT"),
+    ("bytes_downloaded", "INTEGER DEFAULT 0"),
+    ("checksum", "TEXT"),
+    ("thumbnail_path", "TEXT"),
+)
+
+# Indexes backing browse, filter and per-URL lookups
+DOWNLOAD_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_downloads_created ON downloads (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads (status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_downloads_platform ON downloads (platform, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_downloads_url ON downloads (url)",
+)
+
+# External-content full-text index kept in sync by triggers
+FTS_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE downloads_fts USING fts5(
+        url, title, error_message,
+        content='downloads', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER downloads_fts_insert AFTER INSERT ON downloads BEGIN
+        INSERT INTO downloads_fts (rowid, url, title, error_message)
+        VALUES (new.id, new.url, new.title, new.error_message);
+    END
+    """,
+    """
+    CREATE TRIGGER downloads_fts_delete AFTER DELETE ON downloads BEGIN
+        INSERT INTO downloads_fts (downloads_fts, rowid, url, title, error_message)
+        VALUES ('delete', old.id, old.url, old.title, old.error_message);
+    END
+    """,
+    """
+    CREATE TRIGGER downloads_fts_update
+    AFTER UPDATE OF url, title, error_message ON downloads
+    WHEN old.url IS NOT new.url OR old.title IS NOT new.title
+        OR old.error_message IS NOT new.error_message
+    BEGIN
+        INSERT INTO downloads_fts (downloads_fts, rowid, url, title, error_message)
+        VALUES ('delete', old.id, old.url, old.title, old.error_message);
+        INSERT INTO downloads_fts (rowid, url, title, error_message)
+        VALUES (new.id, new.url, new.title, new.error_message);
+    END
+    """,
+    "INSERT INTO downloads_fts (downloads_fts) VALUES ('rebuild')",
+)
+
+# Rollup tables maintained by triggers so statistics are O(1) reads
+STATS_TABLES = (
+    """
+    CREATE TABLE stats_status (
+        status TEXT PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE stats_daily (
+        day TEXT NOT NULL,
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        bytes INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, status)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE stats_platform (
+        platform TEXT NOT NULL,
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        bytes INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (platform, status)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE stats_transfer (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        bytes INTEGER NOT NULL DEFAULT 0,
+        seconds REAL NOT NULL DEFAULT 0
+    )
+    """,
+)
+
+def _stats_delta(row: str, sign: str) -> str:
+    """Trigger body adding (+) or removing (-) one row's share of the rollups."""
+    completed = f"{row}.status = 'completed'"
+    size = f"(CASE WHEN {completed} THEN COALESCE({row}.bytes_downloaded, 0) ELSE 0 END)"
+    seconds = (
+        f"(CASE WHEN {completed} AND {row}.start_time IS NOT NULL AND {row}.end_time IS NOT NULL "
+        f"THEN MAX(0, (julianday({row}.end_time) - julianday({row}.start_time)) * 86400) "
+        f"ELSE 0 END)"
+    )
+    day = f"date({row}.created_at)"
+    platform = f"COALESCE({row}.platform, 'Unknown')"
+    return f"""
+        INSERT OR IGNORE INTO stats_status (status) VALUES ({row}.status);
+        UPDATE stats_status SET count = count {sign} 1
+        WHERE status = {row}.status;
+        INSERT OR IGNORE INTO stats_daily (day, status) VALUES ({day}, {row}.status);
+        UPDATE stats_daily SET count = count {sign} 1, bytes = bytes {sign} {size}
+        WHERE day = {day} AND status = {row}.status;
+        INSERT OR IGNORE INTO stats_platform (platform, status) VALUES ({platform}, {row}.status);
+        UPDATE stats_platform SET count = count {sign} 1, bytes = bytes {sign} {size}
+        WHERE platform = {platform} AND status = {row}.status;
+        UPDATE stats_transfer SET bytes = bytes {sign} {size}, seconds = seconds {sign} {seconds}
+        WHERE id = 1;
+    """
+
+STATS_TRIGGERS = (
+    f"""
+    CREATE TRIGGER downloads_stats_insert AFTER INSERT ON downloads BEGIN
+        {_stats_delta("new", "+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER downloads_stats_delete AFTER DELETE ON downloads BEGIN
+        {_stats_delta("old", "-")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER downloads_stats_update
+    AFTER UPDATE OF status, platform, bytes_downloaded, start_time, end_time ON downloads
+    WHEN old.status IS NOT new.status OR old.platform IS NOT new.platform
+        OR old.bytes_downloaded IS NOT new.bytes_downloaded
+        OR old.start_time IS NOT new.start_time OR old.end_time IS NOT new.end_time
+    BEGIN
+        {_stats_delta("old", "-")}
+        {_stats_delta("new", "+")}
+    END
+    """,
+)
+
+# One-off backfill of the rollups from rows written before they existed
+STATS_BACKFILL = (
+    """
+    INSERT INTO stats_status (status, count)
+    SELECT status, COUNT(*) FROM downloads GROUP BY status
+    """,
+    """
+    INSERT INTO stats_daily (day, status, count, bytes)
+    SELECT date(created_at), status, COUNT(*),
+           SUM(CASE WHEN status = 'completed' THEN COALESCE(bytes_downloaded, 0) ELSE 0 END)
+    FROM downloads GROUP BY date(created_at), status
+    """,
+    """
+    INSERT INTO stats_platform (platform, status, count, bytes)
+    SELECT COALESCE(platform, 'Unknown'), status, COUNT(*),
+           SUM(CASE WHEN status = 'completed' THEN COALESCE(bytes_downloaded, 0) ELSE 0 END)
+    FROM downloads GROUP BY COALESCE(platform, 'Unknown'), status
+    """,
+    """
+    INSERT INTO stats_transfer (id, bytes, seconds)
+    SELECT 1,
+           COALESCE(SUM(COALESCE(bytes_downloaded, 0)), 0),
+           COALESCE(SUM(MAX(0, (julianday(end_time) - julianday(start_time)) * 86400)), 0)
+    FROM downloads
+    WHERE status = 'completed' AND start_time IS NOT NULL AND end_time IS NOT NULL
+    """,
+)
+
+# Statuses of tasks kept in the download_queue journal; moving to any other
+# status removes a task's journal row
+JOURNAL_STATUSES = (
+    DownloadStatus.PENDING, DownloadStatus.QUEUED, DownloadStatus.IN_PROGRESS,
+    DownloadStatus.RETRYING, DownloadStatus.PROCESSING,
+)
+# Seconds a journal row stays leased without a heartbeat
+DEFAULT_LEASE_SECONDS = 30.0
+
+JOURNAL_BACKFILL = """
+    INSERT INTO download_queue (download_id, seq, status)
+    SELECT id, id, status FROM downloads
+    WHERE status IN ('pending', 'queued', 'in_progress', 'retrying', 'processing')
+"""
+
+def _utc_timestamp(value: datetime) -> str:
+    """Format a datetime like SQLite's CURRENT_TIMESTAMP (UTC, seconds)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Parse a TIMESTAMP column value, which SQLite hands back as text."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"*' for term in terms)
 
 class DownloadHistory:
-    def __init__(self):
+    def __init__(self, db_path: Optional[Path] = None):
         # Create data directory in user's home directory
         self.data_dir = Path.home() / ".video_downloader"
         self.data_dir.mkdir(exist_ok=True)
         
         # Database file path
-        self.db_path = self.data_dir / "download_history.db"
+        self.db_path = db_path or self.data_dir / "download_history.db"
+
+        # Long-lived connections shared by all threads, one at a time
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(POOL_SIZE)
+
+        # Instance leasing the journal rows this history writes (see queue_journal.py)
+        self.queue_owner: Optional[str] = None
+        self.lease_seconds = DEFAULT_LEASE_SECONDS
         
         # Initialize database
         self._init_db()
 
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open and tune a new database connection."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection; the block runs as one transaction."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._open_connection()
+
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        """Close all pooled connections."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
     def _init_db(self):
         """Initialize the SQLite database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
+            # Only takes effect on a new database; lets freed pages be
+            # returned to the filesystem a few at a time
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            # WAL lets readers proceed while a download updates its row
+            conn.execute("PRAGMA journal_mode = WAL")
             cursor = conn.cursor()
             
             # Create downloads table
@@ -44,12 +308,162 @@ class DownloadHistory:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+
+            existing = {row["name"] for row in cursor.execute("PRAGMA table_info(downloads)")}
+            for column, declaration in DOWNLOAD_COLUMNS:
+                if column not in existing:
+                    cursor.execute(f"ALTER TABLE downloads ADD COLUMN {column} {declaration}")
+
+            for statement in DOWNLOAD_INDEXES:
+                cursor.execute(statement)
+
+            self.fts_enabled = self._init_fts(cursor)
+            self._init_stats(cursor)
+
+            # Create resume checkpoints table, keyed by the .part file path
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS transfer_checkpoints (
+                    part_path TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    ranges TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Content-addressed store: stored objects by digest, the request
+            # that produced each one, and every path linked to an object
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS content_objects (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    store_path TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS content_sources (
+                    video_key TEXT NOT NULL,
+                    video_format TEXT NOT NULL,
+                    resolution TEXT NOT NULL,
+                    digest TEXT NOT NULL REFERENCES content_objects (digest) ON DELETE CASCADE,
+                    filename TEXT NOT NULL,
+                    PRIMARY KEY (video_key, video_format, resolution)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS content_links (
+                    path TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL REFERENCES content_objects (digest) ON DELETE CASCADE
+                )
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_content_links_digest ON content_links (digest)"
+            )
+
+            # Decayed outcome counts and circuit breaker state of each
+            # resolver backend, per platform and format
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS backend_stats (
+                    platform TEXT NOT NULL,
+                    video_format TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    successes REAL NOT NULL DEFAULT 0,
+                    failures REAL NOT NULL DEFAULT 0,
+                    mean_seconds REAL,
+                    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                    last_failure REAL,
+                    last_error TEXT,
+                    last_attempt REAL,
+                    PRIMARY KEY (platform, video_format, backend)
+                )
+            """)
+
+            self._init_journal(cursor)
+
+    def _init_journal(self, cursor: sqlite3.Cursor):
+        """
+        Create the queue journal: one row per unfinished, unscheduled task in
+        queue order, leased by the manager instance holding it. Tasks left
+        pending by a version without the journal are backfilled.
+        """
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'download_queue'
+        """)
+        if cursor.fetchone():
+            return
+
+        cursor.execute("""
+            CREATE TABLE download_queue (
+                download_id INTEGER PRIMARY KEY
+                    REFERENCES downloads (id) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                task TEXT,
+                owner TEXT,
+                lease_expires REAL NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("CREATE INDEX idx_download_queue_seq ON download_queue (seq)")
+        cursor.execute(
+            "CREATE INDEX idx_download_queue_owner ON download_queue (owner, lease_expires)"
+        )
+        cursor.execute(JOURNAL_BACKFILL)
             
-            conn.commit()
+    def _init_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """Create the full-text index if SQLite was built with FTS5."""
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'downloads_fts'
+        """)
+        if cursor.fetchone():
+            self._refresh_triggers(cursor, FTS_SCHEMA)
+            return True
+
+        try:
+            for statement in FTS_SCHEMA:
+                cursor.execute(statement)
+        except sqlite3.OperationalError:
+            # No FTS5 in this SQLite build; search falls back to LIKE
+            return False
+        return True
+
+    def _init_stats(self, cursor: sqlite3.Cursor):
+        """Create the statistics rollups and backfill them on first run."""
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'stats_transfer'
+        """)
+        if cursor.fetchone():
+            self._refresh_triggers(cursor, STATS_TRIGGERS)
+            return
+
+        for statement in STATS_TABLES + STATS_BACKFILL + STATS_TRIGGERS:
+            cursor.execute(statement)
+
+    def _refresh_triggers(self, cursor: sqlite3.Cursor, statements):
+        """Recreate triggers whose stored definition differs from the current one."""
+        for statement in statements:
+            words = statement.split()
+            if words[:2] != ["CREATE", "TRIGGER"]:
+                continue
+            name = words[2]
+            cursor.execute("""
+                SELECT sql FROM sqlite_master
+                WHERE type = 'trigger' AND name = ?
+            """, (name,))
+            row = cursor.fetchone()
+            if row is not None and row["sql"] == statement.strip():
+                continue
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(statement)
 
     def add_download(self, task: DownloadTask) -> int:
-        """Add a new download task to history."""
-        with sqlite3.connect(self.db_path) as conn:
+        """Add a new download task to history and record its row id on the task."""
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -71,100 +485,505 @@ class DownloadHistory:
                 task.error_message
             ))
             
-            return cursor.lastrowid
+            task.history_id = cursor.lastrowid
+            self._journal(cursor, task, task.status)
+            return task.history_id
 
     def update_status(self, task: DownloadTask, status: DownloadStatus,
                      error_message: Optional[str] = None):
         """Update the status of a download task."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             updates = {
                 "status": status.value,
-                "error_message": error_message
+                "error_message": error_message,
+                # Every attempt of a task is counted on its original row
+                "retries": task.retries
             }
             
+            if status == DownloadStatus.IN_PROGRESS:
+                updates["start_time"] = datetime.now()
             if status == DownloadStatus.COMPLETED:
                 updates["end_time"] = datetime.now()
+                updates["bytes_downloaded"] = task.bytes_done
+                updates["checksum"] = task.checksum
+                updates["thumbnail_path"] = task.thumbnail_path
+            if task.title:
+                updates["title"] = task.title
             
             set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
             values = list(updates.values())
             
-            cursor.execute(f"""
-                UPDATE downloads
-                SET {set_clause}
-                WHERE url = ? AND end_time IS NULL
-            """, values + [task.url])
+            if task.history_id is not None:
+                cursor.execute(f"""
+                    UPDATE downloads
+                    SET {set_clause}
+                    WHERE id = ?
+                """, values + [task.history_id])
+                # In the same transaction, so the journal never disagrees
+                # with the status
+                self._journal(cursor, task, status)
+            else:
+                # Tasks created outside this history have no row id
+                cursor.execute(f"""
+                    UPDATE downloads
+                    SET {set_clause}
+                    WHERE url = ? AND end_time IS NULL
+                """, values + [task.url])
+
+    def _journal(self, cursor: sqlite3.Cursor, task: DownloadTask, status: DownloadStatus):
+        """Write or remove a task's queue journal row."""
+        if status not in JOURNAL_STATUSES:
+            cursor.execute("DELETE FROM download_queue WHERE download_id = ?", (task.history_id,))
+            return
+
+        details = json.dumps({
+            "task_id": task.task_id,
+            "priority": task.priority,
+            "rate_limit": task.rate_limit,
+            "connections": task.connections,
+            "max_retries": task.max_retries,
+            "video_key": task.video_key,
+            "retry_at": task.retry_at.isoformat() if task.retry_at else None,
+        })
+        # New rows join the back of the queue, as do retries once their
+        # backoff has passed; other changes keep the task's place
+        cursor.execute("""
+            INSERT INTO download_queue (download_id, seq, status, task, owner, lease_expires)
+            VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM download_queue), ?, ?, ?, ?)
+            ON CONFLICT(download_id) DO UPDATE SET
+                seq = CASE WHEN download_queue.status = 'retrying'
+                                AND excluded.status IN ('pending', 'queued')
+                           THEN excluded.seq ELSE download_queue.seq END,
+                status = excluded.status,
+                task = excluded.task,
+                owner = excluded.owner,
+                lease_expires = excluded.lease_expires
+        """, (task.history_id, status.value, details, self.queue_owner,
+              time.time() + self.lease_seconds if self.queue_owner else 0))
+
+    def renew_queue_leases(self, owner: str, expires: float) -> int:
+        """Extend the lease on every journal row an instance holds."""
+        with self._connection() as conn:
+            return conn.execute("""
+                UPDATE download_queue SET lease_expires = ? WHERE owner = ?
+            """, (expires, owner)).rowcount
+
+    def release_queue_leases(self, owner: str):
+        """Let the next instance to start claim an instance's journal rows at once."""
+        with self._connection() as conn:
+            conn.execute("""
+                UPDATE download_queue SET lease_expires = 0 WHERE owner = ?
+            """, (owner,))
+
+    def claim_queue_rows(self, owner: str, expires: float, limit: int) -> List[dict]:
+        """
+        Lease the first ``limit`` journal rows, in queue order, whose lease
+        has lapsed, and return them joined with their download rows.
+        """
+        with self._connection() as conn:
+            claimed = [row["download_id"] for row in conn.execute("""
+                UPDATE download_queue SET owner = ?, lease_expires = ?
+                WHERE download_id IN (
+                    SELECT download_id FROM download_queue
+                    WHERE lease_expires < ? AND (owner IS NULL OR owner != ?)
+                    ORDER BY seq
+                    LIMIT ?
+                )
+                RETURNING download_id
+            """, (owner, expires, time.time(), owner, limit)).fetchall()]
+            if not claimed:
+                return []
+            placeholders = ", ".join("?" for _ in claimed)
+            rows = conn.execute(f"""
+                SELECT d.*, q.status AS queue_status, q.task AS queue_task
+                FROM download_queue q JOIN downloads d ON d.id = q.download_id
+                WHERE q.download_id IN ({placeholders})
+                ORDER BY q.seq
+            """, claimed).fetchall()
+        return [dict(row) for row in rows]
+
+    def next_queue_lease_expiry(self, owner: str) -> Optional[float]:
+        """When the first journal row leased by another instance expires; None if none is."""
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT MIN(lease_expires) AS expires FROM download_queue
+                WHERE owner IS NULL OR owner != ?
+            """, (owner,)).fetchone()
+        return row["expires"]
 
     def get_recent_downloads(self, limit: int = 50) -> List[dict]:
         """Get recent downloads with their status."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
                 SELECT *
                 FROM downloads
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
                 LIMIT ?
             """, (limit,))
             
             return [dict(row) for row in cursor.fetchall()]
 
+    def query_downloads(
+        self,
+        status: Optional[Union[DownloadStatus, str]] = None,
+        platform: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        search: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Browse downloads newest first, one page at a time.
+
+        Pages are addressed by a keyset cursor over (created_at, id), so each
+        page is an index range scan no matter how deep the caller has paged.
+
+        Args:
+            status: Only downloads in this status
+            platform: Only downloads from this platform
+            since: Only downloads created at or after this time (UTC if naive)
+            until: Only downloads created before this time (UTC if naive)
+            search: Words to match against URL, title and error message
+            limit: Maximum rows per page
+            cursor: ``next_cursor`` returned with the previous page
+
+        Returns:
+            (rows, next_cursor): next_cursor is None on the last page
+        """
+        clauses = []
+        params: list = []
+        source = "downloads AS d"
+        order = "d.created_at DESC, d.id DESC"
+
+        if status is not None:
+            clauses.append("d.status = ?")
+            params.append(status.value if isinstance(status, DownloadStatus) else status)
+        if platform is not None:
+            clauses.append("d.platform = ?")
+            params.append(platform)
+        if since is not None:
+            clauses.append("d.created_at >= ?")
+            params.append(_utc_timestamp(since))
+        if until is not None:
+            clauses.append("d.created_at < ?")
+            params.append(_utc_timestamp(until))
+        if search and search.strip():
+            if self.fts_enabled:
+                # Walk the full-text index newest rowid first; rows are inserted
+                # with CURRENT_TIMESTAMP, so id order matches created_at order
+                source = "downloads_fts AS f JOIN downloads AS d ON d.id = f.rowid"
+                order = "f.rowid DESC"
+                clauses.append("downloads_fts MATCH ?")
+                params.append(_fts_query(search))
+            else:
+                clauses.append("(d.url LIKE ? OR d.title LIKE ? OR d.error_message LIKE ?)")
+                params.extend([f"%{search.strip()}%"] * 3)
+        if cursor:
+            created_at, _, row_id = cursor.rpartition("|")
+            if source.startswith("downloads_fts"):
+                clauses.append("f.rowid < ?")
+                params.append(int(row_id))
+            else:
+                clauses.append("(d.created_at, d.id) < (?, ?)")
+                params.extend([created_at, int(row_id)])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT d.*
+                FROM {source}
+                {where}
+                ORDER BY {order}
+                LIMIT ?
+            """, params + [limit + 1]).fetchall()
+
+        page = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = f"{last['created_at']}|{last['id']}"
+        return page, next_cursor
+
+    def iter_downloads_by_status(self, status: DownloadStatus,
+                                 page_size: int = 500) -> Iterator[dict]:
+        """Stream every download in a status, oldest first, a page at a time."""
+        last = ("", 0)
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute("""
+                    SELECT *
+                    FROM downloads
+                    WHERE status = ? AND (created_at, id) > (?, ?)
+                    ORDER BY created_at, id
+                    LIMIT ?
+                """, (status.value, last[0], last[1], page_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last = (rows[-1]["created_at"], rows[-1]["id"])
+
     def get_download_stats(self) -> dict:
-        """Get download statistics."""
-        with sqlite3.connect(self.db_path) as conn:
+        """
+        Get download statistics.
+
+        Reads the trigger-maintained rollups, so the cost does not grow with
+        the size of the downloads table.
+        """
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # Get counts by status
-            cursor.execute("""
-                SELECT status, COUNT(*) as count
-                FROM downloads
-                GROUP BY status
-            """)
-            status_counts = dict(cursor.fetchall())
-            
-            # Get total download count
-            cursor.execute("SELECT COUNT(*) FROM downloads")
-            total_downloads = cursor.fetchone()[0]
+            cursor.execute("SELECT status, count FROM stats_status WHERE count > 0")
+            status_counts = {row["status"]: row["count"] for row in cursor.fetchall()}
             
             # Get today's downloads
             cursor.execute("""
-                SELECT COUNT(*)
-                FROM downloads
-                WHERE DATE(created_at) = DATE('now')
+                SELECT COALESCE(SUM(count), 0)
+                FROM stats_daily
+                WHERE day = DATE('now')
             """)
             today_downloads = cursor.fetchone()[0]
+
+            # Get per-platform counts and bytes
+            cursor.execute("""
+                SELECT platform, SUM(count) AS count, SUM(bytes) AS bytes
+                FROM stats_platform
+                GROUP BY platform
+                HAVING SUM(count) > 0
+            """)
+            platforms = {
+                row["platform"]: {"count": row["count"], "bytes": row["bytes"]}
+                for row in cursor.fetchall()
+            }
+
+            # Get transfer totals
+            cursor.execute("SELECT bytes, seconds FROM stats_transfer WHERE id = 1")
+            transfer = cursor.fetchone()
             
             return {
-                "total_downloads": total_downloads,
+                "total_downloads": sum(status_counts.values()),
                 "today_downloads": today_downloads,
-                "status_counts": status_counts
+                "status_counts": status_counts,
+                "platforms": platforms,
+                "bytes_downloaded": transfer["bytes"],
+                "mean_throughput": (
+                    transfer["bytes"] / transfer["seconds"] if transfer["seconds"] else 0.0
+                )
             }
 
-    def clear_history(self, days_old: int = 30):
-        """Clear download history older than specified days."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                DELETE FROM downloads
-                WHERE created_at < datetime('now', ?)
-            """, (f'-{days_old} days',))
-            
-            conn.commit()
+    def get_daily_stats(self, days: int = 30) -> List[dict]:
+        """Get per-day download counts and bytes for the last ``days`` days."""
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT day, SUM(count) AS count, SUM(bytes) AS bytes
+                FROM stats_daily
+                WHERE day >= DATE('now', ?)
+                GROUP BY day
+                HAVING SUM(count) > 0
+                ORDER BY day DESC
+            """, (f'-{days} days',)).fetchall()
+            return [dict(row) for row in rows]
+
+    def clear_history(self, days_old: int = 30, batch_size: int = 500) -> int:
+        """
+        Clear download history older than specified days.
+
+        Rows are deleted in short batches, each its own transaction, so
+        active downloads can write between batches.
+        """
+        cutoff = _utc_timestamp(datetime.now(timezone.utc) - timedelta(days=days_old))
+        deleted = 0
+        while True:
+            batch = self.get_expired_downloads(cutoff, batch_size)
+            if not batch:
+                return deleted
+            deleted += self.delete_downloads([row["id"] for row in batch])
+
+    def get_expired_downloads(self, cutoff: str, limit: int) -> List[dict]:
+        """Get the oldest finished downloads created before a UTC timestamp."""
+        statuses = [status.value for status in FINISHED_STATUSES]
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT *
+                FROM downloads
+                WHERE created_at < ? AND status IN ({placeholders})
+                ORDER BY created_at, id
+                LIMIT ?
+            """, (cutoff, *statuses, limit)).fetchall()
+            return [dict(row) for row in rows]
+
+    def delete_downloads(self, ids: List[int]) -> int:
+        """Delete downloads by row id in one transaction."""
+        if not ids:
+            return 0
+        with self._connection() as conn:
+            placeholders = ", ".join("?" for _ in ids)
+            cursor = conn.execute(
+                f"DELETE FROM downloads WHERE id IN ({placeholders})", ids
+            )
+            return cursor.rowcount
 
     def get_task_history(self, task: DownloadTask) -> List[dict]:
         """Get history for a specific download task."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
                 SELECT *
                 FROM downloads
                 WHERE url = ?
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
             """, (task.url,))
             
             return [dict(row) for row in cursor.fetchall()]
+
+    def save_checkpoint(self, part_path: str, url: str, size: int,
+                        etag: Optional[str], last_modified: Optional[str],
+                        ranges: List[Tuple[int, int]]):
+        """Record the byte ranges of a partial file that are already on disk."""
+        with self._connection() as conn:
+            conn.execute("""
+                INSERT INTO transfer_checkpoints (
+                    part_path, url, size, etag, last_modified, ranges, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(part_path) DO UPDATE SET
+                    url = excluded.url,
+                    size = excluded.size,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    ranges = excluded.ranges,
+                    updated_at = excluded.updated_at
+            """, (part_path, url, size, etag, last_modified, json.dumps(ranges)))
+
+    def load_checkpoint(self, part_path: str) -> Optional[dict]:
+        """Get the resume checkpoint for a partial file, if any."""
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT *
+                FROM transfer_checkpoints
+                WHERE part_path = ?
+            """, (part_path,)).fetchone()
+
+        if row is None:
+            return None
+        checkpoint = dict(row)
+        checkpoint["ranges"] = json.loads(checkpoint["ranges"])
+        return checkpoint
+
+    def clear_checkpoint(self, part_path: str):
+        """Forget the resume checkpoint for a partial file."""
+        with self._connection() as conn:
+            conn.execute("""
+                DELETE FROM transfer_checkpoints
+                WHERE part_path = ?
+            """, (part_path,))
+
+    def record_content(self, digest: str, size: int, store_path: str):
+        """Register an object in the content-addressed store."""
+        with self._connection() as conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO content_objects (digest, size, store_path)
+                VALUES (?, ?, ?)
+            """, (digest, size, store_path))
+
+    def get_content(self, digest: str) -> Optional[dict]:
+        """Get a stored object by digest, if any."""
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT *
+                FROM content_objects
+                WHERE digest = ?
+            """, (digest,)).fetchone()
+        return dict(row) if row else None
+
+    def delete_content(self, digest: str):
+        """Forget a stored object together with its sources and links."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM content_objects WHERE digest = ?", (digest,))
+
+    def record_content_source(self, video_key: str, video_format: str, resolution: str,
+                              digest: str, filename: str):
+        """Remember which object a (video, format, resolution) request produced."""
+        with self._connection() as conn:
+            conn.execute("""
+                INSERT INTO content_sources (video_key, video_format, resolution, digest, filename)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(video_key, video_format, resolution) DO UPDATE SET
+                    digest = excluded.digest,
+                    filename = excluded.filename
+            """, (video_key, video_format, resolution, digest, filename))
+
+    def find_content_source(self, video_key: str, video_format: str,
+                            resolution: str) -> Optional[dict]:
+        """Get the stored object and file name for a request, if known."""
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT o.digest, o.size, o.store_path, s.filename
+                FROM content_sources s
+                JOIN content_objects o ON o.digest = s.digest
+                WHERE s.video_key = ? AND s.video_format = ? AND s.resolution = ?
+            """, (video_key, video_format, resolution)).fetchone()
+        return dict(row) if row else None
+
+    def record_content_link(self, path: str, digest: str):
+        """Remember that a path on disk is a link to a stored object."""
+        with self._connection() as conn:
+            conn.execute("""
+                INSERT INTO content_links (path, digest) VALUES (?, ?)
+                ON CONFLICT(path) DO UPDATE SET digest = excluded.digest
+            """, (path, digest))
+
+    def get_content_links(self, digest: str) -> List[str]:
+        """Get every path recorded as a link to an object."""
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT path FROM content_links WHERE digest = ?
+            """, (digest,)).fetchall()
+        return [row["path"] for row in rows]
+
+    def get_link_digest(self, path: str) -> Optional[str]:
+        """Get the digest of the object a path is linked to, if recorded."""
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT digest FROM content_links WHERE path = ?
+            """, (path,)).fetchone()
+        return row["digest"] if row else None
+
+    def save_backend_stats(self, platform: str, video_format: str, backend: str, stats: dict):
+        """Store a backend's statistics for a platform and format."""
+        with self._connection() as conn:
+            conn.execute("""
+                INSERT INTO backend_stats (
+                    platform, video_format, backend, successes, failures, mean_seconds,
+                    consecutive_failures, last_failure, last_error, last_attempt
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(platform, video_format, backend) DO UPDATE SET
+                    successes = excluded.successes,
+                    failures = excluded.failures,
+                    mean_seconds = excluded.mean_seconds,
+                    consecutive_failures = excluded.consecutive_failures,
+                    last_failure = excluded.last_failure,
+                    last_error = excluded.last_error,
+                    last_attempt = excluded.last_attempt
+            """, (platform, video_format, backend, stats["successes"], stats["failures"],
+                  stats["mean_seconds"], stats["consecutive_failures"],
+                  stats["last_failure"], stats["last_error"], stats["last_attempt"]))
+
+    def get_backend_stats(self, platform: str, video_format: str) -> List[dict]:
+        """Get every backend's statistics for a platform and format."""
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT backend, successes, failures, mean_seconds,
+                       consecutive_failures, last_failure, last_error, last_attempt
+                FROM backend_stats
+                WHERE platform = ? AND video_format = ?
+            """, (platform, video_format)).fetchall()
+        return [dict(row) for row in rows]
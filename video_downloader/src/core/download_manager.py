@@ -1,85 +1,975 @@
 """
 Download Manager module for handling concurrent downloads and queuing.
 """
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 import json
+import logging
 import os
 import threading
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import queue
 
-from .download_types import DownloadStatus, DownloadTask
-from .download_history import DownloadHistory
+from .backend_selector import BackendSelector
+from .bandwidth import BandwidthLimiter
+from .concurrency import AdaptiveConcurrencyController
+from .content_store import ContentStore, place_file
+from .download_types import CancellationToken, DownloadStatus, DownloadTask, FINISHED_STATUSES
+from .download_history import DownloadHistory, parse_timestamp
+from .downloader import SeparateStreams
+from .history_retention import HistoryRetention
+from .metadata_cache import MetadataCache
+from .platforms.registry import GENERIC_ADAPTER
+from .platforms.supported_sites import REGISTRY, canonical_key, get_site_by_url
+from .playlist import (
+    DEFAULT_MAX_PENDING, CollectionEntry, CollectionExpander, DownloadFeed, collection_tasks
+)
+from .postprocess import PostProcessor
+from .progress import ProgressBus
+from .queue_journal import QueueJournal
+from .retry import ErrorKind, RetryPolicy, classify
+from .scheduler import CatchUpPolicy, DownloadScheduler
+from .transfer import DEFAULT_CONNECTIONS, SegmentedTransfer
+from .worker_pool import ResizableWorkerPool
+
+THREAD_ENGINE = "threads"
+ASYNC_ENGINE = "asyncio"
+# Upper bound on max_concurrent offered for each engine
+CONCURRENCY_LIMITS = {THREAD_ENGINE: 10, ASYNC_ENGINE: 1000}
+
+# Statuses pause_download accepts; tasks wait in the queue as PENDING or QUEUED
+PAUSABLE_STATUSES = (
+    DownloadStatus.PENDING, DownloadStatus.QUEUED, DownloadStatus.IN_PROGRESS,
+    DownloadStatus.RETRYING
+)
+# Finished downloads of each status shown again after a restart
+RECENT_FINISHED = 50
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ManagerSnapshot:
+    """Consistent, versioned copy of the manager's task lists."""
+    version: int
+    active: Tuple[DownloadTask, ...]
+    queued: Tuple[DownloadTask, ...]
+    scheduled: Tuple[DownloadTask, ...]
+    paused: Tuple[DownloadTask, ...]
+    completed: Tuple[DownloadTask, ...]
+    failed: Tuple[DownloadTask, ...]
 
 class DownloadManager:
-    def __init__(self, max_concurrent: int = 3):
+    def __init__(self, max_concurrent: int = 3,
+                 connections_per_download: int = DEFAULT_CONNECTIONS,
+                 downloader=None,
+                 retention_days: Optional[int] = None,
+                 catch_up: CatchUpPolicy = CatchUpPolicy.FIRE,
+                 engine: str = THREAD_ENGINE,
+                 history: Optional[DownloadHistory] = None,
+                 auto_concurrency: bool = False,
+                 bandwidth: Optional[BandwidthLimiter] = None,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 content_store: bool = False,
+                 postprocessor: Optional[PostProcessor] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
+        if engine not in CONCURRENCY_LIMITS:
+            raise ValueError(f"Unknown download engine: {engine!r}")
         self.max_concurrent = max_concurrent
-        self.executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        self.connections_per_download = connections_per_download
+        self.downloader = downloader
+        # Platform downloaders by adapter name, created on first use
+        self._downloaders: Dict[str, object] = {}
+        self.engine = engine
+        self.executor = ResizableWorkerPool(max_concurrent)
+        # Transfers run as coroutines on one loop thread in asyncio mode
+        self.async_engine = None
+        if engine == ASYNC_ENGINE:
+            # asyncio is only imported when the engine is used
+            from .async_engine import AsyncDownloadEngine
+            self.async_engine = AsyncDownloadEngine()
         self.download_queue = queue.Queue()
+        # Running tasks by task_id
         self.active_downloads: Dict[str, DownloadTask] = {}
+        # Downloaded tasks waiting on post-processing; they hold no download slot
+        self.processing_downloads: Dict[str, DownloadTask] = {}
+        # One leader task per (video_key, format, resolution) queued or running,
+        # and the duplicate requests riding on each leader's transfer
+        self._leaders: Dict[Tuple[str, str, str], DownloadTask] = {}
+        self._followers: Dict[str, List[DownloadTask]] = {}
         self.completed_downloads: List[DownloadTask] = []
         self.failed_downloads: List[DownloadTask] = []
         self.scheduled_downloads: List[DownloadTask] = []
-        self._lock = threading.Lock()
-        self.history = DownloadHistory()
+        # Failed tasks waiting out their backoff by task_id; not persisted
+        self.retrying_downloads: Dict[str, DownloadTask] = {}
+        # Attempts that ended in a real failure (failed or retrying); only
+        # ever grows, unlike failed_downloads which also holds cancellations
+        # and is trimmed
+        self.failure_count = 0
+        # Tasks the user paused by task_id; they hold no slot and keep their
+        # partial files until resumed
+        self.paused_downloads: Dict[str, DownloadTask] = {}
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        # Background feeds adding tasks from playlists and channels
+        self._feeds: List[DownloadFeed] = []
+        self._version = 0
+        # Outcomes being recorded whose duplicates are not settled yet; the
+        # manager is not idle until they are
+        self._finishing = 0
+        self.history = history or DownloadHistory()
+        if self.async_engine is not None:
+            # Resume part files from the same checkpoints as the thread engine
+            self.async_engine.checkpoint_store = self.history
+        # Write-ahead record of the queue, leased to this instance
+        self.journal = QueueJournal(self.history)
+        # Resolved video metadata, kept next to the history database
+        self.metadata_cache = metadata_cache or MetadataCache(
+            Path(self.history.db_path).parent / "metadata_cache.db"
+        )
+        # Optional deduplicating store; finished files become links into it
+        self.content_store = ContentStore(self.history) if content_store else None
+        # Success rates and circuit breakers of each downloader's backends
+        self.backend_selector = BackendSelector(self.history)
+        # Merging, conversion and hashing run in their own process pool
+        self.postprocessor = postprocessor or PostProcessor()
+        self.progress_bus = ProgressBus()
+        # Global, per-host and per-task caps shared by every transfer
+        self.bandwidth = bandwidth or BandwidthLimiter()
+        self.scheduler = DownloadScheduler(self._on_schedule_due, catch_up=catch_up)
+        # Retries wait on a scheduler of their own, so a backoff neither
+        # holds a download slot nor is persisted as a scheduled download
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_scheduler = DownloadScheduler(self._on_retry_due)
         self._load_history()
+        self._rehydrate_schedule()
+
+        # Archive rows past retention_days and reclaim free pages in the background
+        self.retention = HistoryRetention(self.history)
+        # Databases from before incremental auto-vacuum are rewritten once,
+        # while nothing is downloading yet
+        self.retention.convert_to_incremental()
+        self.retention.start_background(days_old=retention_days)
+
+        self.concurrency = AdaptiveConcurrencyController(self)
+        self.set_auto_concurrency(auto_concurrency)
+        self._recover_queue()
 
     def schedule_download(self, task: DownloadTask, scheduled_time: datetime) -> None:
         """Schedule a download for a future time."""
-        task.scheduled_time = scheduled_time
-        task.status = DownloadStatus.SCHEDULED
-        self.scheduled_downloads.append(task)
-        self.history.add_download(task)
-        self.history.update_status(task, DownloadStatus.SCHEDULED)
-
-        # Calculate delay in seconds
-        delay = (scheduled_time - datetime.now()).total_seconds()
-        if delay > 0:
-            timer = threading.Timer(delay, self.add_download, args=[task])
-            timer.start()
+        with self._lock:
+            task.scheduled_time = scheduled_time
+            task.status = DownloadStatus.SCHEDULED
+            self.scheduled_downloads.append(task)
+            # The history row's scheduled_time is the persisted due time
+            self.history.add_download(task)
+            self._bump_version()
+        self.progress_bus.publish_status(task)
+        self.scheduler.schedule(task, scheduled_time)
 
     def add_download(self, task: DownloadTask) -> None:
         """Add a new download task to the queue."""
+        if task.scheduled_time and task.scheduled_time > datetime.now():
+            self.schedule_download(task, task.scheduled_time)
+            return
+
+        stored_file = self._place_from_store(task)
         with self._lock:
-            self.history.add_download(task)
-            if task.scheduled_time:
-                self.scheduled_downloads.append(task)
+            if task.history_id is None:
+                self.history.add_download(task)
             else:
+                # Retried tasks keep their original history row
+                self.history.update_status(task, task.status)
+            if stored_file is not None:
+                # Known content completes without a transfer
+                self._handle_success(task, stored_file)
+                return
+            if not self._coalesce(task):
+                self.download_queue.put(task)
+                self._process_queue()
+            self._bump_version()
+        self.progress_bus.publish_status(task)
+
+    def add_downloads_from(self, tasks: Iterable[DownloadTask],
+                           max_pending: int = DEFAULT_MAX_PENDING) -> DownloadFeed:
+        """
+        Add tasks from a possibly huge or slow iterable without blocking.
+
+        The iterable is consumed on a background thread, pausing while
+        ``max_pending`` or more tasks are queued.
+        """
+        feed = DownloadFeed(self, tasks, max_pending)
+        with self._lock:
+            self._feeds = [f for f in self._feeds if not f.done.is_set()]
+            self._feeds.append(feed)
+        return feed.start()
+
+    def add_collection(self, template: DownloadTask,
+                       max_pending: int = DEFAULT_MAX_PENDING) -> DownloadFeed:
+        """
+        Expand a playlist or channel into one download per video.
+
+        ``template`` carries the collection URL and the settings every video
+        inherits. Pages of entries are fetched only as the queue drains.
+        """
+        return self.add_downloads_from(self.expand_collection(template), max_pending)
+
+    def expand_collection(self, template: DownloadTask) -> Iterator[DownloadTask]:
+        """
+        Lazily yield one task per video of a playlist or channel.
+
+        Entries about to be yielded are resolved ahead on a small pool.
+        """
+        def prefetch(entry: CollectionEntry) -> None:
+            self._get_downloader(entry.url).resolve_media(
+                entry.url, template.download_path, template.video_format, template.resolution
+            )
+
+        entries = CollectionExpander(resolver=prefetch).resolved(template.url)
+        return collection_tasks(template, entries)
+
+    def wait_for_queue_below(self, limit: int, timeout: Optional[float] = None) -> bool:
+        """Block until fewer than ``limit`` tasks are queued; False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self.download_queue.qsize() < limit, timeout)
+
+    def _coalesce(self, task: DownloadTask) -> bool:
+        """
+        Attach a task to an identical queued or running download.
+
+        Returns True if the task now follows another task's transfer and
+        must not be queued itself. Callers must hold the lock.
+        """
+        key = (self._video_key(task), task.video_format, task.resolution)
+        leader = self._leaders.get(key)
+        if leader is None or leader is task:
+            self._leaders[key] = task
+            return False
+
+        self._followers.setdefault(leader.task_id, []).append(task)
+        task.status = (
+            DownloadStatus.IN_PROGRESS if leader.status == DownloadStatus.IN_PROGRESS
+            else DownloadStatus.QUEUED
+        )
+        self.history.update_status(task, task.status)
+        return True
+
+    def _video_key(self, task: DownloadTask) -> str:
+        """Canonical identity of a task's video, computed once."""
+        if task.video_key is None:
+            task.video_key = ":".join(canonical_key(task.url))
+        return task.video_key
+
+    def _place_from_store(self, task: DownloadTask) -> Optional[str]:
+        """Link already stored content into the task's folder, if the store has it."""
+        if self.content_store is None:
+            return None
+        self._video_key(task)
+        try:
+            return self.content_store.materialize(task)
+        except OSError as e:
+            logger.warning(f"Could not place stored content for {task.url}: {e}")
+            return None
+
+    def _on_schedule_due(self, task: DownloadTask) -> None:
+        """Move a scheduled task whose time has come onto the queue."""
+        stored_file = self._place_from_store(task)
+        with self._lock:
+            if task in self.scheduled_downloads:
+                self.scheduled_downloads.remove(task)
+            if stored_file is not None:
+                self._handle_success(task, stored_file)
+                return
+            task.status = DownloadStatus.QUEUED
+            self.history.update_status(task, DownloadStatus.QUEUED)
+            if not self._coalesce(task):
                 self.download_queue.put(task)
                 self._process_queue()
+            self._bump_version()
+        self.progress_bus.publish_status(task)
+
+    def _rehydrate_schedule(self) -> None:
+        """Re-arm every persisted scheduled download after a restart."""
+        tasks = [
+            self._task_from_row(row)
+            for row in self.history.iter_downloads_by_status(DownloadStatus.SCHEDULED)
+        ]
+        with self._lock:
+            self.scheduled_downloads.extend(tasks)
+            self._bump_version()
+
+        for task in self.scheduler.rehydrate(tasks):
+            with self._lock:
+                self.scheduled_downloads.remove(task)
+            self._update_task_status(
+                task, DownloadStatus.FAILED, error_message="Missed scheduled time"
+            )
+
+    def _recover_queue(self) -> None:
+        """
+        Queue again the tasks a previous run left unfinished.
+
+        The backlog is streamed from the journal in queue order by a
+        background feed, so a large one is never loaded into memory at once.
+        """
+        self.journal.start()
+        self.add_downloads_from(self._recovered_tasks())
+
+    def _recovered_tasks(self) -> Iterator[DownloadTask]:
+        """Rebuild tasks from orphaned journal rows, re-arming pending retries."""
+        for row in self.journal.recover():
+            task = self._task_from_row(row)
+            details = json.loads(row["queue_task"] or "{}")
+            for name in ("task_id", "priority", "rate_limit", "connections",
+                         "max_retries", "video_key"):
+                if details.get(name) is not None:
+                    setattr(task, name, details[name])
+            retry_at = parse_timestamp(details.get("retry_at"))
+            status = DownloadStatus(row["queue_status"])
+
+            if status == DownloadStatus.RETRYING and retry_at is not None:
+                task.retry_at = retry_at
+                with self._lock:
+                    task.status = DownloadStatus.RETRYING
+                    self.retrying_downloads[task.task_id] = task
+                    self._bump_version()
+                self.progress_bus.publish_status(task)
+                self.retry_scheduler.schedule(task, retry_at)
+                continue
+            if status in (DownloadStatus.IN_PROGRESS, DownloadStatus.PROCESSING):
+                # Partial files and checkpoints are kept, so this resumes
+                logger.info(f"Requeuing {task.url}, interrupted while {status.value}")
+            task.status = DownloadStatus.PENDING
+            yield task
+
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever a task moves between lists."""
+        return self._version
+
+    def snapshot(self) -> ManagerSnapshot:
+        """Take a consistent copy of all task lists under the lock."""
+        with self._lock:
+            active = list(self.active_downloads.values())
+            active.extend(self.processing_downloads.values())
+            queued = list(self.download_queue.queue)
+            paused = list(self.paused_downloads.values())
+            # Coalesced duplicates are listed right after their leader
+            return ManagerSnapshot(
+                version=self._version,
+                active=tuple(self._with_followers(active)),
+                queued=tuple(self._with_followers(queued)),
+                scheduled=tuple(self.scheduled_downloads) + tuple(self.retrying_downloads.values()),
+                paused=tuple(self._with_followers(paused)),
+                completed=tuple(self.completed_downloads),
+                failed=tuple(self.failed_downloads)
+            )
+
+    def _with_followers(self, tasks: List[DownloadTask]) -> List[DownloadTask]:
+        """Interleave each task with the duplicates following it."""
+        result = []
+        for task in tasks:
+            result.append(task)
+            result.extend(self._followers.get(task.task_id, ()))
+        return result
+
+    @property
+    def max_concurrent_limit(self) -> int:
+        """Largest max_concurrent the current engine is meant to run."""
+        return CONCURRENCY_LIMITS[self.engine]
+
+    @property
+    def auto_concurrency(self) -> bool:
+        """Whether max_concurrent is being tuned from measured throughput."""
+        return self.concurrency.running
+
+    @property
+    def saturated(self) -> bool:
+        """Whether every download slot is busy and more tasks are waiting."""
+        with self._lock:
+            return (len(self.active_downloads) >= self.max_concurrent
+                    and not self.download_queue.empty())
+
+    def set_max_concurrent(self, limit: int) -> None:
+        """Change the concurrent download limit, resizing the worker pool live."""
+        limit = max(1, min(self.max_concurrent_limit, limit))
+        with self._lock:
+            self.max_concurrent = limit
+            self.executor.resize(limit)
+            self._bump_version()
+            # Start queued tasks that fit under a raised limit; a lowered
+            # limit takes effect as running downloads finish
+            self._process_queue()
+
+    def set_auto_concurrency(self, enabled: bool) -> None:
+        """Turn throughput-driven tuning of max_concurrent on or off."""
+        if enabled:
+            self.concurrency.start()
+        else:
+            self.concurrency.stop()
+
+    def find_task(self, task_id: str) -> Optional[DownloadTask]:
+        """Look up a task held in memory by its task_id."""
+        snapshot = self.snapshot()
+        for tasks in (snapshot.active, snapshot.queued, snapshot.scheduled,
+                      snapshot.paused, snapshot.failed, snapshot.completed):
+            for task in tasks:
+                if task.task_id == task_id:
+                    return task
+        return None
+
+    def cancel_download(self, task_id: str) -> Optional[DownloadTask]:
+        """
+        Cancel a scheduled, queued, paused or running task.
+
+        A running transfer stops at its next chunk and keeps its partial
+        file, so a later retry resumes it. Returns the task, or None if no
+        unfinished task has this ID.
+        """
+        with self._lock:
+            task = self.find_task(task_id)
+            if task is None or not self._cancel(task):
+                return None
+        return task
+
+    def _cancel(self, task: DownloadTask, detached: bool = False) -> bool:
+        """
+        Cancel a task unless it has finished; returns whether it was cancelled.
+
+        ``detached`` tasks were already taken out of the queue, schedule and
+        retry backoff by ``_detach``. Callers must hold the lock.
+        """
+        if task.status in FINISHED_STATUSES:
+            return False
+        if task.task_id in self.active_downloads or task.task_id in self.processing_downloads:
+            # _finish_download or _finish_postprocess records the
+            # cancellation once the transfer or post-processing stops
+            task.status = DownloadStatus.CANCELLED
+            if task.task_id in self.active_downloads:
+                task.cancel_token.cancel()
+            self._bump_version()
+            self.progress_bus.publish_status(task)
+            return True
+
+        if not detached and task in self.scheduled_downloads:
+            self.scheduled_downloads.remove(task)
+            self.scheduler.cancel(task)
+        self._withdraw(task, detached)
+        self._update_task_status(task, DownloadStatus.CANCELLED, "Cancelled")
+        self._settle_followers(task)
+        return True
+
+    def pause_download(self, task_id: str) -> Optional[DownloadTask]:
+        """
+        Pause a queued, running or retrying task, freeing its download slot.
+
+        A running transfer stops at its next chunk; its part file and
+        checkpoint are kept, so ``resume_download`` fetches only what is
+        missing. Duplicates following a paused task stay attached to it.
+        Returns the task, or None if no pausable task has this ID.
+        """
+        with self._lock:
+            task = self.find_task(task_id)
+            if task is None or not self._pause(task):
+                return None
+        return task
+
+    def _pause(self, task: DownloadTask, detached: bool = False) -> bool:
+        """
+        Pause a task if its status allows; returns whether it was paused.
+
+        ``detached`` is as for ``_cancel``. Callers must hold the lock.
+        """
+        if task.status not in PAUSABLE_STATUSES:
+            return False
+        if task.task_id in self.active_downloads:
+            # _finish_download parks the task once the transfer stops
+            task.status = DownloadStatus.PAUSED
+            task.cancel_token.cancel(pause=True)
+            self._bump_version()
+            self.progress_bus.publish_status(task)
+            return True
+
+        self._withdraw(task, detached)
+        self._park(task)
+        return True
+
+    def resume_download(self, task_id: str) -> Optional[DownloadTask]:
+        """Queue a paused task again; None if no stopped, paused task has this ID."""
+        with self._lock:
+            task = self.paused_downloads.pop(task_id, None)
+            if task is None:
+                return None
+            task.status = DownloadStatus.PENDING
+            self.history.update_status(task, DownloadStatus.PENDING)
+            for follower in self._followers.get(task.task_id, ()):
+                self._set_status(follower, DownloadStatus.QUEUED)
+        self._requeue(task)
+        return task
+
+    def cancel_all(self) -> List[DownloadTask]:
+        """
+        Cancel every unfinished task and stop feeds from adding more.
+
+        Returns the tasks that were cancelled.
+        """
+        with self._lock:
+            for feed in self._feeds:
+                feed.cancel()
+            snapshot = self.snapshot()
+            tasks = snapshot.active + snapshot.queued + snapshot.scheduled + snapshot.paused
+            self._detach(tasks, unschedule=True)
+            # Duplicates go before their leader, so none is promoted to
+            # lead a new transfer while the batch is being cancelled
+            return [task for task in reversed(tasks) if self._cancel(task, detached=True)]
+
+    def pause_all(self) -> List[DownloadTask]:
+        """
+        Pause every queued, running and retrying task, and pause feeds.
+
+        Returns the tasks that were paused.
+        """
+        with self._lock:
+            for feed in self._feeds:
+                feed.pause()
+            snapshot = self.snapshot()
+            tasks = snapshot.active + snapshot.queued + snapshot.scheduled
+            # Scheduled downloads are not pausable and stay armed
+            self._detach(tasks)
+            # Leaders go first and keep their duplicates attached
+            return [task for task in tasks if self._pause(task, detached=True)]
+
+    def resume_all(self) -> List[DownloadTask]:
+        """
+        Resume every paused task in the order it was added, and resume feeds.
+
+        Returns the tasks that were queued again.
+        """
+        with self._lock:
+            for feed in self._feeds:
+                feed.resume()
+            paused = sorted(self.paused_downloads.values(), key=lambda task: task.history_id or 0)
+            return [task for task in paused if self.resume_download(task.task_id) is not None]
+
+    def _detach(self, tasks: Iterable[DownloadTask], unschedule: bool = False) -> None:
+        """
+        Take a batch of tasks out of the queue and the retry backoff, and
+        with ``unschedule`` out of the schedule, in one pass over each, so
+        batch actions do not rescan them per task. Callers must hold the lock.
+        """
+        task_ids = {task.task_id for task in tasks}
+        with self.download_queue.mutex:
+            queued = self.download_queue.queue
+            kept = [task for task in queued if task.task_id not in task_ids]
+            if len(kept) != len(queued):
+                queued.clear()
+                queued.extend(kept)
+        retrying = [self.retrying_downloads.pop(task_id) for task_id in task_ids
+                    if task_id in self.retrying_downloads]
+        self.retry_scheduler.cancel_many(retrying)
+        for task in retrying:
+            task.retry_at = None
+        if unschedule:
+            self.scheduler.cancel_many(
+                task for task in self.scheduled_downloads if task.task_id in task_ids
+            )
+            self.scheduled_downloads[:] = [
+                task for task in self.scheduled_downloads if task.task_id not in task_ids
+            ]
+
+    def retry_download(self, task_id: str) -> Optional[DownloadTask]:
+        """Queue a failed or cancelled task again; None if there is no such task."""
+        with self._lock:
+            task = next((t for t in self.failed_downloads if t.task_id == task_id), None)
+            if task is None:
+                return None
+            self.failed_downloads.remove(task)
+            task.retries = 0
+            task.status = DownloadStatus.PENDING
+            self.add_download(task)
+        return task
+
+    def trim_finished(self, keep: int) -> None:
+        """Keep only the newest ``keep`` finished tasks in memory; history is unaffected."""
+        with self._lock:
+            for finished in (self.completed_downloads, self.failed_downloads):
+                del finished[:max(0, len(finished) - keep)]
+            self._bump_version()
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is queued or running; paused tasks do not count."""
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: (not self.active_downloads and not self.processing_downloads
+                         and not self.retrying_downloads and not self._finishing
+                         and self.download_queue.empty()),
+                timeout
+            )
+
+    def shutdown(self) -> None:
+        """Stop background threads and close the history database."""
+        with self._lock:
+            feeds, self._feeds = self._feeds, []
+        for feed in feeds:
+            feed.cancel()
+        self.concurrency.stop()
+        self.scheduler.stop()
+        self.retry_scheduler.stop()
+        self.retention.stop()
+        if self.async_engine is not None:
+            self.async_engine.close()
+        self.executor.shutdown(wait=False)
+        self.postprocessor.shutdown()
+        # Unfinished tasks stay journaled and are recovered by the next start
+        self.journal.stop()
+        self.metadata_cache.close()
+        self.history.close()
+
+    def _bump_version(self) -> None:
+        """Mark the task lists as changed. Callers must hold the lock."""
+        self._version += 1
+        self._idle.notify_all()
+
+    def _withdraw(self, task: DownloadTask, detached: bool = False) -> None:
+        """
+        Take a task that is not running out of its leader's followers and,
+        unless ``_detach`` already did, the queue and the retry backoff.
+        Callers must hold the lock.
+        """
+        if not detached and self.retrying_downloads.pop(task.task_id, None) is not None:
+            self.retry_scheduler.cancel(task)
+            task.retry_at = None
+        # A duplicate follows whichever task leads its video until that
+        # leader finishes, so only the leader's list can hold it
+        leader = self._leaders.get((self._video_key(task), task.video_format, task.resolution))
+        followers = self._followers.get(leader.task_id, ()) if leader is not None else ()
+        if any(follower is task for follower in followers):
+            followers.remove(task)
+            if not followers:
+                del self._followers[leader.task_id]
+        if not detached:
+            with self.download_queue.mutex:
+                if task in self.download_queue.queue:
+                    self.download_queue.queue.remove(task)
+
+    def _park(self, task: DownloadTask) -> None:
+        """Hold a paused task, with its duplicates, until it is resumed."""
+        with self._lock:
+            self.active_downloads.pop(task.task_id, None)
+            self.paused_downloads[task.task_id] = task
+            for follower in self._followers.get(task.task_id, ()):
+                self._set_status(follower, DownloadStatus.PAUSED)
+            self._update_task_status(task, DownloadStatus.PAUSED)
+
+    def _set_status(self, task: DownloadTask, status: DownloadStatus) -> None:
+        """Record a status that moves the task between no lists."""
+        task.status = status
+        self.history.update_status(task, status)
+        self.progress_bus.publish_status(task)
 
     def _start_download(self, task: DownloadTask) -> None:
         """Start a download task."""
         with self._lock:
             task.status = DownloadStatus.IN_PROGRESS
-            self.active_downloads[task.url] = task
+            # A fresh token per attempt; a stale cancel must not stop a resume
+            task.cancel_token = CancellationToken()
+            self.active_downloads[task.task_id] = task
             self.history.update_status(task, DownloadStatus.IN_PROGRESS)
-            self.executor.submit(self._download_worker, task)
+            self.progress_bus.publish_status(task)
+            for follower in self._followers.get(task.task_id, ()):
+                self._set_status(follower, DownloadStatus.IN_PROGRESS)
+            self._bump_version()
+            if self.async_engine is not None:
+                self.async_engine.submit(
+                    task,
+                    self._get_downloader(task.url),
+                    task.connections or self.connections_per_download,
+                    self._progress_callback(task),
+                    self._finish_download,
+                    throttle=self.bandwidth.throttle_for(task),
+                    cancel=task.cancel_token
+                )
+            else:
+                self.executor.submit(self._download_worker, task)
+
+    def _progress_callback(self, task: DownloadTask):
+        """Progress receiver publishing a task's byte counts to the bus."""
+        def publish(done, total):
+            self.progress_bus.publish(task, done, total)
+            # Duplicates show the shared transfer's progress without counting
+            # its bytes twice
+            for follower in tuple(self._followers.get(task.task_id, ())):
+                self.progress_bus.publish(follower, done, total, counted=False)
+        return publish
 
     def _download_worker(self, task: DownloadTask) -> None:
         """Worker function for handling downloads."""
         try:
-            # TODO: Implement actual download logic using yt-dlp or pytube
-            # For now, this is a placeholder
-            pass
-
+            downloaded_file = self._get_downloader(task.url).download(
+                task.url,
+                task.download_path,
+                task.video_format,
+                task.resolution,
+                connections=task.connections or self.connections_per_download,
+                progress_callback=self._progress_callback(task),
+                throttle=self.bandwidth.throttle_for(task),
+                cancel_token=task.cancel_token
+            )
         except Exception as e:
-            task.error_message = str(e)
-            if task.retries < task.max_retries:
-                task.retries += 1
-                task.status = DownloadStatus.PENDING
-                self.add_download(task)
-            else:
-                self._update_task_status(task, DownloadStatus.FAILED, error_message=str(e))
+            self._finish_download(task, None, e)
         else:
-            self._update_task_status(task, DownloadStatus.COMPLETED)
+            self._finish_download(task, downloaded_file, None)
 
+    def _finish_download(self, task: DownloadTask, downloaded_file: Optional[str],
+                         error: Optional[BaseException]) -> None:
+        """Record the outcome of a download from either engine."""
+        self._begin_finish()
+        try:
+            if task.status == DownloadStatus.CANCELLED:
+                self._update_task_status(task, DownloadStatus.CANCELLED, "Cancelled")
+            elif task.status == DownloadStatus.PAUSED and error is not None:
+                # Stopped by a pause; a transfer that finished before
+                # noticing it completes as usual below
+                self._park(task)
+            elif error is not None:
+                self._handle_failure(task, error)
+            elif self._start_postprocess(task, downloaded_file):
+                # _finish_postprocess settles the task and its followers
+                return
+            else:
+                if isinstance(downloaded_file, SeparateStreams):
+                    downloaded_file = downloaded_file.paths[0]
+                self._handle_success(task, self._store(task, downloaded_file))
+            self._settle_followers(task)
         finally:
+            self.progress_bus.forget(task)
+            self.bandwidth.forget(task)
             self._process_queue()
+            self._end_finish()
+
+    def _begin_finish(self) -> None:
+        """Hold off idle waiters while a task's outcome and its followers are recorded."""
+        with self._lock:
+            self._finishing += 1
+
+    def _end_finish(self) -> None:
+        with self._lock:
+            self._finishing -= 1
+            self._bump_version()
+
+    def _start_postprocess(self, task: DownloadTask, downloaded) -> bool:
+        """
+        Hand a downloaded task to the post-processing pool, freeing its
+        download slot. False if there is nothing to post-process.
+        """
+        if isinstance(downloaded, SeparateStreams):
+            inputs = downloaded.paths
+        else:
+            inputs = [downloaded] if downloaded else []
+        job = self.postprocessor.job_for(inputs, task.video_format)
+        if job is None:
+            return False
+
+        with self._lock:
+            self.active_downloads.pop(task.task_id, None)
+            self.processing_downloads[task.task_id] = task
+            task.status = DownloadStatus.PROCESSING
+            self.history.update_status(task, DownloadStatus.PROCESSING)
+            self._bump_version()
+        self.progress_bus.publish_status(task)
+        try:
+            future = self.postprocessor.submit(job)
+        except RuntimeError as e:
+            # The pool is shut down or a worker process died
+            self._finish_postprocess(task, None, e)
+        else:
+            def deliver(done: Future) -> None:
+                if done.cancelled():
+                    # Dropped by shutdown; the task is left PROCESSING in history
+                    return
+                error = done.exception()
+                self._finish_postprocess(task, None if error else done.result(), error)
+            future.add_done_callback(deliver)
+        return True
+
+    def _finish_postprocess(self, task: DownloadTask, result,
+                            error: Optional[BaseException]) -> None:
+        """Record the outcome of a task's post-processing."""
+        self._begin_finish()
+        try:
+            if task.status == DownloadStatus.CANCELLED:
+                self._update_task_status(task, DownloadStatus.CANCELLED, "Cancelled")
+            elif error is not None:
+                reason = str(error) or type(error).__name__
+                logger.error(f"Post-processing failed for {task.url}: {reason}")
+                self._update_task_status(
+                    task, DownloadStatus.FAILED, error_message=f"Post-processing failed: {reason}"
+                )
+            else:
+                for warning in result.warnings:
+                    logger.warning(warning)
+                task.checksum = result.checksum
+                task.thumbnail_path = result.thumbnail
+                self._handle_success(task, self._store(task, result.file, result.checksum))
+            self._settle_followers(task)
+        except Exception:
+            # Runs on the pool's callback thread, which would swallow this
+            logger.exception(f"Could not record post-processing of {task.url}")
+        finally:
+            self._end_finish()
+
+    def _settle_followers(self, leader: DownloadTask) -> None:
+        """Give a finished leader's outcome to every duplicate request."""
+        with self._lock:
+            if leader.status not in FINISHED_STATUSES:
+                # Requeued for another attempt; followers keep waiting
+                return
+            key = (leader.video_key, leader.video_format, leader.resolution)
+            if self._leaders.get(key) is leader:
+                del self._leaders[key]
+            followers = self._followers.pop(leader.task_id, [])
+
+        if leader.status == DownloadStatus.CANCELLED:
+            # The duplicates still want the video; the first takes over
+            for follower in followers:
+                follower.status = DownloadStatus.PENDING
+                self._requeue(follower)
+            return
+
+        for follower in followers:
+            self.progress_bus.forget(follower)
+            if leader.status == DownloadStatus.FAILED:
+                self._update_task_status(
+                    follower, DownloadStatus.FAILED, error_message=leader.error_message
+                )
+                continue
+            try:
+                self._handle_success(follower, self._share_file(leader, follower))
+            except OSError as e:
+                self._update_task_status(follower, DownloadStatus.FAILED, error_message=str(e))
+
+    def _requeue(self, task: DownloadTask) -> None:
+        """Queue a task again without adding a history row."""
+        with self._lock:
+            if not self._coalesce(task):
+                self.download_queue.put(task)
+                self._process_queue()
+            self._bump_version()
+        self.progress_bus.publish_status(task)
+
+    def _store(self, task: DownloadTask, downloaded_file: Optional[str],
+               digest: Optional[str] = None) -> Optional[str]:
+        """Move a finished file into the content store, if enabled."""
+        if (self.content_store is not None and downloaded_file
+                and os.path.isfile(downloaded_file)):
+            self._video_key(task)
+            try:
+                self.content_store.ingest(downloaded_file, task, digest)
+            except OSError as e:
+                logger.warning(f"Could not store {downloaded_file}: {e}")
+        return downloaded_file
+
+    def _share_file(self, leader: DownloadTask, follower: DownloadTask) -> Optional[str]:
+        """Make the leader's file available in the follower's download folder."""
+        source = leader.file_path
+        if not source or not os.path.exists(source):
+            return source
+        directory = os.path.abspath(os.path.expanduser(follower.download_path))
+        target = os.path.join(directory, os.path.basename(source))
+        if self.content_store is not None:
+            return self.content_store.place(source, target)
+        place_file(source, target)
+        return target
+
+    def _handle_failure(self, task: DownloadTask, e: BaseException) -> None:
+        """Park a failed task for a delayed retry, or fail it for good."""
+        classification = classify(e)
+        if classification.kind == ErrorKind.PERMANENT:
+            logger.info(f"Not retrying {task.url}: {e}")
+            self._fail(task, str(e))
+            return
+        if task.retries >= task.max_retries:
+            self._fail(task, str(e))
+            return
+
+        task.retries += 1
+        delay = self.retry_policy.delay(task.retries, classification)
+        task.retry_at = datetime.now() + timedelta(seconds=delay)
+        logger.info(
+            f"Retrying {task.url} in {delay:.1f}s "
+            f"({classification.kind.value}, attempt {task.retries}/{task.max_retries}): {e}"
+        )
+        with self._lock:
+            self.active_downloads.pop(task.task_id, None)
+            self.retrying_downloads[task.task_id] = task
+            self.failure_count += 1
+            self._update_task_status(task, DownloadStatus.RETRYING, error_message=str(e))
+        self.retry_scheduler.schedule(task, task.retry_at)
+
+    def _fail(self, task: DownloadTask, error_message: str) -> None:
+        """Fail a task for good and count the failure."""
+        with self._lock:
+            self.failure_count += 1
+            self._update_task_status(task, DownloadStatus.FAILED, error_message=error_message)
+
+    def _on_retry_due(self, task: DownloadTask) -> None:
+        """Queue a task again once its backoff has passed."""
+        with self._lock:
+            if self.retrying_downloads.pop(task.task_id, None) is None:
+                # Cancelled while waiting
+                return
+            task.retry_at = None
+            task.status = DownloadStatus.PENDING
+            self.history.update_status(task, DownloadStatus.PENDING, task.error_message)
+        self._requeue(task)
+
+    def _handle_success(self, task: DownloadTask, downloaded_file: Optional[str]) -> None:
+        """Record a finished file's title and size and mark the task completed."""
+        task.file_path = downloaded_file
+        if downloaded_file:
+            task.title = os.path.splitext(os.path.basename(downloaded_file))[0]
+            if os.path.exists(downloaded_file):
+                task.bytes_done = os.path.getsize(downloaded_file)
+        self._update_task_status(task, DownloadStatus.COMPLETED)
+
+    def _get_downloader(self, url: str):
+        """
+        Return the downloader for a URL's platform, creating it on first use.
+
+        A downloader passed to the constructor handles every platform.
+        """
+        with self._lock:
+            downloader = self.downloader
+            if downloader is None:
+                site = get_site_by_url(url)
+                adapter = site.adapter if site else GENERIC_ADAPTER
+                downloader = self._downloaders.get(adapter)
+                if downloader is None:
+                    downloader = self._downloaders[adapter] = REGISTRY.adapter_class(adapter)(
+                        transfer=SegmentedTransfer(self.connections_per_download)
+                    )
+            transfer = getattr(downloader, "transfer", None)
+            if transfer is not None and transfer.checkpoint_store is None:
+                # Persist byte-range checkpoints so retries and restarts resume
+                transfer.checkpoint_store = self.history
+            if getattr(downloader, "metadata_cache", False) is None:
+                # Share resolved metadata across retries and re-downloads
+                downloader.metadata_cache = self.metadata_cache
+            if getattr(downloader, "backend_selector", False) is None:
+                downloader.backend_selector = self.backend_selector
+            if hasattr(downloader, "defer_merge"):
+                # Leave merging separate video and audio to post-processing
+                downloader.defer_merge = self.postprocessor.can_merge
+            return downloader
 
     def retry_failed(self) -> None:
-        """Retry all failed downloads."""
+        """
+        Retry all failed downloads.
+
+        Partial files and their checkpoints are kept on failure, so retried
+        tasks only fetch the byte ranges that are still missing.
+        """
         with self._lock:
             failed = self.failed_downloads.copy()
             self.failed_downloads.clear()
@@ -87,6 +977,7 @@ class DownloadManager:
                 task.retries = 0
                 task.status = DownloadStatus.PENDING
                 self.add_download(task)
+            self._bump_version()
 
     def _process_queue(self) -> None:
         """Process the download queue."""
@@ -102,34 +993,53 @@ class DownloadManager:
             task.error_message = error_message
             self.history.update_status(task, status, error_message)
             
+            if status in FINISHED_STATUSES:
+                self.active_downloads.pop(task.task_id, None)
+                self.processing_downloads.pop(task.task_id, None)
+                self.paused_downloads.pop(task.task_id, None)
             if status == DownloadStatus.COMPLETED:
-                if task in self.active_downloads.values():
-                    del self.active_downloads[task.url]
                 self.completed_downloads.append(task)
-            elif status == DownloadStatus.FAILED:
-                if task in self.active_downloads.values():
-                    del self.active_downloads[task.url]
+            elif status in (DownloadStatus.FAILED, DownloadStatus.CANCELLED):
                 self.failed_downloads.append(task)
+            self._bump_version()
+        self.progress_bus.publish_status(task)
+
+    def _task_from_row(self, download: dict) -> DownloadTask:
+        """Build a task from a history row."""
+        return DownloadTask(
+            url=download["url"],
+            download_path=download["download_path"],
+            video_format=download["video_format"],
+            resolution=download["resolution"],
+            status=DownloadStatus(download["status"]),
+            scheduled_time=parse_timestamp(download.get("scheduled_time")),
+            retries=download["retries"],
+            error_message=download["error_message"],
+            platform=download["platform"],
+            history_id=download["id"],
+            title=download.get("title"),
+            checksum=download.get("checksum"),
+            thumbnail_path=download.get("thumbnail_path")
+        )
 
     def _load_history(self):
-        """Load recent downloads from history."""
-        recent = self.history.get_recent_downloads(50)
-        for download in recent:
-            task = DownloadTask(
-                url=download["url"],
-                download_path=download["download_path"],
-                video_format=download["video_format"],
-                resolution=download["resolution"],
-                status=DownloadStatus(download["status"]),
-                scheduled_time=download.get("scheduled_time"),
-                retries=download["retries"],
-                error_message=download["error_message"],
-                platform=download["platform"]
-            )
-            
-            if task.status == DownloadStatus.COMPLETED:
-                self.completed_downloads.append(task)
-            elif task.status == DownloadStatus.FAILED:
-                self.failed_downloads.append(task)
-            elif task.status == DownloadStatus.SCHEDULED:
-                self.scheduled_downloads.append(task)
+        """
+        Load the downloads a previous run left behind from history.
+
+        Every paused download is restored, streamed in by status; they stay
+        paused. Of the finished ones only the newest of each status are
+        shown. Scheduled downloads are re-armed by ``_rehydrate_schedule``
+        and the rest of the unfinished ones are recovered from the queue
+        journal, so no fixed window of recent rows decides what survives.
+        """
+        with self._lock:
+            for row in self.history.iter_downloads_by_status(DownloadStatus.PAUSED):
+                task = self._task_from_row(row)
+                self.paused_downloads[task.task_id] = task
+            for status in FINISHED_STATUSES:
+                rows, _ = self.history.query_downloads(status=status, limit=RECENT_FINISHED)
+                tasks = (self.completed_downloads if status == DownloadStatus.COMPLETED
+                         else self.failed_downloads)
+                tasks.extend(self._task_from_row(row) for row in reversed(rows))
+            self.failed_downloads.sort(key=lambda task: task.history_id or 0)
+            self._bump_version()
@@ -1,18 +1,87 @@
 """
 Common types used across the download management system.
 """
-from dataclasses import dataclass
+import threading
+import uuid
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Callable, List, Optional
+
+# Choices offered by the GUI and the command line
+VIDEO_FORMATS = ["mp4", "webm", "avi"]
+RESOLUTIONS = ["360p", "480p", "720p", "1080p"]
 
 class DownloadStatus(Enum):
     PENDING = "pending"
     QUEUED = "queued"
     IN_PROGRESS = "in_progress"
+    PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
     SCHEDULED = "scheduled"
+    CANCELLED = "cancelled"
+    RETRYING = "retrying"  # Waiting out a backoff before the next attempt
+    PAUSED = "paused"  # Stopped by the user; partial data is kept for a resume
+
+# Statuses a task never leaves unless it is retried
+FINISHED_STATUSES = (DownloadStatus.COMPLETED, DownloadStatus.FAILED, DownloadStatus.CANCELLED)
+
+class DownloadCancelled(Exception):
+    """Raised inside a transfer to abort a task the user cancelled."""
+
+class DownloadPaused(DownloadCancelled):
+    """Raised inside a transfer to stop a task the user paused."""
+
+class CancellationToken:
+    """
+    Cooperative stop signal for one attempt at a task.
+
+    Transfers check it after every chunk and sleep on it while throttled, so
+    a cancel or pause takes effect within one chunk, or one socket timeout
+    on a stalled connection.
+    """
+    def __init__(self):
+        self.paused = False
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the attempt was cancelled or paused."""
+        return self._event.is_set()
+
+    def cancel(self, pause: bool = False) -> bool:
+        """Ask the transfer to stop; False if it was already asked."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.paused = pause
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` once when the token is cancelled, or now if it was."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self) -> None:
+        """Raise DownloadPaused or DownloadCancelled once the token is set."""
+        if self._event.is_set():
+            if self.paused:
+                raise DownloadPaused("Paused")
+            raise DownloadCancelled("Cancelled")
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds, waking early on cancellation."""
+        return self._event.wait(timeout)
 
 @dataclass
 class DownloadTask:
@@ -26,3 +95,22 @@ class DownloadTask:
     error_message: Optional[str] = None
     platform: Optional[str] = None
     max_retries: int = 3
+    connections: Optional[int] = None
+    task_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    bytes_done: int = 0
+    total_bytes: Optional[int] = None
+    rate: float = 0.0
+    eta: Optional[float] = None
+    history_id: Optional[int] = None
+    title: Optional[str] = None
+    priority: bool = False
+    rate_limit: Optional[float] = None  # bytes/second, None for no per-task cap
+    video_key: Optional[str] = None  # "platform:video_id", shared by duplicate URLs
+    file_path: Optional[str] = None
+    checksum: Optional[str] = None  # SHA-256 of file_path, set by post-processing
+    thumbnail_path: Optional[str] = None
+    retry_at: Optional[datetime] = None  # When a RETRYING task is queued again
+    # Stop signal of the running attempt, replaced each time the task starts
+    cancel_token: Optional[CancellationToken] = field(
+        default=None, repr=False, compare=False
+    )
@@ -1,21 +1,60 @@
 import os
 import logging
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .transfer import SegmentedTransfer
+
+@dataclass
+class ResolvedMedia:
+    """A direct media URL and where its bytes should be written."""
+    url: str
+    destination: str
+    title: Optional[str] = None
+    total_bytes: Optional[int] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+    # Called by the engine once the media is fetched, with the failure or None
+    on_fetched: Optional[Callable[[Optional[BaseException]], None]] = field(
+        default=None, repr=False, compare=False
+    )
+
+@dataclass
+class SeparateStreams:
+    """Video and audio saved as separate files, left for post-processing to merge."""
+    paths: List[str]
+    title: Optional[str] = None
 
 class BaseVideoDownloader(ABC):
     """
     Abstract base class for video downloaders.
     Defines the interface for platform-specific video download implementations.
     """
-    def __init__(self, download_path=None):
+    def __init__(self, download_path=None, transfer=None, metadata_cache=None,
+                 backend_selector=None):
         """
         Initialize the base downloader.
         
         Args:
             download_path (str, optional): Default download directory. 
                                            If None, uses current working directory.
+            transfer (SegmentedTransfer, optional): Engine used for direct
+                                                    media URLs.
+            metadata_cache (MetadataCache, optional): Store for resolved
+                                                      metadata, reused on
+                                                      retries and re-downloads.
+            backend_selector (BackendSelector, optional): Health records
+                                                          ordering the
+                                                          resolver backends.
         """
         self.download_path = download_path or os.getcwd()
+        self.transfer = transfer or SegmentedTransfer()
+        self.metadata_cache = metadata_cache
+        self.backend_selector = backend_selector
+        # Set when a post-processing stage can merge separate video and
+        # audio downloads, so the merge does not hold a download slot
+        self.defer_merge = False
         
         # Configure logging
         logging.basicConfig(
@@ -26,7 +65,9 @@ class BaseVideoDownloader(ABC):
         self.logger = logging.getLogger(__name__)
 
     @abstractmethod
-    def download(self, url, download_path=None, video_format='mp4', resolution='720p'):
+    def download(self, url, download_path=None, video_format='mp4', resolution='720p',
+                 connections=None, progress_callback=None, throttle=None,
+                 cancel_token=None):
         """
         Abstract method to download a video.
         
@@ -35,12 +76,46 @@ class BaseVideoDownloader(ABC):
             download_path (str, optional): Directory to save the video
             video_format (str, optional): Desired video format
             resolution (str, optional): Desired video resolution
+            connections (int, optional): Parallel connections for the transfer
+            progress_callback (callable, optional): Called with
+                (bytes_done, total_bytes) as data arrives
+            throttle (callable, optional): Bandwidth limiter called with each
+                chunk size; returns the seconds to wait
+            cancel_token (CancellationToken, optional): Checked as data
+                arrives; the download stops once it is cancelled
+        
+        Returns:
+            str or SeparateStreams: Path to the downloaded video, or its
+                unmerged streams when ``defer_merge`` is set
         
         Raises:
             ValueError: If download fails or parameters are invalid
+            DownloadCancelled: If ``cancel_token`` was cancelled or paused
         """
         pass
 
+    def resolve_media(self, url, download_path=None, video_format='mp4', resolution='720p',
+                      refresh=False):
+        """
+        Resolve a page URL to a single direct media URL without downloading.
+        
+        Lets an engine fetch the bytes itself. Platforms that cannot hand
+        out one plain HTTP URL for a request return None, and callers fall
+        back to ``download``.
+        
+        Args:
+            url (str): URL of the video page
+            download_path (str, optional): Directory to save the video
+            video_format (str, optional): Desired video format
+            resolution (str, optional): Desired video resolution
+            refresh (bool, optional): Ignore cached metadata, e.g. after a
+                cached stream URL was refused
+        
+        Returns:
+            ResolvedMedia or None
+        """
+        return None
+
     def _validate_path(self, path):
         """
         Validate and create download path if it doesn't exist.
@@ -0,0 +1,210 @@
+"""
+Retention, archival and space reclamation for the download history database.
+
+Old rows are archived to compressed monthly JSON-lines files and deleted in
+bounded batches; freed pages are handed back to the filesystem with
+``PRAGMA incremental_vacuum`` in small time-boxed steps from a background
+thread so writers for active downloads never wait long for the lock.
+"""
+import gzip
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .download_history import DownloadHistory, _utc_timestamp
+
+DEFAULT_BATCH_SIZE = 500
+BATCH_PAUSE_SECONDS = 0.05
+VACUUM_PAGES_PER_STEP = 128
+VACUUM_STEP_PAUSE_SECONDS = 0.02
+MAINTENANCE_INTERVAL_SECONDS = 3600
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryRetention:
+    """
+    Applies a retention policy to a ``DownloadHistory``.
+    """
+    def __init__(self, history: DownloadHistory, archive_dir: Optional[Path] = None):
+        self.history = history
+        self.archive_dir = archive_dir or history.data_dir / "archive"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def purge(self, days_old: int = 30, archive: bool = True,
+              batch_size: int = DEFAULT_BATCH_SIZE,
+              pause: float = BATCH_PAUSE_SECONDS) -> int:
+        """
+        Remove finished downloads older than ``days_old`` days in bounded batches.
+
+        Pending, scheduled, running, retrying and paused downloads are kept
+        however old they are.
+
+        Args:
+            days_old (int): Age in days after which rows are removed
+            archive (bool): Append removed rows to the monthly archives first
+            batch_size (int): Rows deleted per transaction
+            pause (float): Seconds to yield the write lock between batches
+
+        Returns:
+            int: Number of rows removed
+        """
+        cutoff = _utc_timestamp(datetime.now(timezone.utc) - timedelta(days=days_old))
+        removed = 0
+        while not self._stop.is_set():
+            batch = self.history.get_expired_downloads(cutoff, batch_size)
+            if not batch:
+                break
+            if archive:
+                self._archive(batch)
+            removed += self.history.delete_downloads([row["id"] for row in batch])
+            time.sleep(pause)
+        return removed
+
+    def vacuum(self, time_budget: float = 0.5,
+               pages_per_step: int = VACUUM_PAGES_PER_STEP) -> int:
+        """
+        Return free pages to the filesystem until done or out of time.
+
+        Only has an effect on databases using incremental auto-vacuum; older
+        ones are switched over by ``convert_to_incremental``.
+
+        Returns:
+            int: Number of pages released
+        """
+        deadline = time.monotonic() + time_budget
+        released = 0
+        with self.history._connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+
+        while time.monotonic() < deadline and not self._stop.is_set():
+            with self.history._connection() as conn:
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free:
+                    break
+                # executescript steps the pragma to completion; a plain
+                # execute() frees a single page
+                conn.executescript(f"PRAGMA incremental_vacuum({pages_per_step})")
+                released += free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            time.sleep(VACUUM_STEP_PAUSE_SECONDS)
+        return released
+
+    def convert_to_incremental(self) -> bool:
+        """
+        Switch an existing database to incremental auto-vacuum.
+
+        This rewrites the whole file with a full VACUUM and holds the write
+        lock while it runs, so call it during a quiet period such as startup.
+        Databases already using incremental auto-vacuum are left alone.
+
+        Returns:
+            bool: True if the database was converted
+        """
+        with self.history._connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+        logger.info("Converting the history database to incremental auto-vacuum")
+        conn = self.history._open_connection()
+        try:
+            # The new mode is only written by a VACUUM on the same connection
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        # Pooled connections keep the old mode until they are reopened
+        self.history.close()
+        return True
+
+    def start_background(self, days_old: Optional[int] = None,
+                         interval: float = MAINTENANCE_INTERVAL_SECONDS,
+                         time_budget: float = 0.5) -> None:
+        """Run purge (when ``days_old`` is set) and vacuum every ``interval`` seconds."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(days_old, interval, time_budget),
+            name="history-retention",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background maintenance thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, days_old: Optional[int], interval: float, time_budget: float) -> None:
+        while not self._stop.is_set():
+            try:
+                if days_old is not None:
+                    removed = self.purge(days_old)
+                    if removed:
+                        logger.info(f"Archived and removed {removed} history rows")
+                self.vacuum(time_budget)
+            except Exception as e:
+                logger.error(f"History maintenance failed: {e}")
+            self._stop.wait(interval)
+
+    def list_archives(self) -> List[Path]:
+        """Monthly archive files, oldest first."""
+        return sorted(self.archive_dir.glob("downloads-*.jsonl.gz"))
+
+    def iter_archived(self, month: Optional[str] = None, status: Optional[str] = None,
+                      platform: Optional[str] = None, url: Optional[str] = None,
+                      search: Optional[str] = None) -> Iterator[dict]:
+        """
+        Stream archived rows matching the given filters.
+
+        Args:
+            month (str, optional): Only this month, as ``YYYY-MM``
+            status (str, optional): Only rows with this status
+            platform (str, optional): Only rows from this platform
+            url (str, optional): Only rows for this exact URL
+            search (str, optional): Case-insensitive text in URL, title or error
+        """
+        needle = search.lower() if search else None
+        files = [self._archive_path(month)] if month else self.list_archives()
+        for path in files:
+            if not path.exists():
+                continue
+            with gzip.open(path, "rt", encoding="utf-8") as archive:
+                for line in archive:
+                    row = json.loads(line)
+                    if status is not None and row.get("status") != status:
+                        continue
+                    if platform is not None and row.get("platform") != platform:
+                        continue
+                    if url is not None and row.get("url") != url:
+                        continue
+                    if needle is not None and not any(
+                        needle in (row.get(field) or "").lower()
+                        for field in ("url", "title", "error_message")
+                    ):
+                        continue
+                    yield row
+
+    def _archive(self, rows: List[dict]) -> None:
+        """Append rows to the archive file of the month they were created in."""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(str(row["created_at"])[:7], []).append(row)
+
+        for month, month_rows in by_month.items():
+            # Each append adds a gzip member; readers see one continuous stream
+            with gzip.open(self._archive_path(month), "at", encoding="utf-8") as archive:
+                for row in month_rows:
+                    archive.write(json.dumps(row, default=str) + "\n")
+
+    def _archive_path(self, month: str) -> Path:
+        return self.archive_dir / f"downloads-{month}.jsonl.gz"
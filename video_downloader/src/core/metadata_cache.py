@@ -0,0 +1,167 @@
+"""
+Persistent cache of resolved video metadata.
+
+Resolving a video page takes seconds: the page, player script and manifest
+are fetched and parsed before a single media byte moves. Retries and
+downloads of the same video in another format reuse the cached result.
+
+Entries are keyed by canonical video ID and backend, stored as compressed
+JSON in their own SQLite file, and expire when their signed stream URLs do
+(the ``expire`` query parameter of googlevideo URLs) or after a default TTL.
+The least recently used entries are evicted once the cache exceeds its
+size budget.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+# Stream URLs are dropped this long before they stop working
+EXPIRY_MARGIN_SECONDS = 300
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+BUSY_TIMEOUT_SECONDS = 5.0
+
+
+def stream_expiry(urls: Iterable[str]) -> Optional[float]:
+    """Earliest ``expire`` timestamp found in the query of any of the URLs."""
+    expiries = []
+    for url in urls:
+        if not url:
+            continue
+        value = parse_qs(urlsplit(url).query).get("expire")
+        if value and value[0].isdigit():
+            expiries.append(float(value[0]))
+    return min(expiries) if expiries else None
+
+
+class MetadataCache:
+    """
+    LRU cache of resolver output with expiry-aware TTLs.
+
+    Args:
+        db_path: SQLite file; defaults to ``~/.video_downloader/metadata_cache.db``
+        max_bytes: Budget for the compressed entries
+        default_ttl: Lifetime of entries without signed stream URLs
+    """
+    def __init__(self, db_path: Optional[Path] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 default_ttl: float = DEFAULT_TTL_SECONDS):
+        if db_path is None:
+            data_dir = Path.home() / ".video_downloader"
+            data_dir.mkdir(exist_ok=True)
+            db_path = data_dir / "metadata_cache.db"
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS metadata_cache (
+                    key TEXT PRIMARY KEY,
+                    info BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_metadata_last_used "
+                "ON metadata_cache (last_used)"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a live entry and mark it used, or None."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT info, expires_at FROM metadata_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM metadata_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE metadata_cache SET last_used = ? WHERE key = ?", (now, key)
+            )
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Discarding unreadable metadata for {key}: {e}")
+            self.invalidate(key)
+            return None
+
+    def put(self, key: str, info: Dict[str, Any],
+            stream_urls: Iterable[str] = ()) -> None:
+        """
+        Store an entry, expiring it with the earliest of its stream URLs.
+
+        Args:
+            key: Canonical cache key
+            info: JSON-serialisable resolver output
+            stream_urls: Signed media URLs inside ``info`` that bound its lifetime
+        """
+        now = time.time()
+        expires_at = now + self.default_ttl
+        expiry = stream_expiry(stream_urls)
+        if expiry is not None:
+            expires_at = min(expires_at, expiry - EXPIRY_MARGIN_SECONDS)
+        if expires_at <= now:
+            return
+
+        blob = zlib.compress(json.dumps(info, default=str).encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO metadata_cache (key, info, size, expires_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, blob, len(blob), expires_at, now)
+            )
+            self._evict(now)
+
+    def invalidate(self, key: str) -> None:
+        """Drop an entry, e.g. after its stream URL was refused."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM metadata_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM metadata_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, now: float) -> None:
+        """Delete expired entries, then least recently used ones over budget."""
+        self._conn.execute("DELETE FROM metadata_cache WHERE expires_at <= ?", (now,))
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM metadata_cache"
+        ).fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM metadata_cache ORDER BY last_used"
+        ):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM metadata_cache WHERE key = ?", victims)
@@ -0,0 +1,67 @@
+"""
+Generic downloader for any platform yt-dlp has an extractor for.
+"""
+from typing import Optional, Union
+
+from ..download_types import CancellationToken, DownloadCancelled
+from ..downloader import SeparateStreams
+from ..transfer import ProgressCallback, Throttle
+from .youtube import YouTubeDownloader
+
+
+class GenericDownloader(YouTubeDownloader):
+    """
+    Downloads through yt-dlp alone, sharing its metadata caching and
+    bandwidth hooks with the YouTube downloader.
+    """
+    def download(
+        self,
+        url: str,
+        download_path: Optional[str] = None,
+        video_format: str = 'mp4',
+        resolution: str = '720p',
+        connections: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        throttle: Optional[Throttle] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Union[str, SeparateStreams]:
+        """
+        Download a video with yt-dlp.
+
+        Args:
+            url (str): Video page URL
+            download_path (str, optional): Directory to save the video
+            video_format (str, optional): Desired video format
+            resolution (str, optional): Desired video resolution
+            connections (int, optional): Parallel fragment downloads
+            progress_callback (callable, optional): Called with
+                (bytes_done, total_bytes) as data arrives
+            throttle (callable, optional): Bandwidth limiter
+            cancel_token (CancellationToken, optional): Stops the transfer
+                once cancelled or paused
+
+        Returns:
+            str or SeparateStreams: Path to the downloaded video file, or the
+                unmerged video and audio files when ``defer_merge`` is set
+
+        Raises:
+            ValueError: If download fails
+            DownloadCancelled: If ``cancel_token`` was cancelled or paused
+        """
+        download_path = self._validate_path(download_path)
+        self._log_download_attempt(url)
+        try:
+            return self._download_with_ytdlp(
+                url, download_path, video_format, resolution, connections,
+                progress_callback, throttle, cancel_token
+            )
+        except DownloadCancelled:
+            raise
+        except Exception as e:
+            self._log_download_error(e)
+            raise ValueError(f"Failed to download video: {str(e)}") from e
+
+    def resolve_media(self, url, download_path=None, video_format='mp4', resolution='720p',
+                      refresh=False):
+        """yt-dlp picks and merges formats itself, so there is no single media URL."""
+        return None
@@ -0,0 +1,127 @@
+"""
+Registry mapping URLs to supported platforms and their downloaders.
+
+A URL's hostname is parsed once and looked up in a trie of reversed domain
+labels, so matching costs the same however many sites are registered and
+only whole domains match (``notyoutube.com`` is not ``youtube.com``).
+
+Each site names a downloader adapter. Adapters are classes registered under
+the ``video_downloader.platforms`` entry-point group, so other packages can
+add platforms; the built-in ones are also importable from a source
+checkout. An adapter's module is imported only when a URL first needs it.
+"""
+import importlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "video_downloader.platforms"
+GENERIC_ADAPTER = "generic"
+# Adapters shipped with the application, relative to this package
+BUILTIN_ADAPTERS = {
+    "youtube": ".youtube:YouTubeDownloader",
+    GENERIC_ADAPTER: ".generic:GenericDownloader",
+}
+
+
+def url_hostname(url: str) -> Optional[str]:
+    """Lower-case hostname of a URL, accepting URLs pasted without a scheme."""
+    url = url.strip()
+    if "://" not in url:
+        url = "//" + url
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    return host.rstrip(".") if host else None
+
+
+class DomainTrie:
+    """Maps domains to values; a host matches its longest registered suffix."""
+    _VALUE = ""  # Never a domain label, so it cannot collide with a child
+
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+
+    def insert(self, domain: str, value: Any) -> None:
+        node = self._root
+        for label in reversed(domain.lower().split(".")):
+            node = node.setdefault(label, {})
+        node[self._VALUE] = value
+
+    def lookup(self, host: str) -> Any:
+        """Value of the longest registered domain equal to or above ``host``."""
+        node, found = self._root, None
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get(self._VALUE, found)
+        return found
+
+
+class PlatformRegistry:
+    """
+    Supported sites indexed by domain, with lazily loaded adapters.
+
+    Args:
+        sites: ``VideoSite`` objects to register
+    """
+    def __init__(self, sites: Iterable[Any] = ()):
+        self._trie = DomainTrie()
+        self._sites: List[Any] = []
+        self._adapters: Dict[str, type] = {}
+        self._lock = threading.Lock()
+        for site in sites:
+            self.register(site)
+
+    @property
+    def sites(self) -> List[Any]:
+        return list(self._sites)
+
+    def register(self, site) -> None:
+        """Add a site under its base domain and aliases."""
+        self._sites.append(site)
+        for domain in site.domains:
+            self._trie.insert(domain, site)
+
+    def site_for(self, url: str):
+        """Site serving a URL, or None if the platform is not supported."""
+        host = url_hostname(url)
+        return self._trie.lookup(host) if host else None
+
+    def is_supported(self, url: str) -> bool:
+        return self.site_for(url) is not None
+
+    def adapter_class(self, name: str) -> type:
+        """
+        Downloader class registered under ``name``, imported on first use.
+
+        Raises:
+            LookupError: If no adapter is registered under the name
+        """
+        with self._lock:
+            adapter = self._adapters.get(name)
+            if adapter is None:
+                adapter = self._adapters[name] = self._load_adapter(name)
+            return adapter
+
+    @staticmethod
+    def _load_adapter(name: str) -> type:
+        """Load an adapter from the installed entry points, else the built-ins."""
+        # importlib.metadata scans every installed distribution; defer it
+        from importlib.metadata import entry_points
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name == name:
+                return entry_point.load()
+
+        target = BUILTIN_ADAPTERS.get(name)
+        if target is None:
+            raise LookupError(f"No downloader adapter registered as {name!r}")
+        module_name, _, attribute = target.partition(":")
+        module = importlib.import_module(module_name, __package__)
+        logger.debug(f"Loaded built-in adapter {name!r} from {module.__name__}")
+        return getattr(module, attribute)
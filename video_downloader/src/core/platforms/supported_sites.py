@@ -1,14 +1,49 @@
 """
 Supported video platforms configuration.
 This module manages the list of supported video platforms and their capabilities.
+
+Sites are looked up by hostname through a ``PlatformRegistry`` and name
+the downloader adapter that handles them. Each site also knows how to
+reduce its many URL spellings to one stable ``(platform, video_id)`` key,
+so that e.g. ``youtu.be/X`` and ``m.youtube.com/watch?v=X&t=30`` are
+recognised as the same video.
 """
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .registry import GENERIC_ADAPTER, PlatformRegistry
+
+# Query parameters that never change which video a URL points at
+TRACKING_PARAMS = {"t", "si", "feature", "pp", "ab_channel", "fbclid", "gclid", "igshid"}
 
 class VideoSite:
-    def __init__(self, name, base_url, description, supported_formats=None):
+    def __init__(self, name, base_url, description, supported_formats=None,
+                 aliases=None, id_patterns=None, collection_patterns=None,
+                 adapter=GENERIC_ADAPTER):
         self.name = name
         self.base_url = base_url
         self.description = description
         self.supported_formats = supported_formats or ["mp4", "webm"]
+        # Other domains serving the same platform, e.g. URL shorteners
+        self.domains = [base_url] + list(aliases or [])
+        # Regexes whose first group is the platform's video ID
+        self.id_patterns = [re.compile(pattern) for pattern in id_patterns or []]
+        # Regexes matching playlist, channel and other multi-video URLs
+        self.collection_patterns = [re.compile(pattern) for pattern in collection_patterns or []]
+        # Entry-point name of the downloader for this site
+        self.adapter = adapter
+
+    def video_id(self, url):
+        """Extract the platform's video ID from a URL, or None."""
+        for pattern in self.id_patterns:
+            match = pattern.search(url)
+            if match:
+                return match.group(1)
+        return None
+
+    def is_collection(self, url):
+        """Check whether a URL names a playlist or channel rather than one video."""
+        return any(pattern.search(url) for pattern in self.collection_patterns)
 
     def __str__(self):
         return f"{self.name} ({self.base_url})"
@@ -28,34 +63,65 @@ SUPPORTED_SITES = [
         "YouTube",
         "youtube.com",
         "World's largest video sharing platform",
-        ["mp4", "webm", "3gp"]
+        ["mp4", "webm", "3gp"],
+        aliases=["youtu.be", "youtube-nocookie.com"],
+        adapter="youtube",
+        id_patterns=[
+            r"(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/|/v/)"
+            r"([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])"
+        ],
+        collection_patterns=[
+            r"youtube\.com/playlist\?(?:.*&)?list=",
+            r"youtube\.com/(?:@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+)/?"
+            r"(?:videos|shorts|streams|playlists)?/?(?:[?#]|$)"
+        ]
     ),
     VideoSite(
         "Vimeo",
         "vimeo.com",
         "High-quality creative video platform",
-        ["mp4", "webm"]
+        ["mp4", "webm"],
+        id_patterns=[r"vimeo\.com/(?:video/|channels/[^/]+/|groups/[^/]+/videos/)?(\d+)"],
+        collection_patterns=[
+            r"vimeo\.com/(?:showcase|album)/\d+/?(?:[?#]|$)",
+            r"vimeo\.com/channels/[^/?#]+/?(?:[?#]|$)"
+        ]
     ),
     VideoSite(
         "Dailymotion",
         "dailymotion.com",
         "Popular video sharing platform",
-        ["mp4"]
+        ["mp4"],
+        aliases=["dai.ly"],
+        id_patterns=[r"(?:dailymotion\.com/(?:embed/)?video/|dai\.ly/)([A-Za-z0-9]+)"],
+        collection_patterns=[r"dailymotion\.com/playlist/"]
     ),
     VideoSite(
         "Twitch",
         "twitch.tv",
         "Live streaming and gaming content platform",
-        ["mp4"]
+        ["mp4"],
+        id_patterns=[
+            r"twitch\.tv/videos/(\d+)",
+            r"(?:clips\.twitch\.tv/|twitch\.tv/[^/]+/clip/)([A-Za-z0-9_-]+)"
+        ],
+        collection_patterns=[r"twitch\.tv/[^/?#]+/(?:videos|clips)/?(?:[?#]|$)"]
     ),
     VideoSite(
         "Facebook Video",
         "facebook.com",
         "Social media video content",
-        ["mp4"]
+        ["mp4"],
+        aliases=["fb.watch"],
+        id_patterns=[
+            r"facebook\.com/(?:[^/]+/videos/(?:[^/]+/)?|watch/?\?v=|reel/)(\d+)",
+            r"fb\.watch/([A-Za-z0-9_-]+)"
+        ]
     )
 ]
 
+REGISTRY = PlatformRegistry(SUPPORTED_SITES)
+
 def get_supported_sites():
     """Returns the list of supported video sites."""
     return SUPPORTED_SITES
@@ -65,11 +131,45 @@ def get_site_by_url(url):
     Find a supported site that matches the given URL.
     Returns None if no match is found.
     """
-    return next(
-        (site for site in SUPPORTED_SITES if site.base_url in url.lower()),
-        None
-    )
+    return REGISTRY.site_for(url)
 
 def is_url_supported(url):
     """Check if a given URL is from a supported platform."""
-    return any(site.base_url in url.lower() for site in SUPPORTED_SITES)
+    return REGISTRY.is_supported(url)
+
+def normalize_url(url):
+    """
+    Normalise a URL for comparison: lower-case host without ``www.``/``m.``,
+    no fragment, no tracking parameters and a sorted query string.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    return urlunsplit((
+        (parts.scheme or "https").lower(), host, parts.path.rstrip("/") or "/",
+        urlencode(query), ""
+    ))
+
+def canonical_key(url):
+    """
+    Stable ``(platform, video_id)`` identity of a video URL.
+
+    URLs a site cannot parse fall back to ``(platform or host, normalized URL)``,
+    which still merges trivially different spellings of the same link.
+    """
+    site = get_site_by_url(url)
+    if site is not None:
+        video_id = site.video_id(url)
+        if video_id:
+            return (site.name, video_id)
+    normalized = normalize_url(url)
+    return (site.name if site else urlsplit(normalized).hostname or "", normalized)
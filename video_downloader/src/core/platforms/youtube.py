@@ -1,13 +1,25 @@
 import os
-from typing import Optional
-from ..downloader import BaseVideoDownloader
+import time
+from typing import Any, Callable, Dict, Optional, Union
+from ..download_types import CancellationToken, DownloadCancelled
+from ..downloader import BaseVideoDownloader, ResolvedMedia, SeparateStreams
+from ..transfer import ProgressCallback, Throttle
+from .supported_sites import canonical_key
 
-try:
-    from pytube import YouTube
-    import yt_dlp
-except ImportError:
-    print("Please install pytube and yt-dlp")
-    exit(1)
+# pytube and yt_dlp take a noticeable time to import, so they are loaded by
+# the methods that use them rather than at application start
+
+PYTUBE = 'pytube'
+YTDLP = 'ytdlp'
+# Preferred order before any outcomes are recorded
+BACKENDS = (PYTUBE, YTDLP)
+# pytube only serves progressive (muxed) streams, which YouTube offers as
+# mp4 up to 720p
+PYTUBE_FORMATS = ('mp4',)
+PYTUBE_MAX_HEIGHT = 720
+
+class NoMatchingStream(ValueError):
+    """The video has no stream for the request; the backend itself is healthy."""
 
 class YouTubeDownloader(BaseVideoDownloader):
     """
@@ -19,8 +31,12 @@ class YouTubeDownloader(BaseVideoDownloader):
         url: str, 
         download_path: Optional[str] = None, 
         video_format: str = 'mp4', 
-        resolution: str = '720p'
-    ) -> str:
+        resolution: str = '720p',
+        connections: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        throttle: Optional[Throttle] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Union[str, SeparateStreams]:
         """
         Download a YouTube video with specified parameters.
         
@@ -29,12 +45,21 @@ class YouTubeDownloader(BaseVideoDownloader):
             download_path (str, optional): Directory to save the video
             video_format (str, optional): Desired video format
             resolution (str, optional): Desired video resolution
+            connections (int, optional): Parallel connections for the transfer
+            progress_callback (callable, optional): Called with
+                (bytes_done, total_bytes) as data arrives
+            throttle (callable, optional): Bandwidth limiter called with each
+                chunk size; returns the seconds to wait
+            cancel_token (CancellationToken, optional): Stops the transfer
+                once cancelled or paused
         
         Returns:
-            str: Path to the downloaded video file
+            str or SeparateStreams: Path to the downloaded video file, or the
+                unmerged video and audio files when ``defer_merge`` is set
         
         Raises:
             ValueError: If download fails
+            DownloadCancelled: If ``cancel_token`` was cancelled or paused
         """
         # Validate and prepare download path
         download_path = self._validate_path(download_path)
@@ -42,72 +67,240 @@ class YouTubeDownloader(BaseVideoDownloader):
         # Log download attempt
         self._log_download_attempt(url)
         
-        try:
-            # First, try pytube
+        methods = {PYTUBE: self._download_with_pytube, YTDLP: self._download_with_ytdlp}
+        errors = []
+        last_error = None
+        # Exceptions of the backends that actually attempted the download
+        failures = []
+        # Try the healthiest backend able to serve the request first
+        for backend in self._backend_order(url, video_format, resolution):
+            # A backend is timed until its stream is resolved; the transfer's
+            # duration depends on the file size, not the backend
+            started = time.monotonic()
+            resolved = []
             try:
-                return self._download_with_pytube(
-                    url, download_path, video_format, resolution
-                )
-            
-            # Fallback to yt-dlp if pytube fails
-            except Exception as pytube_error:
-                self.logger.warning(f"Pytube download failed: {pytube_error}")
-                return self._download_with_ytdlp(
-                    url, download_path, video_format, resolution
+                downloaded_file = methods[backend](
+                    url, download_path, video_format, resolution, connections,
+                    progress_callback, throttle, cancel_token,
+                    on_resolved=lambda: resolved.append(time.monotonic())
                 )
+            except DownloadCancelled:
+                # Says nothing about the backend's health
+                raise
+            except NoMatchingStream as e:
+                self.logger.info(f"{backend} cannot serve this request: {e}")
+                errors.append(f"{backend}: {e}")
+                last_error = e
+                continue
+            except Exception as e:
+                # yt-dlp may wrap the exception raised by its progress hook
+                self._raise_if_cancelled(cancel_token, e)
+                self.logger.warning(f"{backend} download failed: {e}")
+                self._record_backend(url, video_format, backend, False, error=str(e))
+                errors.append(f"{backend}: {e}")
+                last_error = e
+                failures.append(e)
+                continue
+            self._record_backend(
+                url, video_format, backend, True,
+                seconds=(resolved[0] if resolved else time.monotonic()) - started
+            )
+            return downloaded_file
         
-        except Exception as e:
-            # Log and re-raise any download errors
-            self._log_download_error(e)
-            raise ValueError(f"Failed to download video: {str(e)}")
+        # Log and re-raise the download errors
+        error = ValueError(f"Failed to download video: {'; '.join(errors)}")
+        self._log_download_error(error)
+        # Chained so retry classification sees each backend's own exception;
+        # one backend's permanent-looking error must not stop a retry another
+        # backend could serve
+        if failures:
+            raise error from ExceptionGroup("YouTube backends failed", failures)
+        raise error from last_error
 
     def _download_with_pytube(
         self, 
         url: str, 
         download_path: str, 
         video_format: str, 
-        resolution: str
+        resolution: str,
+        connections: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        throttle: Optional[Throttle] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        on_resolved: Optional[Callable[[], None]] = None
     ) -> str:
         """
         Download video using pytube library.
         
+        pytube only resolves the stream; the bytes are fetched by the
+        segmented transfer engine over several connections.
+        
         Args:
             url (str): YouTube video URL
             download_path (str): Directory to save the video
             video_format (str): Desired video format
             resolution (str): Desired video resolution
+            connections (int, optional): Parallel connections for the transfer
+            progress_callback (callable, optional): Progress receiver
+            throttle (callable, optional): Bandwidth limiter
+            cancel_token (CancellationToken, optional): Stops the transfer
+            on_resolved (callable, optional): Called once the stream is
+                resolved, before the transfer starts
         
         Returns:
             str: Path to the downloaded video file
         """
-        # Create YouTube object
-        yt = YouTube(url)
-        
-        # Filter streams based on format and resolution
-        video = yt.streams.filter(
-            progressive=True, 
-            file_extension=video_format, 
-            resolution=resolution
-        ).first()
-        
-        if not video:
-            raise ValueError(f"No stream found matching format {video_format} and resolution {resolution}")
+        media = self._resolve_with_pytube(url, download_path, video_format, resolution)
+        if on_resolved is not None:
+            on_resolved()
         
         # Download the video
-        downloaded_file = video.download(output_path=download_path)
+        try:
+            downloaded_file = self.transfer.download(
+                media.url,
+                media.destination,
+                connections=connections,
+                progress=progress_callback,
+                throttle=throttle,
+                cancel=cancel_token
+            )
+        except DownloadCancelled:
+            raise
+        except Exception:
+            if not media.from_cache:
+                raise
+            # Cached stream URLs can be revoked before they expire
+            media = self._resolve_with_pytube(
+                url, download_path, video_format, resolution, refresh=True
+            )
+            downloaded_file = self.transfer.download(
+                media.url,
+                media.destination,
+                connections=connections,
+                progress=progress_callback,
+                throttle=throttle,
+                cancel=cancel_token
+            )
         
         # Log successful download
-        self._log_download_success(yt.title, downloaded_file)
+        self._log_download_success(media.title, downloaded_file)
         
         return downloaded_file
 
+    def resolve_media(
+        self,
+        url: str,
+        download_path: Optional[str] = None,
+        video_format: str = 'mp4',
+        resolution: str = '720p',
+        refresh: bool = False
+    ) -> Optional[ResolvedMedia]:
+        """
+        Resolve a progressive stream with pytube, if one matches.
+        
+        Returns:
+            ResolvedMedia or None: None when only yt-dlp can serve the request,
+                or should be tried first
+        """
+        if self._backend_order(url, video_format, resolution)[0] != PYTUBE:
+            return None
+        started = time.monotonic()
+        try:
+            media = self._resolve_with_pytube(
+                url, self._validate_path(download_path), video_format, resolution,
+                refresh=refresh
+            )
+        except NoMatchingStream as e:
+            self.logger.info(f"Pytube cannot serve this request: {e}")
+            return None
+        except Exception as e:
+            self.logger.warning(f"Pytube resolution failed: {e}")
+            self._record_backend(url, video_format, PYTUBE, False, error=str(e))
+            return None
+        # Timed like download(): resolution only, not the transfer
+        seconds = time.monotonic() - started
+
+        def fetched(error: Optional[BaseException]) -> None:
+            # A stream URL that resolves can still be refused, so pytube's
+            # health is recorded once the engine has fetched it
+            if error is not None:
+                self.logger.warning(f"Pytube stream download failed: {error}")
+                self._record_backend(url, video_format, PYTUBE, False, error=str(error))
+            else:
+                self._record_backend(url, video_format, PYTUBE, True, seconds=seconds)
+
+        media.on_fetched = fetched
+        return media
+
+    def _resolve_with_pytube(
+        self,
+        url: str,
+        download_path: str,
+        video_format: str,
+        resolution: str,
+        refresh: bool = False
+    ) -> ResolvedMedia:
+        """
+        Find the progressive stream matching format and resolution.
+        
+        Every progressive stream of the video is cached, so a later request
+        for another format or resolution resolves without network access.
+        
+        Raises:
+            NoMatchingStream: If no stream matches
+        """
+        key = self._cache_key(url, 'pytube')
+        info = None if refresh else self._cached_info(key)
+        from_cache = info is not None
+        if info is None:
+            # Create YouTube object
+            from pytube import YouTube
+            yt = YouTube(url)
+            info = {
+                'title': yt.title,
+                'streams': [
+                    {
+                        'url': stream.url,
+                        'extension': stream.subtype,
+                        'resolution': stream.resolution,
+                        'filename': stream.default_filename,
+                    }
+                    for stream in yt.streams.filter(progressive=True)
+                ],
+            }
+            self._cache_info(key, info, [stream['url'] for stream in info['streams']])
+        
+        # Filter streams based on format and resolution
+        video = next(
+            (
+                stream for stream in info['streams']
+                if stream['extension'] == video_format and stream['resolution'] == resolution
+            ),
+            None
+        )
+        
+        if not video:
+            raise NoMatchingStream(f"No stream found matching format {video_format} and resolution {resolution}")
+        
+        return ResolvedMedia(
+            url=video['url'],
+            destination=os.path.join(download_path, video['filename']),
+            title=info['title'],
+            from_cache=from_cache
+        )
+
     def _download_with_ytdlp(
         self, 
         url: str, 
         download_path: str, 
         video_format: str, 
-        resolution: str
-    ) -> str:
+        resolution: str,
+        connections: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        throttle: Optional[Throttle] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        on_resolved: Optional[Callable[[], None]] = None
+    ) -> Union[str, SeparateStreams]:
         """
         Download video using yt-dlp library as a fallback.
         
@@ -116,25 +309,264 @@ class YouTubeDownloader(BaseVideoDownloader):
             download_path (str): Directory to save the video
             video_format (str): Desired video format
             resolution (str): Desired video resolution
+            connections (int, optional): Parallel fragment downloads
+            progress_callback (callable, optional): Progress receiver
+            throttle (callable, optional): Bandwidth limiter
+            cancel_token (CancellationToken, optional): Checked by a progress
+                hook, which aborts yt-dlp's transfer once it is set
+            on_resolved (callable, optional): Called once the extractor has
+                resolved the formats, before the transfer starts
         
         Returns:
-            str: Path to the downloaded video file
+            str or SeparateStreams: Path to the downloaded video file, or the
+                unmerged video and audio files when ``defer_merge`` is set
         """
+        height = resolution[:-1]
+        outtmpl = os.path.join(download_path, '%(title)s.%(ext)s')
         # Configure yt-dlp options
         ydl_opts = {
-            'format': f'bestvideo[height<={resolution[:-1]}]+bestaudio/best[height<={resolution[:-1]}]',
-            'outtmpl': os.path.join(download_path, '%(title)s.%(ext)s'),
+            'format': f'bestvideo[height<={height}]+bestaudio/best[height<={height}]',
+            'outtmpl': outtmpl,
+            'concurrent_fragment_downloads': connections or self.transfer.connections,
+            'continuedl': True,
         }
+        if self.defer_merge:
+            # Fetch video and audio as two files named after their format
+            # IDs; the post-processing stage merges them
+            ydl_opts['format'] = f'(bestvideo[height<={height}],bestaudio)/best[height<={height}]'
+            ydl_opts['outtmpl'] = os.path.join(download_path, '%(title)s.f%(format_id)s.%(ext)s')
+        if cancel_token is not None:
+            # yt-dlp calls its hooks for every chunk and fragment; the part
+            # files stay on disk and 'continuedl' resumes them
+            ydl_opts['progress_hooks'] = [lambda d: cancel_token.raise_if_cancelled()]
+        if progress_callback is not None:
+            ydl_opts.setdefault('progress_hooks', []).append(
+                lambda d: progress_callback(
+                    d.get('downloaded_bytes') or 0,
+                    d.get('total_bytes') or d.get('total_bytes_estimate')
+                )
+            )
+        if throttle is not None:
+            # yt-dlp paces itself at the task's cap; the hook also charges the
+            # shared buckets so other downloads' traffic is accounted for
+            rate = getattr(throttle, 'rate', None)
+            if rate:
+                ydl_opts['ratelimit'] = rate
+            ydl_opts.setdefault('progress_hooks', []).append(
+                self._throttle_hook(throttle, cancel_token)
+            )
         
-        # Download using yt-dlp
+        # Resolve without downloading, then start the transfer from the
+        # (possibly cached) extractor output
+        import yt_dlp
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(url, download=True)
+            info_dict, from_cache = self._extract_with_ytdlp(ydl, url)
+            if on_resolved is not None:
+                on_resolved()
+            try:
+                info_dict = ydl.process_ie_result(info_dict, download=True)
+            except Exception as e:
+                self._raise_if_cancelled(cancel_token, e)
+                if not from_cache:
+                    raise
+                # Cached stream URLs can be revoked before they expire
+                info_dict, _ = self._extract_with_ytdlp(ydl, url, refresh=True)
+                info_dict = ydl.process_ie_result(info_dict, download=True)
             video_title = info_dict.get('title', 'Unknown')
             
             # Find the downloaded file
-            downloaded_file = ydl.prepare_filename(info_dict)
+            downloaded_file = ydl.prepare_filename(info_dict, outtmpl=outtmpl)
+            streams = [d['filepath'] for d in info_dict.get('requested_downloads', ())
+                       if d.get('filepath')]
+        
+        if self.defer_merge and len(streams) > 1:
+            self._log_download_success(video_title, ', '.join(streams))
+            return SeparateStreams(streams, video_title)
+        if self.defer_merge and streams:
+            # A single progressive format matched; drop the format ID suffix
+            os.replace(streams[0], downloaded_file)
         
         # Log successful download
         self._log_download_success(video_title, downloaded_file)
         
         return downloaded_file
+
+    def _extract_with_ytdlp(self, ydl, url: str, refresh: bool = False):
+        """
+        Run yt-dlp's extractor without downloading, reusing cached output.
+        
+        Args:
+            ydl (YoutubeDL): Configured yt-dlp instance
+            url (str): YouTube video URL
+            refresh (bool, optional): Ignore the cached entry
+        
+        Returns:
+            tuple: Unprocessed info dict and whether it came from the cache
+        """
+        key = self._cache_key(url, 'ytdlp')
+        info = None if refresh else self._cached_info(key)
+        if info is not None:
+            return info, True
+        
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False, process=False))
+        if info.get('_type', 'video') == 'video':
+            stream_urls = [info.get('url')] + [
+                fmt.get('url') for fmt in info.get('formats') or []
+            ]
+            self._cache_info(key, info, stream_urls)
+        return info, False
+
+    @staticmethod
+    def _backend_supports(backend: str, video_format: str, resolution: str) -> bool:
+        """
+        Whether a backend can serve a format and resolution at all.
+        
+        Args:
+            backend (str): Backend name
+            video_format (str): Desired video format
+            resolution (str): Desired video resolution, e.g. ``"720p"``
+        
+        Returns:
+            bool: False for requests the backend is known never to satisfy
+        """
+        if backend == PYTUBE:
+            return (video_format in PYTUBE_FORMATS
+                    and int(resolution.rstrip('p')) <= PYTUBE_MAX_HEIGHT)
+        return True
+
+    def _backend_order(self, url: str, video_format: str, resolution: str):
+        """
+        Backends to try for a request, best first.
+        
+        Backends that cannot serve the format and resolution are skipped
+        without an attempt; the rest are ordered by the backend selector,
+        if one is configured.
+        
+        Args:
+            url (str): YouTube video URL
+            video_format (str): Desired video format
+            resolution (str): Desired video resolution
+        
+        Returns:
+            list: Backend names
+        """
+        candidates = [
+            backend for backend in BACKENDS
+            if self._backend_supports(backend, video_format, resolution)
+        ]
+        if self.backend_selector is None:
+            return candidates
+        platform, _ = canonical_key(url)
+        return self.backend_selector.order(platform, video_format, candidates)
+
+    def _record_backend(self, url: str, video_format: str, backend: str, success: bool,
+                        seconds: Optional[float] = None, error: Optional[str] = None) -> None:
+        """
+        Report an attempt's outcome to the backend selector, if one is configured.
+        
+        Args:
+            url (str): YouTube video URL
+            video_format (str): Requested video format
+            backend (str): Backend that made the attempt
+            success (bool): Whether it succeeded
+            seconds (float, optional): Duration of a successful attempt
+            error (str, optional): Failure message
+        """
+        if self.backend_selector is not None:
+            platform, _ = canonical_key(url)
+            self.backend_selector.record(platform, video_format, backend, success, seconds, error)
+
+    def _cache_key(self, url: str, backend: str) -> str:
+        """
+        Cache key for a video: its canonical ``(platform, video_id)`` identity.
+        
+        Args:
+            url (str): YouTube video URL
+            backend (str): Resolver whose output is cached
+        
+        Returns:
+            str: Cache key
+        """
+        platform, video_id = canonical_key(url)
+        return f"{platform}:{video_id}:{backend}"
+
+    def _cached_info(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up resolver output in the metadata cache, if one is configured.
+        
+        Args:
+            key (str): Cache key
+        
+        Returns:
+            dict or None: Cached resolver output
+        """
+        if self.metadata_cache is None:
+            return None
+        info = self.metadata_cache.get(key)
+        if info is not None:
+            self.logger.info(f"Using cached metadata for {key}")
+        return info
+
+    def _cache_info(self, key: str, info: Dict[str, Any], stream_urls) -> None:
+        """
+        Store resolver output, expiring with its stream URLs.
+        
+        Args:
+            key (str): Cache key
+            info (dict): Resolver output
+            stream_urls (iterable): Signed media URLs inside ``info``
+        """
+        if self.metadata_cache is not None:
+            self.metadata_cache.put(key, info, stream_urls)
+
+    @staticmethod
+    def _raise_if_cancelled(cancel_token: Optional[CancellationToken],
+                            error: Exception) -> None:
+        """
+        Re-raise a failure as the cancellation that caused it, if any.
+        
+        Args:
+            cancel_token (CancellationToken, optional): Token of the attempt
+            error (Exception): Exception raised by the backend
+        """
+        if isinstance(error, DownloadCancelled):
+            raise error
+        if cancel_token is not None and cancel_token.cancelled:
+            try:
+                cancel_token.raise_if_cancelled()
+            except DownloadCancelled as cancelled:
+                raise cancelled from error
+
+    @staticmethod
+    def _throttle_hook(throttle: Throttle, cancel_token: Optional[CancellationToken] = None):
+        """
+        Build a yt-dlp progress hook that blocks the download for its bandwidth debt.
+        
+        Args:
+            throttle (callable): Bandwidth limiter for the task
+            cancel_token (CancellationToken, optional): Wakes the hook early
+        
+        Returns:
+            callable: Progress hook for ``YoutubeDL``
+        """
+        seen = {}
+        
+        def hook(d):
+            if d.get('status') != 'downloading':
+                return
+            # Video and audio streams are fetched one after the other,
+            # each with its own byte count
+            filename = d.get('filename')
+            downloaded = d.get('downloaded_bytes') or 0
+            delta = downloaded - seen.get(filename, downloaded)
+            seen[filename] = downloaded
+            if delta > 0:
+                delay = throttle(delta)
+                if delay > 0:
+                    if cancel_token is None:
+                        time.sleep(delay)
+                    else:
+                        cancel_token.wait(delay)
+                        cancel_token.raise_if_cancelled()
+        
+        return hook
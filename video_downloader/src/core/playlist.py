@@ -0,0 +1,197 @@
+"""
+Lazy expansion of playlist and channel URLs into download tasks.
+
+Collections are listed with yt-dlp's flat extraction, which fetches one
+page of entries at a time as the generator is consumed, so a 20,000-item
+channel is never held in memory. Entries can be resolved ahead of their
+download by a small bounded pool (warming the metadata cache), and
+``DownloadFeed`` moves the resulting tasks into a ``DownloadManager`` only
+while its queue is below a high-water mark.
+"""
+import logging
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from .download_types import DownloadTask
+from .platforms.supported_sites import get_site_by_url
+
+logger = logging.getLogger(__name__)
+
+RESOLVE_WORKERS = 4
+# Queued tasks above which a feed waits for downloads to start
+DEFAULT_MAX_PENDING = 50
+# Nested collections (channel -> tab -> playlist) followed at most this deep
+MAX_DEPTH = 3
+
+
+@dataclass
+class CollectionEntry:
+    url: str
+    index: int
+    video_id: Optional[str] = None
+    title: Optional[str] = None
+
+
+def is_collection_url(url: str) -> bool:
+    """Whether a URL names a playlist, channel or other collection of videos."""
+    site = get_site_by_url(url)
+    return site is not None and site.is_collection(url)
+
+
+class CollectionExpander:
+    """
+    Yields the videos of a collection URL page by page.
+
+    Args:
+        resolver: Optional callable run on each entry ahead of its download,
+                  e.g. to warm the metadata cache
+        resolve_workers: Entries resolved concurrently
+    """
+    def __init__(self, resolver: Optional[Callable[[CollectionEntry], Any]] = None,
+                 resolve_workers: int = RESOLVE_WORKERS):
+        self.resolver = resolver
+        self.resolve_workers = max(1, resolve_workers)
+
+    def entries(self, url: str) -> Iterator[CollectionEntry]:
+        """Flat-list a collection lazily, following nested collections."""
+        import yt_dlp
+
+        options = {
+            "extract_flat": "in_playlist",
+            "lazy_playlist": True,
+            "quiet": True,
+            "skip_download": True,
+        }
+        index = 0
+        with yt_dlp.YoutubeDL(options) as ydl:
+            for entry in self._walk(ydl, url, 0):
+                index += 1
+                yield CollectionEntry(
+                    url=entry.get("url") or entry.get("webpage_url"),
+                    index=index,
+                    video_id=entry.get("id"),
+                    title=entry.get("title")
+                )
+
+    def _walk(self, ydl, url: str, depth: int) -> Iterator[dict]:
+        info = ydl.extract_info(url, download=False, process=False)
+        if info.get("_type") not in ("playlist", "multi_video"):
+            yield info
+            return
+
+        # ``entries`` is a generator that requests further pages on demand
+        for entry in info.get("entries") or ():
+            if not entry:
+                continue
+            entry_url = entry.get("url") or entry.get("webpage_url")
+            nested = (
+                entry.get("_type") == "playlist"
+                or (entry_url and entry.get("ie_key") != "Youtube" and is_collection_url(entry_url))
+            )
+            if nested and depth < MAX_DEPTH and entry_url:
+                yield from self._walk(ydl, entry_url, depth + 1)
+            elif entry_url:
+                yield entry
+
+    def resolved(self, url: str) -> Iterator[CollectionEntry]:
+        """
+        Yield entries in order after running the resolver on each.
+
+        At most ``2 * resolve_workers`` entries are in flight, so resolution
+        stays just ahead of whoever consumes the generator.
+        """
+        if self.resolver is None:
+            yield from self.entries(url)
+            return
+
+        window = deque()
+        with ThreadPoolExecutor(self.resolve_workers, thread_name_prefix="expand") as pool:
+            for entry in self.entries(url):
+                window.append((entry, pool.submit(self.resolver, entry)))
+                if len(window) >= 2 * self.resolve_workers:
+                    yield self._settle(*window.popleft())
+            while window:
+                yield self._settle(*window.popleft())
+
+    @staticmethod
+    def _settle(entry: CollectionEntry, future) -> CollectionEntry:
+        try:
+            future.result()
+        except Exception as e:
+            # The download resolves the entry again and reports real errors
+            logger.warning(f"Could not resolve {entry.url} ahead of time: {e}")
+        return entry
+
+
+def collection_tasks(template: DownloadTask, entries: Iterable[CollectionEntry]) -> Iterator[DownloadTask]:
+    """Lazily turn collection entries into tasks with the template's settings."""
+    for entry in entries:
+        yield replace(
+            template,
+            url=entry.url,
+            title=entry.title,
+            task_id=uuid.uuid4().hex,
+            video_key=None,
+            history_id=None
+        )
+
+
+class DownloadFeed:
+    """
+    Feeds tasks from an iterable into a manager with backpressure.
+
+    The iterable is consumed in a background thread, and each task is added
+    only while fewer than ``max_pending`` tasks are waiting in the queue
+    and the feed is not paused.
+    """
+    def __init__(self, manager, tasks: Iterable[DownloadTask],
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.manager = manager
+        self.tasks = tasks
+        self.max_pending = max(1, max_pending)
+        self.added = 0
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+        self._cancelled = threading.Event()
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._thread = threading.Thread(target=self._run, name="download-feed", daemon=True)
+
+    def start(self) -> "DownloadFeed":
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        """Stop adding tasks; tasks already added are unaffected."""
+        self._cancelled.set()
+
+    def pause(self) -> None:
+        """Stop adding tasks until ``resume`` is called."""
+        self._resumed.clear()
+
+    def resume(self) -> None:
+        self._resumed.set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    def _run(self) -> None:
+        try:
+            for task in self.tasks:
+                while not (self._resumed.wait(0.5)
+                           and self.manager.wait_for_queue_below(self.max_pending, timeout=0.5)):
+                    if self._cancelled.is_set():
+                        return
+                if self._cancelled.is_set():
+                    return
+                self.manager.add_download(task)
+                self.added += 1
+        except Exception as e:
+            self.error = e
+            logger.error(f"Feeding downloads failed after {self.added} tasks: {e}")
+        finally:
+            self.done.set()
@@ -0,0 +1,185 @@
+"""
+Post-processing stage run in worker processes after a download finishes.
+
+Merging separately downloaded video and audio, converting to the requested
+container, hashing and thumbnail extraction are CPU and disk work. They run
+in their own process pool with its own concurrency limit, so a task frees
+its download slot as soon as its bytes are on disk and the next transfer
+starts while ffmpeg works.
+
+Conversion first tries a stream copy into the requested container and only
+transcodes when the codecs do not fit it. Without ffmpeg on the PATH,
+merging and conversion are skipped and only the checksum is computed.
+Workers are spawned, so scripts that create a DownloadManager need the
+usual ``if __name__ == "__main__":`` guard.
+"""
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .content_store import file_digest
+
+# Codec options used when a stream copy into the container is refused
+TRANSCODE_OPTIONS = {
+    "mp4": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-c:a", "aac"],
+    "webm": ["-c:v", "libvpx-vp9", "-b:v", "0", "-crf", "32", "-c:a", "libopus"],
+    "avi": ["-c:v", "mpeg4", "-q:v", "5", "-c:a", "libmp3lame"],
+}
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_OFFSET_SECONDS = 1
+
+
+@dataclass
+class PostProcessJob:
+    """Work for one finished download; must stay picklable."""
+    inputs: List[str]
+    video_format: str
+    ffmpeg: Optional[str] = None
+    checksum: bool = True
+    thumbnail: bool = False
+
+
+@dataclass
+class PostProcessResult:
+    file: str
+    checksum: Optional[str] = None
+    thumbnail: Optional[str] = None
+    warnings: List[str] = field(default_factory=list)
+
+
+def run_job(job: PostProcessJob) -> PostProcessResult:
+    """Merge, convert, hash and thumbnail one download. Runs in a worker process."""
+    path = job.inputs[0]
+    result = PostProcessResult(file=path)
+    stem, extension = os.path.splitext(path)
+    if len(job.inputs) > 1:
+        # yt-dlp names each stream "<title>.f<format_id>.<ext>"
+        stem = os.path.splitext(stem)[0]
+
+    needs_conversion = len(job.inputs) > 1 or extension.lstrip(".").lower() != job.video_format
+    if needs_conversion and job.ffmpeg:
+        target = f"{stem}.{job.video_format}"
+        result.file = _convert(job.ffmpeg, job.inputs, target, job.video_format)
+        for source in job.inputs:
+            if os.path.abspath(source) != os.path.abspath(result.file):
+                os.remove(source)
+    elif needs_conversion:
+        result.warnings.append(f"ffmpeg not found; left {path} as downloaded")
+
+    if job.checksum:
+        result.checksum = file_digest(result.file)
+    if job.thumbnail and job.ffmpeg:
+        result.thumbnail = _thumbnail(job.ffmpeg, result.file, result.warnings)
+    return result
+
+
+def _convert(ffmpeg: str, inputs: List[str], target: str, video_format: str) -> str:
+    """Write the inputs' streams into one file, copying them when the container allows."""
+    staging = os.path.join(
+        os.path.dirname(target), f".{os.path.basename(target)}.part.{video_format}"
+    )
+    command = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y"]
+    for source in inputs:
+        command += ["-i", source]
+    for index in range(len(inputs)):
+        command += ["-map", str(index)]
+
+    try:
+        copied = subprocess.run(command + ["-c", "copy", staging], capture_output=True, text=True)
+        if copied.returncode != 0:
+            transcoded = subprocess.run(
+                command + TRANSCODE_OPTIONS.get(video_format, []) + [staging],
+                capture_output=True, text=True
+            )
+            if transcoded.returncode != 0:
+                raise RuntimeError(
+                    f"ffmpeg could not produce {video_format}: {transcoded.stderr.strip()}"
+                )
+        os.replace(staging, target)
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+    return target
+
+
+def _thumbnail(ffmpeg: str, path: str, warnings: List[str]) -> Optional[str]:
+    """Save a JPEG frame from early in the video next to it."""
+    target = os.path.splitext(path)[0] + ".jpg"
+    for offset in (THUMBNAIL_OFFSET_SECONDS, 0):
+        completed = subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-ss", str(offset),
+             "-i", path, "-frames:v", "1", "-vf", f"scale={THUMBNAIL_WIDTH}:-2", target],
+            capture_output=True, text=True
+        )
+        if completed.returncode == 0 and os.path.exists(target):
+            return target
+    warnings.append(f"Could not extract a thumbnail from {path}: {completed.stderr.strip()}")
+    return None
+
+
+class PostProcessor:
+    """
+    Process pool running post-processing jobs for finished downloads.
+
+    Args:
+        max_workers: Jobs run at once; independent of download slots
+        ffmpeg: ffmpeg executable; looked up on the PATH if omitted
+        checksum: Hash every finished file
+        thumbnails: Save a thumbnail next to every finished video
+    """
+    def __init__(self, max_workers: Optional[int] = None, ffmpeg: Optional[str] = None,
+                 checksum: bool = True, thumbnails: bool = False):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.ffmpeg = ffmpeg or shutil.which("ffmpeg")
+        self.checksum = checksum
+        self.thumbnails = thumbnails
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def can_merge(self) -> bool:
+        """Whether separately downloaded streams can be merged here."""
+        return self.ffmpeg is not None
+
+    def job_for(self, inputs: List[str], video_format: str) -> Optional[PostProcessJob]:
+        """Job for a download's files, or None when there is nothing to do."""
+        if not inputs or not all(os.path.isfile(path) for path in inputs):
+            return None
+        extension = os.path.splitext(inputs[0])[1].lstrip(".").lower()
+        convert = self.ffmpeg is not None and (len(inputs) > 1 or extension != video_format)
+        if not (convert or self.checksum or self.thumbnails):
+            return None
+        return PostProcessJob(
+            inputs=list(inputs),
+            video_format=video_format,
+            ffmpeg=self.ffmpeg,
+            checksum=self.checksum,
+            thumbnail=self.thumbnails and self.ffmpeg is not None
+        )
+
+    def submit(self, job: PostProcessJob) -> Future:
+        return self._ensure_pool().submit(run_job, job)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_pool(self):
+        """Start the worker processes on first use."""
+        with self._lock:
+            if self._pool is None:
+                # multiprocessing is only imported once a download finishes
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # Forking a process that runs download threads can copy held
+                # locks into the child; spawn starts workers from scratch
+                self._pool = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
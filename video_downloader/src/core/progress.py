@@ -0,0 +1,215 @@
+"""
+Progress reporting from download workers to the UI.
+
+Workers publish byte counts from any thread; the bus keeps only the latest
+event per task so the Tk main loop can drain at most one update per task on
+each frame instead of being called back for every chunk.
+
+Other consumers, such as control API clients, take their own
+``subscribe()`` view: each subscription coalesces progress independently
+and also receives every status change in order.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Union
+
+from .download_types import DownloadTask
+
+DEFAULT_ALPHA = 0.3
+MIN_SAMPLE_INTERVAL = 0.25
+
+
+@dataclass
+class ProgressEvent:
+    task_id: str
+    bytes_done: int
+    total_bytes: Optional[int]
+    rate: float
+    eta: Optional[float]
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Completed fraction between 0 and 1, if the total size is known."""
+        if not self.total_bytes:
+            return None
+        return min(1.0, self.bytes_done / self.total_bytes)
+
+
+@dataclass
+class StatusEvent:
+    task_id: str
+    status: str
+    error_message: Optional[str] = None
+
+
+# Status events kept for a subscriber that stops reading; older ones are dropped
+MAX_PENDING_STATUS = 10000
+
+
+class ProgressSubscription:
+    """
+    One consumer's view of the bus, readable from any thread.
+    """
+    def __init__(self, bus: "ProgressBus"):
+        self._bus = bus
+        self._ready = threading.Condition()
+        self._progress: Dict[str, ProgressEvent] = {}
+        self._status: Deque[StatusEvent] = deque(maxlen=MAX_PENDING_STATUS)
+        self.closed = False
+
+    def wait(self, timeout: Optional[float] = None) -> List[Union[StatusEvent, ProgressEvent]]:
+        """
+        Take pending events, waiting up to ``timeout`` seconds for the first.
+
+        Status changes come first, in order, followed by the latest progress
+        of every task updated since the previous call.
+        """
+        with self._ready:
+            self._ready.wait_for(
+                lambda: self._status or self._progress or self.closed, timeout
+            )
+            events: List[Union[StatusEvent, ProgressEvent]] = list(self._status)
+            events.extend(self._progress.values())
+            self._status.clear()
+            self._progress.clear()
+        return events
+
+    def close(self) -> None:
+        self._bus._unsubscribe(self)
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+    def _offer(self, event: Union[StatusEvent, ProgressEvent]) -> None:
+        with self._ready:
+            if isinstance(event, StatusEvent):
+                self._status.append(event)
+            else:
+                self._progress[event.task_id] = event
+            self._ready.notify_all()
+
+
+class ThroughputEstimator:
+    """
+    Exponentially weighted moving average of transfer rate in bytes/second.
+    """
+    def __init__(self, alpha: float = DEFAULT_ALPHA,
+                 min_interval: float = MIN_SAMPLE_INTERVAL):
+        self.alpha = alpha
+        self.min_interval = min_interval
+        self.rate = 0.0
+        self._last_bytes: Optional[int] = None
+        self._last_time = 0.0
+
+    def update(self, bytes_done: int, now: Optional[float] = None) -> float:
+        """Feed the current byte count and return the smoothed rate."""
+        now = time.monotonic() if now is None else now
+        if self._last_bytes is None or bytes_done < self._last_bytes:
+            self._last_bytes, self._last_time = bytes_done, now
+            return self.rate
+
+        elapsed = now - self._last_time
+        if elapsed < self.min_interval:
+            return self.rate
+
+        sample = (bytes_done - self._last_bytes) / elapsed
+        self.rate = sample if not self.rate else (
+            self.alpha * sample + (1 - self.alpha) * self.rate
+        )
+        self._last_bytes, self._last_time = bytes_done, now
+        return self.rate
+
+    def eta(self, bytes_done: int, total_bytes: Optional[int]) -> Optional[float]:
+        """Seconds left at the smoothed rate, if it can be estimated."""
+        if not total_bytes or self.rate <= 0:
+            return None
+        return max(0.0, (total_bytes - bytes_done) / self.rate)
+
+
+class ProgressBus:
+    """
+    Thread-safe, coalescing channel for download progress events.
+    """
+    def __init__(self, alpha: float = DEFAULT_ALPHA):
+        self.alpha = alpha
+        self._pending: Dict[str, ProgressEvent] = {}
+        self._estimators: Dict[str, ThroughputEstimator] = {}
+        self._last_seen: Dict[str, int] = {}
+        self._transferred = 0
+        self._subscribers: List[ProgressSubscription] = []
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_transferred(self) -> int:
+        """Bytes received by all tasks since the bus was created."""
+        with self._lock:
+            return self._transferred
+
+    def publish(self, task: DownloadTask, bytes_done: int,
+                total_bytes: Optional[int] = None, counted: bool = True) -> None:
+        """
+        Record progress for a task, replacing any undrained event for it.
+
+        Pass ``counted=False`` for tasks mirroring another task's transfer,
+        so their bytes stay out of ``bytes_transferred``.
+        """
+        with self._lock:
+            estimator = self._estimators.get(task.task_id)
+            if estimator is None:
+                estimator = self._estimators[task.task_id] = ThroughputEstimator(self.alpha)
+            rate = estimator.update(bytes_done)
+            # The first event of a task only sets its baseline, so bytes
+            # already on disk from an earlier attempt are not counted
+            previous = self._last_seen.get(task.task_id, bytes_done)
+            if counted and bytes_done > previous:
+                self._transferred += bytes_done - previous
+            self._last_seen[task.task_id] = bytes_done
+            total_bytes = total_bytes or task.total_bytes
+            eta = estimator.eta(bytes_done, total_bytes)
+
+            task.bytes_done = bytes_done
+            task.total_bytes = total_bytes
+            task.rate = rate
+            task.eta = eta
+            event = self._pending[task.task_id] = ProgressEvent(
+                task.task_id, bytes_done, total_bytes, rate, eta
+            )
+            subscribers = tuple(self._subscribers)
+        for subscriber in subscribers:
+            subscriber._offer(event)
+
+    def publish_status(self, task: DownloadTask) -> None:
+        """Tell subscribers that a task changed status."""
+        with self._lock:
+            subscribers = tuple(self._subscribers)
+        if subscribers:
+            event = StatusEvent(task.task_id, task.status.value, task.error_message)
+            for subscriber in subscribers:
+                subscriber._offer(event)
+
+    def subscribe(self) -> ProgressSubscription:
+        """Open an independent stream of progress and status events."""
+        subscription = ProgressSubscription(self)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: ProgressSubscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def drain(self) -> List[ProgressEvent]:
+        """Take the latest event of every task updated since the last drain."""
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending.clear()
+        return events
+
+    def forget(self, task: DownloadTask) -> None:
+        """Drop estimator state for a task that has finished."""
+        with self._lock:
+            self._estimators.pop(task.task_id, None)
+            self._last_seen.pop(task.task_id, None)
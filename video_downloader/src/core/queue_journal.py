@@ -0,0 +1,103 @@
+"""
+Crash-safe journal of the download queue.
+
+Every pending, queued, running, retrying or post-processing task has a row
+in the history database's ``download_queue`` table. The row is written in
+the same transaction as the task's status, so a crash or power loss cannot
+lose work the manager had accepted.
+
+Rows are leased by the manager instance holding them, and a heartbeat
+keeps the leases alive. A row whose lease lapses belongs to an instance
+that is gone: the next instance to start claims it and queues the task
+again, in its original queue order. Downloads that were running are
+requeued and resume from their part files. A clean shutdown releases its
+leases so they are claimed at once; after a crash they are claimed once
+the lease runs out.
+"""
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Iterator, Optional
+
+from .download_history import DEFAULT_LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 10.0
+# Journal rows claimed per database round trip while recovering
+RECOVERY_PAGE_SIZE = 200
+
+
+class QueueJournal:
+    """
+    Leases this instance's rows in the queue journal and claims orphaned ones.
+
+    Args:
+        history: DownloadHistory holding the journal; its writes are leased
+                 to this instance from construction on
+        lease_seconds: How long a row stays leased without a heartbeat
+        heartbeat_interval: Seconds between lease renewals
+        page_size: Rows claimed at a time by ``recover``
+    """
+    def __init__(self, history, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL,
+                 page_size: int = RECOVERY_PAGE_SIZE):
+        self.history = history
+        self.owner = uuid.uuid4().hex
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.page_size = page_size
+        history.queue_owner = self.owner
+        history.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start renewing this instance's leases in the background."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._heartbeat, name="queue-journal", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the heartbeat and recovery, and release this instance's leases."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.history.release_queue_leases(self.owner)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not release queue journal leases: {e}")
+
+    def recover(self) -> Iterator[dict]:
+        """
+        Claim and yield orphaned journal rows in queue order, a page at a time.
+
+        Rows still leased by another instance are waited for, so a backlog
+        left by a crash moments ago is recovered once its lease runs out;
+        rows kept alive by a running instance are never taken. Stops when
+        no other instance holds rows, or on ``stop``.
+        """
+        while not self._stop.is_set():
+            rows = self.history.claim_queue_rows(
+                self.owner, time.time() + self.lease_seconds, self.page_size
+            )
+            if rows:
+                yield from rows
+                continue
+            expires = self.history.next_queue_lease_expiry(self.owner)
+            if expires is None:
+                return
+            self._stop.wait(max(expires - time.time(), 0.0) + 0.1)
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.history.renew_queue_leases(self.owner, time.time() + self.lease_seconds)
+            except sqlite3.Error as e:
+                # Missed beats only matter if they outlast the lease
+                logger.warning(f"Could not renew queue journal leases: {e}")
@@ -0,0 +1,181 @@
+"""
+Error classification and backoff for retrying failed downloads.
+
+A failure is classified by walking its exception chain for HTTP status
+codes, ``Retry-After`` headers and the messages platforms use for videos
+that will never download. The classes are:
+
+- transient: network errors, timeouts and 5xx responses; retried with
+  exponential backoff
+- rate-limited: 429, or any response carrying ``Retry-After``; retried
+  after the server's delay, or a longer backoff if it gave none
+- permanent: private, removed, geo-blocked or otherwise unavailable
+  videos and 4xx responses that will not change; never retried
+
+A failure made of several attempts, such as one per backend, arrives as an
+exception group. Each attempt is classified on its own and the download is
+retried if any of them could succeed later: one backend's error must not
+decide for another that failed differently.
+"""
+import random
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Iterator, List, Optional
+
+# Statuses that mean the request itself is wrong or the video is gone
+PERMANENT_STATUSES = frozenset({400, 401, 404, 410, 451})
+RATE_LIMIT_STATUSES = frozenset({429})
+# Lower-cased fragments of yt-dlp and pytube messages for unavailable videos
+PERMANENT_MESSAGES = (
+    "private video",
+    "video unavailable",
+    "has been removed",
+    "account associated with this video has been terminated",
+    "not available in your country",
+    "blocked it in your country",
+    "geo restriction",
+    "copyright",
+    "members-only",
+    "join this channel",
+    "sign in to confirm your age",
+    "unsupported url",
+    "requested format is not available",
+)
+# pytube exceptions for videos that cannot be downloaded
+PERMANENT_EXCEPTIONS = frozenset({
+    "VideoPrivate", "VideoUnavailable", "VideoRegionBlocked", "MembersOnly",
+    "AgeRestrictedError", "RecordingUnavailable",
+})
+_HTTP_STATUS = re.compile(r"\bhttp(?: error)? (\d{3})\b")
+
+
+class ErrorKind(Enum):
+    TRANSIENT = "transient"
+    RATE_LIMITED = "rate_limited"
+    PERMANENT = "permanent"
+
+
+@dataclass(frozen=True)
+class ErrorClassification:
+    kind: ErrorKind
+    # Seconds the server asked to wait before the next request
+    retry_after: Optional[float] = None
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind != ErrorKind.PERMANENT
+
+
+def classify(error: BaseException) -> ErrorClassification:
+    """
+    Classify a download failure.
+
+    Wrappers raised ``from`` another exception defer to their cause, so a
+    downloader's summary message does not mask what actually failed.
+    Unrecognised errors are treated as transient.
+    """
+    statuses = set()
+    retry_after = None
+    texts = []
+    for node in _exception_chain(error):
+        if isinstance(node, BaseExceptionGroup):
+            return _combine([classify(attempt) for attempt in node.exceptions])
+        status = getattr(node, "status", None) or getattr(node, "code", None)
+        if isinstance(status, int) and 100 <= status <= 599:
+            statuses.add(status)
+        if retry_after is None:
+            retry_after = _retry_after(node)
+        if node.__cause__ is None:
+            if type(node).__name__ in PERMANENT_EXCEPTIONS:
+                return ErrorClassification(ErrorKind.PERMANENT)
+            texts.append(str(node).lower())
+
+    text = " ".join(texts)
+    statuses.update(int(code) for code in _HTTP_STATUS.findall(text))
+    if statuses & PERMANENT_STATUSES or any(fragment in text for fragment in PERMANENT_MESSAGES):
+        return ErrorClassification(ErrorKind.PERMANENT)
+    if statuses & RATE_LIMIT_STATUSES or retry_after is not None or "too many requests" in text:
+        return ErrorClassification(ErrorKind.RATE_LIMITED, retry_after)
+    return ErrorClassification(ErrorKind.TRANSIENT)
+
+
+def _combine(attempts: List[ErrorClassification]) -> ErrorClassification:
+    """The outcome of several attempts: retryable if any attempt is."""
+    retryable = [attempt for attempt in attempts if attempt.retryable]
+    if not retryable:
+        return ErrorClassification(ErrorKind.PERMANENT)
+    # A rate limit is the strictest constraint on the next attempt
+    limited = [attempt for attempt in retryable if attempt.kind == ErrorKind.RATE_LIMITED]
+    if limited:
+        return max(limited, key=lambda attempt: attempt.retry_after or 0.0)
+    return retryable[0]
+
+
+def _exception_chain(error: BaseException) -> Iterator[BaseException]:
+    """The error and every exception it was raised from or while handling."""
+    seen = set()
+    node = error
+    while node is not None and id(node) not in seen:
+        seen.add(id(node))
+        yield node
+        # yt-dlp's DownloadError keeps the original exception in exc_info
+        exc_info = getattr(node, "exc_info", None)
+        wrapped = exc_info[1] if isinstance(exc_info, tuple) and len(exc_info) > 1 else None
+        node = node.__cause__ or node.__context__ or wrapped
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header on an HTTP error, if any."""
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    return parse_retry_after(value) if value else None
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """Parse a ``Retry-After`` value given in seconds or as an HTTP date."""
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Delays between attempts of a failed download.
+
+    The n-th retry waits ``base_delay * multiplier ** (n - 1)`` seconds,
+    capped at ``max_delay``, with equal jitter: half the delay is fixed and
+    half random, so retries of tasks that failed together spread out.
+    Rate-limited failures wait at least ``rate_limit_delay``, or the
+    server's ``Retry-After`` up to ``max_retry_after``.
+    """
+    base_delay: float = 5.0
+    multiplier: float = 2.0
+    max_delay: float = 600.0
+    rate_limit_delay: float = 60.0
+    max_retry_after: float = 3600.0
+
+    def delay(self, attempt: int, classification: ErrorClassification) -> float:
+        """Seconds to wait before retry number ``attempt`` (1-based)."""
+        if classification.retry_after is not None:
+            # Honour the server, spreading the herd by up to 10%
+            wait = min(self.max_retry_after, classification.retry_after)
+            return wait + random.uniform(0, wait * 0.1)
+        backoff = min(self.max_delay, self.base_delay * self.multiplier ** max(0, attempt - 1))
+        if classification.kind == ErrorKind.RATE_LIMITED:
+            backoff = max(backoff, self.rate_limit_delay)
+        return backoff / 2 + random.uniform(0, backoff / 2)
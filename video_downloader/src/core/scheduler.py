@@ -0,0 +1,140 @@
+"""
+Single-thread scheduler for downloads due at a future time.
+
+All scheduled tasks share one thread waiting on a min-heap of due times,
+so the thread count stays at one however many downloads are scheduled.
+Due times are persisted as the ``scheduled_time`` of each history row and
+re-armed from the database on startup.
+"""
+import heapq
+import itertools
+import logging
+import threading
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from .download_types import DownloadTask
+
+logger = logging.getLogger(__name__)
+
+
+class CatchUpPolicy(Enum):
+    FIRE = "fire"  # Start jobs whose time passed while the app was not running
+    SKIP = "skip"  # Drop them and report them as missed
+
+
+class DownloadScheduler:
+    """
+    Fires scheduled download tasks at their due time from a single thread.
+
+    Args:
+        fire: Called with each task when it becomes due
+        catch_up: What to do with tasks found overdue on rehydration
+        max_lateness: With ``CatchUpPolicy.FIRE``, tasks overdue by more
+                      than this are skipped instead
+    """
+    def __init__(self, fire: Callable[[DownloadTask], None],
+                 catch_up: CatchUpPolicy = CatchUpPolicy.FIRE,
+                 max_lateness: Optional[timedelta] = None):
+        self.fire = fire
+        self.catch_up = catch_up
+        self.max_lateness = max_lateness
+        self._heap: List[Tuple[datetime, int, DownloadTask]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def schedule(self, task: DownloadTask, when: datetime) -> None:
+        """Arm a task to fire at ``when``."""
+        with self._condition:
+            heapq.heappush(self._heap, (when, next(self._counter), task))
+            self._ensure_thread()
+            # Wake the thread in case the new task is due before the current head
+            self._condition.notify()
+
+    def cancel(self, task: DownloadTask) -> bool:
+        """Disarm a scheduled task. Returns False if it was not scheduled."""
+        return self.cancel_many((task,)) > 0
+
+    def cancel_many(self, tasks: Iterable[DownloadTask]) -> int:
+        """Disarm several tasks in one pass over the heap; returns how many were armed."""
+        task_ids = {task.task_id for task in tasks}
+        with self._condition:
+            remaining = [entry for entry in self._heap if entry[2].task_id not in task_ids]
+            removed = len(self._heap) - len(remaining)
+            if removed:
+                heapq.heapify(remaining)
+                self._heap = remaining
+                self._condition.notify()
+            return removed
+
+    def rehydrate(self, tasks: Iterable[DownloadTask],
+                  now: Optional[datetime] = None) -> List[DownloadTask]:
+        """
+        Re-arm persisted tasks, applying the catch-up policy to overdue ones.
+
+        Returns:
+            list: Overdue tasks that were skipped rather than fired
+        """
+        now = now or datetime.now()
+        skipped = []
+        for task in tasks:
+            due = task.scheduled_time or now
+            overdue = now - due
+            if overdue > timedelta(0):
+                too_late = self.max_lateness is not None and overdue > self.max_lateness
+                if self.catch_up == CatchUpPolicy.SKIP or too_late:
+                    skipped.append(task)
+                    continue
+            self.schedule(task, due)
+        return skipped
+
+    def stop(self) -> None:
+        """Stop the scheduler thread; pending tasks stay persisted."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _ensure_thread(self) -> None:
+        """Start the scheduler thread on first use. Caller holds the condition."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._run, name="download-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                due = self._next_due()
+                while due is None and not self._stopped:
+                    self._condition.wait(self._wait_time())
+                    due = self._next_due()
+                if self._stopped:
+                    return
+
+            try:
+                self.fire(due)
+            except Exception as e:
+                logger.error(f"Scheduled download {due.url} failed to start: {e}")
+
+    def _next_due(self) -> Optional[DownloadTask]:
+        """Pop the head task if it is due. Caller holds the condition."""
+        if self._heap and self._heap[0][0] <= datetime.now():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def _wait_time(self) -> Optional[float]:
+        """Seconds until the head task is due, or None to wait for a notify."""
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - datetime.now()).total_seconds())
@@ -0,0 +1,426 @@
+"""
+Multi-connection segmented HTTP transfer engine.
+
+Splits a remote file into byte ranges, fetches them over several connections
+at once and writes each range straight into its offset of the output file.
+Servers that do not honour Range requests are fetched as a single stream.
+
+Data is written to ``<destination>.part`` and only renamed into place once
+complete. When a checkpoint store is configured, completed byte ranges and
+the remote validators are recorded so an interrupted transfer resumes with
+just the missing ranges.
+
+A cancellation token stops every connection after its current chunk; the
+part file and a final checkpoint are kept, so a paused transfer resumes.
+"""
+import math
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .download_types import CancellationToken
+
+DEFAULT_CONNECTIONS = 4
+MIN_SEGMENT_SIZE = 1024 * 1024
+SEGMENTS_PER_CONNECTION = 4
+CHUNK_SIZE = 64 * 1024
+ProgressCallback = Callable[[int, Optional[int]], None]
+# Receives a byte count and returns the seconds to wait (see bandwidth.py)
+Throttle = Callable[[int], float]
+CHECKPOINT_INTERVAL = 2.0
+PART_SUFFIX = ".part"
+USER_AGENT = "Mozilla/5.0 (video_downloader)"
+
+
+class TransferError(Exception):
+    """Raised when a remote file cannot be transferred."""
+
+
+class HTTPStatusError(TransferError):
+    """Raised when a server answers with an error status; keeps its headers."""
+    def __init__(self, status: int, url: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.headers = headers or {}
+
+
+@dataclass
+class RemoteFile:
+    url: str
+    size: Optional[int]
+    accepts_ranges: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def validator(self) -> Optional[str]:
+        """Value for an If-Range header, preferring the strong ETag."""
+        if self.etag and not self.etag.startswith("W/"):
+            return self.etag
+        return self.last_modified
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent inclusive byte ranges."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(size: int, done: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Return the inclusive byte ranges of a file not covered by ``done``."""
+    gaps = []
+    position = 0
+    for start, end in merge_ranges(done):
+        if start > position:
+            gaps.append((position, start - 1))
+        position = max(position, end + 1)
+    if position < size:
+        gaps.append((position, size - 1))
+    return gaps
+
+
+def _wait(throttle: Optional[Throttle], amount: int,
+          cancel: Optional[CancellationToken] = None) -> None:
+    """Charge a chunk to the bandwidth limiter and sleep off any debt."""
+    if throttle is not None:
+        delay = throttle(amount)
+        if delay > 0:
+            if cancel is None:
+                time.sleep(delay)
+            else:
+                cancel.wait(delay)
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+
+
+class _TransferState:
+    """Tracks which byte ranges of a part file have been written."""
+    def __init__(self, part_path: str, remote: RemoteFile, done: List[Tuple[int, int]],
+                 checkpoint_store=None, progress: Optional[ProgressCallback] = None):
+        self.part_path = part_path
+        self.remote = remote
+        self.done = merge_ranges(done)
+        self.in_flight: Dict[int, int] = {}
+        self.bytes_done = sum(end - start + 1 for start, end in self.done)
+        self.checkpoint_store = checkpoint_store
+        self.progress = progress
+        self._lock = threading.Lock()
+        self._last_saved = time.monotonic()
+
+    def advance(self, start: int, written: int) -> None:
+        """Record that ``written`` bytes from ``start`` are on disk."""
+        with self._lock:
+            self.bytes_done += written - self.in_flight.get(start, 0)
+            self.in_flight[start] = written
+            bytes_done = self.bytes_done
+            if time.monotonic() - self._last_saved >= CHECKPOINT_INTERVAL:
+                self._save()
+        if self.progress is not None:
+            self.progress(bytes_done, self.remote.size)
+
+    def complete(self, start: int, end: int) -> None:
+        """Record that a whole segment is on disk."""
+        with self._lock:
+            self.in_flight.pop(start, None)
+            self.done = merge_ranges(self.done + [(start, end)])
+            self._save()
+
+    def checkpoint(self) -> None:
+        """Save the ranges on disk now, e.g. when the transfer is interrupted."""
+        with self._lock:
+            self._save()
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        """All ranges on disk, including partially written segments."""
+        partial = [
+            (start, start + written - 1)
+            for start, written in self.in_flight.items() if written
+        ]
+        return merge_ranges(self.done + partial)
+
+    def _save(self) -> None:
+        self._last_saved = time.monotonic()
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.save_checkpoint(
+                self.part_path,
+                url=self.remote.url,
+                size=self.remote.size,
+                etag=self.remote.etag,
+                last_modified=self.remote.last_modified,
+                ranges=self.ranges()
+            )
+
+
+class SegmentedTransfer:
+    """
+    Downloads a URL into a file using parallel byte-range requests.
+
+    ``checkpoint_store`` is any object providing ``load_checkpoint``,
+    ``save_checkpoint`` and ``clear_checkpoint`` (see ``DownloadHistory``).
+    """
+    def __init__(self, connections: int = DEFAULT_CONNECTIONS,
+                 min_segment_size: int = MIN_SEGMENT_SIZE,
+                 timeout: float = 30.0,
+                 headers: Optional[Dict[str, str]] = None,
+                 checkpoint_store=None):
+        self.connections = max(1, connections)
+        self.min_segment_size = min_segment_size
+        self.timeout = timeout
+        self.headers = {"User-Agent": USER_AGENT}
+        self.headers.update(headers or {})
+        self.checkpoint_store = checkpoint_store
+
+    def probe(self, url: str, headers: Optional[Dict[str, str]] = None) -> RemoteFile:
+        """Find out the size, validators and range support of a remote file."""
+        request = self._request(url, headers, {"Range": "bytes=0-0"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if response.status == 206:
+                content_range = response.headers.get("Content-Range", "")
+                total = content_range.rpartition("/")[2]
+                size = int(total) if total.isdigit() else None
+                return RemoteFile(response.url, size, size is not None, etag, last_modified)
+
+            length = response.headers.get("Content-Length")
+            return RemoteFile(
+                response.url,
+                int(length) if length and length.isdigit() else None,
+                False,
+                etag,
+                last_modified
+            )
+
+    def download(self, url: str, destination: str,
+                 connections: Optional[int] = None,
+                 headers: Optional[Dict[str, str]] = None,
+                 progress: Optional[ProgressCallback] = None,
+                 throttle: Optional[Throttle] = None,
+                 cancel: Optional[CancellationToken] = None) -> str:
+        """
+        Download a URL to a destination file, resuming a previous attempt.
+
+        Args:
+            url (str): Direct media URL
+            destination (str): Path of the file to write
+            connections (int, optional): Parallel connections for this file
+            headers (dict, optional): Extra request headers
+            progress (callable, optional): Called with (bytes_done, total_bytes)
+                                           from the transfer threads
+            throttle (callable, optional): Bandwidth limiter charged for
+                                           every chunk received
+            cancel (CancellationToken, optional): Stops the transfer after
+                                                  the current chunk
+
+        Returns:
+            str: Path to the downloaded file
+
+        Raises:
+            TransferError: If the server response is unusable
+            DownloadCancelled: If ``cancel`` was set; the part file is kept
+        """
+        connections = max(1, connections or self.connections)
+        part_path = destination + PART_SUFFIX
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        remote = self.probe(url, headers)
+
+        if not remote.accepts_ranges or not remote.size:
+            self._fetch_single(remote, part_path, headers, progress, throttle, cancel)
+            os.replace(part_path, destination)
+            self._discard_checkpoint(part_path)
+            return destination
+
+        done = self._resume_point(part_path, remote)
+        if not done:
+            with open(part_path, "wb") as output:
+                output.truncate(remote.size)
+
+        state = _TransferState(part_path, remote, done, self.checkpoint_store, progress)
+        segments = self._plan_segments(remote.size, connections, done)
+        if segments:
+            try:
+                with ThreadPoolExecutor(max_workers=min(connections, len(segments))) as pool:
+                    futures = [
+                        pool.submit(self._fetch_segment, remote, part_path, start, end,
+                                    headers, state, throttle, cancel)
+                        for start, end in segments
+                    ]
+                    for future in futures:
+                        future.result()
+            except BaseException:
+                # Keep the bytes fetched since the last periodic checkpoint
+                state.checkpoint()
+                raise
+
+        os.replace(part_path, destination)
+        self._discard_checkpoint(part_path)
+        return destination
+
+    def _resume_point(self, part_path: str, remote: RemoteFile) -> List[Tuple[int, int]]:
+        """Return the ranges already on disk if the part file is still valid."""
+        if self.checkpoint_store is None or not os.path.exists(part_path):
+            return []
+
+        checkpoint = self.checkpoint_store.load_checkpoint(part_path)
+        if not checkpoint:
+            return []
+
+        unchanged = (
+            checkpoint["size"] == remote.size
+            and os.path.getsize(part_path) == remote.size
+            and checkpoint["etag"] == remote.etag
+            and checkpoint["last_modified"] == remote.last_modified
+        )
+        if not unchanged:
+            self._discard_checkpoint(part_path)
+            return []
+
+        return [tuple(r) for r in checkpoint["ranges"]]
+
+    def _discard_checkpoint(self, part_path: str) -> None:
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.clear_checkpoint(part_path)
+
+    def _plan_segments(self, size: int, connections: int,
+                       done: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[int, int]]:
+        """Split the missing part of a file into inclusive byte ranges."""
+        count = min(
+            connections * SEGMENTS_PER_CONNECTION,
+            max(1, math.ceil(size / self.min_segment_size))
+        )
+        segment_size = math.ceil(size / count)
+        return [
+            (start, min(start + segment_size - 1, gap_end))
+            for gap_start, gap_end in missing_ranges(size, done or [])
+            for start in range(gap_start, gap_end + 1, segment_size)
+        ]
+
+    def _fetch_segment(self, remote: RemoteFile, part_path: str, start: int, end: int,
+                       headers: Optional[Dict[str, str]], state: _TransferState,
+                       throttle: Optional[Throttle] = None,
+                       cancel: Optional[CancellationToken] = None) -> None:
+        """Fetch one byte range and write it at its offset in the part file."""
+        if cancel is not None:
+            # Segments still waiting for a connection never start
+            cancel.raise_if_cancelled()
+        extra = {"Range": f"bytes={start}-{end}"}
+        if remote.validator:
+            extra["If-Range"] = remote.validator
+        request = self._request(remote.url, headers, extra)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status != 206:
+                raise TransferError(
+                    f"Server ignored range request for bytes {start}-{end}; "
+                    "the remote file may have changed"
+                )
+            content_range = response.headers.get("Content-Range", "")
+            if not content_range.startswith(f"bytes {start}-"):
+                raise TransferError(f"Unexpected Content-Range: {content_range!r}")
+
+            with open(part_path, "r+b") as output:
+                output.seek(start)
+                written = 0
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = response.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise TransferError(f"Connection closed early for bytes {start}-{end}")
+                    output.write(chunk)
+                    output.flush()
+                    written += len(chunk)
+                    remaining -= len(chunk)
+                    state.advance(start, written)
+                    _wait(throttle, len(chunk), cancel)
+
+        state.complete(start, end)
+
+    def _fetch_single(self, remote: RemoteFile, part_path: str,
+                      headers: Optional[Dict[str, str]],
+                      progress: Optional[ProgressCallback] = None,
+                      throttle: Optional[Throttle] = None,
+                      cancel: Optional[CancellationToken] = None) -> None:
+        """
+        Fetch a URL as one sequential stream.
+
+        A checkpointed prefix of the part file is kept when the server
+        answers a Range request for the rest; otherwise the whole body is
+        fetched again. A body shorter than the announced size is an error.
+        """
+        offset = self._single_resume_point(part_path, remote)
+        extra = {}
+        if offset:
+            extra["Range"] = f"bytes={offset}-"
+            if remote.validator:
+                extra["If-Range"] = remote.validator
+        request = self._request(remote.url, headers, extra)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            content_range = response.headers.get("Content-Range", "")
+            if offset and not (response.status == 206
+                               and content_range.startswith(f"bytes {offset}-")):
+                offset = 0
+            done = [(0, offset - 1)] if offset else []
+            # Checkpoints need the size to tell a finished file from a cut one
+            store = self.checkpoint_store if remote.size else None
+            state = _TransferState(part_path, remote, done, store, progress)
+            with open(part_path, "r+b" if offset else "wb") as output:
+                output.seek(offset)
+                output.truncate()
+                written = 0
+                try:
+                    while True:
+                        chunk = response.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        output.write(chunk)
+                        output.flush()
+                        written += len(chunk)
+                        state.advance(offset, written)
+                        _wait(throttle, len(chunk), cancel)
+                    if remote.size is not None and offset + written != remote.size:
+                        raise TransferError(
+                            f"Connection closed after {offset + written} of "
+                            f"{remote.size} bytes"
+                        )
+                except BaseException:
+                    state.checkpoint()
+                    raise
+
+    def _single_resume_point(self, part_path: str, remote: RemoteFile) -> int:
+        """Return how many leading bytes of a streamed part file can be kept."""
+        if self.checkpoint_store is None or not remote.size or not os.path.exists(part_path):
+            return 0
+        checkpoint = self.checkpoint_store.load_checkpoint(part_path)
+        if not checkpoint:
+            return 0
+
+        ranges = checkpoint["ranges"]
+        offset = ranges[0][1] + 1 if ranges and ranges[0][0] == 0 else 0
+        usable = (
+            offset
+            and checkpoint["size"] == remote.size
+            and checkpoint["etag"] == remote.etag
+            and checkpoint["last_modified"] == remote.last_modified
+            and os.path.getsize(part_path) >= offset
+        )
+        if not usable:
+            self._discard_checkpoint(part_path)
+            return 0
+        return offset
+
+    def _request(self, url: str, headers: Optional[Dict[str, str]],
+                 extra: Optional[Dict[str, str]] = None) -> urllib.request.Request:
+        """Build a request carrying the default, caller and extra headers."""
+        merged = dict(self.headers)
+        merged.update(headers or {})
+        merged.update(extra or {})
+        return urllib.request.Request(url, headers=merged)
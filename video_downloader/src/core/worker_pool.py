@@ -0,0 +1,127 @@
+"""
+Thread pool whose size can be changed while it is running.
+
+``concurrent.futures.ThreadPoolExecutor`` fixes ``max_workers`` at
+construction, so raising the download limit later has no effect. This pool
+starts threads on demand up to its current size; when the size is lowered,
+surplus workers exit after finishing the job they are running.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+IDLE_TIMEOUT = 30.0
+
+
+class ResizableWorkerPool:
+    """
+    Runs submitted callables on up to ``max_workers`` threads.
+
+    Idle workers exit after ``idle_timeout`` seconds, so a pool sized for a
+    burst does not keep its threads forever.
+    """
+    def __init__(self, max_workers: int, name: str = "download",
+                 idle_timeout: float = IDLE_TIMEOUT):
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self._max_workers = max(1, max_workers)
+        self._jobs: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._idle = 0
+        self._counter = 0
+        self._threads = set()
+        self._shutdown = False
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def worker_count(self) -> int:
+        """Threads currently alive in the pool."""
+        with self._lock:
+            return self._workers
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule ``fn(*args, **kwargs)`` and return a future for its result."""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit to a pool that has been shut down")
+            self._jobs.put((future, fn, args, kwargs))
+            if self._idle == 0 and self._workers < self._max_workers:
+                self._spawn()
+        return future
+
+    def resize(self, max_workers: int) -> None:
+        """Change the number of threads allowed to run jobs at once."""
+        with self._lock:
+            self._max_workers = max(1, max_workers)
+            # Start threads for jobs that were waiting on the old limit
+            backlog = self._jobs.qsize() - self._idle
+            while backlog > 0 and self._workers < self._max_workers:
+                self._spawn()
+                backlog -= 1
+            # Wake idle threads so the surplus notices the lower limit
+            for _ in range(max(0, self._workers - self._max_workers)):
+                self._jobs.put(None)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop accepting jobs; running and queued jobs still complete."""
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._jobs.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _spawn(self) -> None:
+        """Start one worker thread. Callers must hold the lock."""
+        self._workers += 1
+        self._counter += 1
+        thread = threading.Thread(
+            target=self._work, name=f"{self.name}-worker-{self._counter}", daemon=True
+        )
+        self._threads.add(thread)
+        thread.start()
+
+    def _retire(self) -> None:
+        """Remove the calling worker from the pool. Callers must hold the lock."""
+        self._workers -= 1
+        self._threads.discard(threading.current_thread())
+
+    def _work(self) -> None:
+        """Run jobs until the pool shrinks, shuts down or stays idle."""
+        while True:
+            with self._lock:
+                if self._workers > self._max_workers:
+                    self._retire()
+                    return
+                self._idle += 1
+            try:
+                job = self._jobs.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                job = None
+            with self._lock:
+                self._idle -= 1
+                if job is None and self._jobs.empty():
+                    self._retire()
+                    return
+            if job is None:
+                continue
+
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                logger.exception("Worker job failed")
+                future.set_exception(e)
@@ -17,7 +17,12 @@ def main():
     """
     Main entry point for the video downloader application.
     Initializes and runs the GUI with comprehensive error handling.
+    With --headless, runs the command-line downloader instead, without Tk.
     """
+    if "--headless" in sys.argv[1:]:
+        from .cli import main as headless_main
+        sys.exit(headless_main([arg for arg in sys.argv[1:] if arg != "--headless"]))
+
     try:
         # Print Python path for debugging
         logger.debug(f"Python Path: {sys.path}")
@@ -2,15 +2,65 @@
 Download manager frame for the video downloader GUI.
 """
 import tkinter as tk
+from tkinter import messagebox
 from datetime import datetime, timedelta
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from ttkbootstrap.scrolled import ScrolledFrame
-from ttkbootstrap.dialogs import Dialog
 
 from ..core.download_manager import DownloadManager
 from ..core.download_types import DownloadTask, DownloadStatus
 
+# Progress events are drained from the bus once per frame
+PROGRESS_FRAME_MS = 100
+# How often the manager's snapshot version is checked for changes
+REFRESH_INTERVAL_MS = 250
+
+# Tabs as (snapshot attribute, title, ((column, heading, width), ...))
+TABS = (
+    ("active", "Active", (
+        ("platform", "Platform", 90), ("url", "URL", 260), ("progress", "Progress", 240)
+    )),
+    ("queued", "Queued", (
+        ("platform", "Platform", 90), ("url", "URL", 260)
+    )),
+    ("scheduled", "Scheduled", (
+        ("time", "Scheduled For", 140), ("platform", "Platform", 90), ("url", "URL", 260)
+    )),
+    ("paused", "Paused", (
+        ("platform", "Platform", 90), ("url", "URL", 260), ("progress", "Downloaded", 240)
+    )),
+    ("completed", "Completed", (
+        ("platform", "Platform", 90), ("url", "URL", 260)
+    )),
+    ("failed", "Failed", (
+        ("platform", "Platform", 90), ("url", "URL", 260), ("error", "Error", 240)
+    )),
+)
+
+def _format_progress(bytes_done, total_bytes, rate, eta):
+    """Format a human readable progress line."""
+    def size(value):
+        for unit in ("B", "KB", "MB", "GB"):
+            if value < 1024 or unit == "GB":
+                return f"{value:.1f} {unit}"
+            value /= 1024
+
+    text = size(bytes_done)
+    if total_bytes:
+        text = f"{min(100, bytes_done * 100 // total_bytes)}% {text} / {size(total_bytes)}"
+    if rate:
+        text += f" at {size(rate)}/s"
+    if eta is not None:
+        minutes, seconds = divmod(int(eta), 60)
+        text += f", {minutes}:{seconds:02d} left"
+    return text
+
+def _format_time(value):
+    """Format a scheduled time that may come back from the database as text."""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value or "")
+
 class DownloadManagerFrame(ttk.LabelFrame):
     def __init__(self, master, download_manager: DownloadManager):
         super().__init__(
@@ -19,8 +69,13 @@ class DownloadManagerFrame(ttk.LabelFrame):
             padding=10
         )
         self.download_manager = download_manager
+        # Last applied snapshot version, rendered row values and tasks by id
+        self._version = None
+        self._rows = {key: {} for key, _, _ in TABS}
+        self._tasks = {}
         self._create_widgets()
         self._setup_auto_refresh()
+        self._poll_progress()
 
     def _create_widgets(self):
         # Settings section
@@ -32,15 +87,44 @@ class DownloadManagerFrame(ttk.LabelFrame):
         concurrent_frame.pack(fill=X, pady=5)
         ttk.Label(concurrent_frame, text="Max Concurrent Downloads:").pack(side=LEFT)
         self.concurrent_var = tk.StringVar(value=str(self.download_manager.max_concurrent))
-        concurrent_spinbox = ttk.Spinbox(
+        self.concurrent_spinbox = ttk.Spinbox(
             concurrent_frame,
             from_=1,
-            to=10,
+            to=self.download_manager.max_concurrent_limit,
             width=5,
             textvariable=self.concurrent_var,
             command=self._update_concurrent_limit
         )
-        concurrent_spinbox.pack(side=RIGHT)
+        self.concurrent_spinbox.pack(side=RIGHT)
+
+        # Let the manager tune the limit from measured throughput
+        self.auto_concurrent_var = tk.BooleanVar(value=self.download_manager.auto_concurrency)
+        ttk.Checkbutton(
+            concurrent_frame,
+            text="Auto",
+            variable=self.auto_concurrent_var,
+            command=self._toggle_auto_concurrency,
+            bootstyle="round-toggle"
+        ).pack(side=RIGHT, padx=10)
+        self._sync_concurrency_widgets()
+
+        # Global bandwidth cap
+        bandwidth_frame = ttk.Frame(settings_frame)
+        bandwidth_frame.pack(fill=X, pady=5)
+        ttk.Label(bandwidth_frame, text="Max Bandwidth (MB/s, 0 = unlimited):").pack(side=LEFT)
+        global_rate = self.download_manager.bandwidth.global_rate or 0
+        self.bandwidth_var = tk.StringVar(value=f"{global_rate / 1e6:g}")
+        bandwidth_spinbox = ttk.Spinbox(
+            bandwidth_frame,
+            from_=0,
+            to=1000,
+            increment=0.5,
+            width=5,
+            textvariable=self.bandwidth_var,
+            command=self._update_bandwidth_limit
+        )
+        bandwidth_spinbox.pack(side=RIGHT)
+        bandwidth_spinbox.bind("<Return>", lambda event: self._update_bandwidth_limit())
 
         # Downloads list
         list_frame = ttk.Frame(self)
@@ -50,36 +134,28 @@ class DownloadManagerFrame(ttk.LabelFrame):
         self.notebook = ttk.Notebook(list_frame)
         self.notebook.pack(fill=BOTH, expand=YES)
 
-        # Create tab containers and scrolled frames
-        # Active downloads tab
-        active_container = ttk.Frame(self.notebook)
-        self.active_frame = ScrolledFrame(active_container, autohide=True)
-        self.active_frame.pack(fill=BOTH, expand=YES)
-        self.notebook.add(active_container, text="Active")
-
-        # Queued downloads tab
-        queued_container = ttk.Frame(self.notebook)
-        self.queued_frame = ScrolledFrame(queued_container, autohide=True)
-        self.queued_frame.pack(fill=BOTH, expand=YES)
-        self.notebook.add(queued_container, text="Queued")
-
-        # Scheduled downloads tab
-        scheduled_container = ttk.Frame(self.notebook)
-        self.scheduled_frame = ScrolledFrame(scheduled_container, autohide=True)
-        self.scheduled_frame.pack(fill=BOTH, expand=YES)
-        self.notebook.add(scheduled_container, text="Scheduled")
-
-        # Completed downloads tab
-        completed_container = ttk.Frame(self.notebook)
-        self.completed_frame = ScrolledFrame(completed_container, autohide=True)
-        self.completed_frame.pack(fill=BOTH, expand=YES)
-        self.notebook.add(completed_container, text="Completed")
-
-        # Failed downloads tab
-        failed_container = ttk.Frame(self.notebook)
-        self.failed_frame = ScrolledFrame(failed_container, autohide=True)
-        self.failed_frame.pack(fill=BOTH, expand=YES)
-        self.notebook.add(failed_container, text="Failed")
+        # One Treeview per tab: rows are items, not widgets, so only the
+        # visible part of a long list costs anything to draw
+        self.trees = {}
+        for key, title, columns in TABS:
+            container = ttk.Frame(self.notebook)
+            tree = ttk.Treeview(
+                container,
+                columns=[column for column, _, _ in columns],
+                show="headings",
+                selectmode="extended"
+            )
+            for column, heading, width in columns:
+                tree.heading(column, text=heading)
+                tree.column(column, width=width, stretch=(column == "url"))
+
+            scrollbar = ttk.Scrollbar(container, orient=VERTICAL, command=tree.yview)
+            tree.configure(yscrollcommand=scrollbar.set)
+            scrollbar.pack(side=RIGHT, fill=Y)
+            tree.pack(fill=BOTH, expand=YES)
+
+            self.notebook.add(container, text=title)
+            self.trees[key] = tree
 
         # Action buttons
         button_frame = ttk.Frame(self)
@@ -94,105 +170,207 @@ class DownloadManagerFrame(ttk.LabelFrame):
         )
         self.retry_btn.pack(side=LEFT, padx=5)
 
-    def _setup_auto_refresh(self):
-        """Setup automatic refresh of download status."""
-        self._refresh_status()
-        self.after(1000, self._setup_auto_refresh)
+        # Actions on the downloads selected in the visible tab
+        self.pause_btn = ttk.Button(
+            button_frame,
+            text="Pause Selected",
+            command=self._pause_selected,
+            bootstyle=(SECONDARY, OUTLINE)
+        )
+        self.pause_btn.pack(side=LEFT, padx=5)
 
-    def _refresh_status(self):
-        """Refresh all download status displays."""
-        self._update_download_list(
-            self.active_frame,
-            self.download_manager.active_downloads.values(),
-            show_progress=True
+        self.resume_btn = ttk.Button(
+            button_frame,
+            text="Resume Selected",
+            command=self._resume_selected,
+            bootstyle=(SUCCESS, OUTLINE)
         )
-        self._update_download_list(
-            self.queued_frame,
-            [task for task in self.download_manager.download_queue.queue],
-            show_cancel=True
+        self.resume_btn.pack(side=LEFT, padx=5)
+
+        self.cancel_btn = ttk.Button(
+            button_frame,
+            text="Cancel Selected",
+            command=self._cancel_selected,
+            bootstyle=(DANGER, OUTLINE)
         )
-        self._update_download_list(
-            self.scheduled_frame,
-            self.download_manager.scheduled_downloads,
-            show_time=True
+        self.cancel_btn.pack(side=LEFT, padx=5)
+
+        # Actions on the whole batch
+        self.cancel_all_btn = ttk.Button(
+            button_frame,
+            text="Cancel All",
+            command=self._cancel_all,
+            bootstyle=DANGER
         )
-        self._update_download_list(
-            self.completed_frame,
-            self.download_manager.completed_downloads[-50:],  # Show last 50
-            show_time=True
+        self.cancel_all_btn.pack(side=RIGHT, padx=5)
+
+        self.resume_all_btn = ttk.Button(
+            button_frame,
+            text="Resume All",
+            command=self.download_manager.resume_all,
+            bootstyle=SUCCESS
         )
-        self._update_download_list(
-            self.failed_frame,
-            self.download_manager.failed_downloads,
-            show_error=True
+        self.resume_all_btn.pack(side=RIGHT, padx=5)
+
+        self.pause_all_btn = ttk.Button(
+            button_frame,
+            text="Pause All",
+            command=self.download_manager.pause_all,
+            bootstyle=SECONDARY
         )
+        self.pause_all_btn.pack(side=RIGHT, padx=5)
 
-        # Update tab text with counts
-        self.notebook.tab(0, text=f"Active ({len(self.download_manager.active_downloads)})")
-        self.notebook.tab(1, text=f"Queued ({self.download_manager.download_queue.qsize()})")
-        self.notebook.tab(2, text=f"Scheduled ({len(self.download_manager.scheduled_downloads)})")
-        self.notebook.tab(3, text=f"Completed ({len(self.download_manager.completed_downloads)})")
-        self.notebook.tab(4, text=f"Failed ({len(self.download_manager.failed_downloads)})")
-
-    def _update_download_list(self, frame, tasks, show_progress=False, 
-                            show_cancel=False, show_time=False, show_error=False):
-        """Update a specific download list frame."""
-        # Clear existing widgets
-        for widget in frame.winfo_children():
-            widget.destroy()
-
-        # Add new task widgets
-        for task in tasks:
-            task_frame = ttk.Frame(frame)
-            task_frame.pack(fill=X, pady=2, padx=5)
-
-            # Basic info
-            info_text = f"{task.platform or 'Unknown'}: {task.url}"
-            if show_time and task.scheduled_time:
-                info_text = f"{task.scheduled_time.strftime('%Y-%m-%d %H:%M:%S')} - {info_text}"
-            if show_error and task.error_message:
-                info_text = f"{info_text}\nError: {task.error_message}"
-
-            ttk.Label(
-                task_frame,
-                text=info_text,
-                wraplength=400
-            ).pack(side=LEFT, expand=YES, fill=X)
-
-            # Progress bar for active downloads
-            if show_progress:
-                progress = ttk.Progressbar(
-                    task_frame,
-                    length=100,
-                    mode='determinate',
-                    bootstyle=SUCCESS
-                )
-                progress.pack(side=LEFT, padx=5)
-                # TODO: Update progress value when implemented
-
-            # Cancel button for queued downloads
-            if show_cancel:
-                ttk.Button(
-                    task_frame,
-                    text="Cancel",
-                    command=lambda t=task: self._cancel_download(t),
-                    bootstyle=(DANGER, OUTLINE)
-                ).pack(side=RIGHT, padx=5)
+    def _setup_auto_refresh(self):
+        """Setup automatic refresh of download status."""
+        self._refresh_status()
+        self.after(REFRESH_INTERVAL_MS, self._setup_auto_refresh)
+
+    def _refresh_status(self):
+        """Apply the manager's snapshot if it changed since the last refresh."""
+        if self.download_manager.version == self._version:
+            return
+
+        snapshot = self.download_manager.snapshot()
+        self._version = snapshot.version
+        if self.auto_concurrent_var.get():
+            # Show the limit the controller picked
+            self.concurrent_var.set(str(self.download_manager.max_concurrent))
+        self._tasks = {}
+
+        for index, (key, title, _) in enumerate(TABS):
+            tasks = getattr(snapshot, key)
+            rows = {task.task_id: self._row_values(key, task) for task in tasks}
+            self._apply_rows(key, rows)
+            self._tasks.update((task.task_id, task) for task in tasks)
+
+            # Update tab text with counts
+            self.notebook.tab(index, text=f"{title} ({len(rows)})")
+
+    def _row_values(self, key, task: DownloadTask):
+        """Column values of a task's row in the given tab."""
+        platform = task.platform or 'Unknown'
+        if key == "active":
+            if task.status == DownloadStatus.PROCESSING:
+                return (platform, task.url, "Processing")
+            if task.status == DownloadStatus.PAUSED:
+                # The transfer stops at its next chunk
+                return (platform, task.url, "Pausing")
+            if task.status == DownloadStatus.CANCELLED:
+                return (platform, task.url, "Cancelling")
+            progress = _format_progress(task.bytes_done, task.total_bytes, task.rate, task.eta)
+            return (platform, task.url, progress)
+        if key == "scheduled":
+            # Retries waiting out a backoff are listed with their next attempt
+            return (_format_time(task.retry_at or task.scheduled_time), platform, task.url)
+        if key == "paused":
+            return (platform, task.url, _format_progress(task.bytes_done, task.total_bytes, 0, None))
+        if key == "failed":
+            return (platform, task.url, task.error_message or "")
+        return (platform, task.url)
+
+    def _apply_rows(self, key, rows):
+        """Insert, update, remove and reorder rows so the tab matches ``rows``."""
+        tree = self.trees[key]
+        rendered = self._rows[key]
+
+        stale = [iid for iid in rendered if iid not in rows]
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                del rendered[iid]
+
+        for iid, values in rows.items():
+            if iid not in rendered:
+                tree.insert("", END, iid=iid, values=values)
+            elif rendered[iid] != values:
+                tree.item(iid, values=values)
+            rendered[iid] = values
+
+        order = list(rows)
+        if list(tree.get_children()) != order:
+            for index, iid in enumerate(order):
+                tree.move(iid, "", index)
+
+    def _poll_progress(self):
+        """Apply the latest coalesced progress event of each active task."""
+        for event in self.download_manager.progress_bus.drain():
+            self._set_progress(
+                event.task_id, event.bytes_done, event.total_bytes, event.rate, event.eta
+            )
+        self.after(PROGRESS_FRAME_MS, self._poll_progress)
+
+    def _set_progress(self, task_id, bytes_done, total_bytes, rate, eta):
+        """Update the progress column of an active task, if it is displayed."""
+        rendered = self._rows["active"]
+        if task_id not in rendered or rendered[task_id][2] in ("Pausing", "Cancelling"):
+            return
+        text = _format_progress(bytes_done, total_bytes, rate, eta)
+        self.trees["active"].set(task_id, "progress", text)
+        rendered[task_id] = rendered[task_id][:2] + (text,)
 
     def _update_concurrent_limit(self):
         """Update the maximum concurrent downloads limit."""
         try:
             new_limit = int(self.concurrent_var.get())
-            if 1 <= new_limit <= 10:
-                self.download_manager.max_concurrent = new_limit
+            if 1 <= new_limit <= self.download_manager.max_concurrent_limit:
+                self.download_manager.set_max_concurrent(new_limit)
         except ValueError:
             self.concurrent_var.set(str(self.download_manager.max_concurrent))
 
+    def _update_bandwidth_limit(self):
+        """Apply the global bandwidth cap to running and future downloads."""
+        try:
+            megabytes = float(self.bandwidth_var.get())
+        except ValueError:
+            megabytes = -1
+        if megabytes < 0:
+            global_rate = self.download_manager.bandwidth.global_rate or 0
+            self.bandwidth_var.set(f"{global_rate / 1e6:g}")
+            return
+        self.download_manager.bandwidth.set_global_rate(megabytes * 1e6 or None)
+
+    def _toggle_auto_concurrency(self):
+        """Switch between a manual and a throughput-tuned concurrency limit."""
+        enabled = self.auto_concurrent_var.get()
+        self.download_manager.set_auto_concurrency(enabled)
+        if not enabled:
+            self._update_concurrent_limit()
+        self._sync_concurrency_widgets()
+
+    def _sync_concurrency_widgets(self):
+        """Disable manual editing of the limit while it is tuned automatically."""
+        state = DISABLED if self.auto_concurrent_var.get() else NORMAL
+        self.concurrent_spinbox.configure(state=state)
+
     def _retry_failed(self):
         """Retry all failed downloads."""
         self.download_manager.retry_failed()
 
+    def _selected_tasks(self):
+        """Tasks selected in the visible tab."""
+        key = TABS[self.notebook.index(self.notebook.select())][0]
+        return [self._tasks[iid] for iid in self.trees[key].selection() if iid in self._tasks]
+
+    def _pause_selected(self):
+        """Pause the selected downloads, keeping their partial files."""
+        for task in self._selected_tasks():
+            self.download_manager.pause_download(task.task_id)
+
+    def _resume_selected(self):
+        """Queue the selected paused downloads again."""
+        for task in self._selected_tasks():
+            self.download_manager.resume_download(task.task_id)
+
+    def _cancel_selected(self):
+        """Cancel the downloads selected in the visible tab."""
+        for task in self._selected_tasks():
+            self._cancel_download(task)
+
     def _cancel_download(self, task: DownloadTask):
-        """Cancel a queued download."""
-        # TODO: Implement download cancellation
-        pass
+        """Cancel a scheduled, queued, paused or running download."""
+        self.download_manager.cancel_download(task.task_id)
+
+    def _cancel_all(self):
+        """Cancel every unfinished download after confirmation."""
+        if messagebox.askyesno("Cancel All", "Cancel every unfinished download?"):
+            self.download_manager.cancel_all()
@@ -12,10 +12,11 @@ from ttkbootstrap.constants import *
 from ttkbootstrap.style import Style
 from tkinter import messagebox, filedialog, Text, END, StringVar
 
-from ..core.platforms.youtube import YouTubeDownloader
 from ..core.platforms.supported_sites import get_supported_sites, get_site_by_url, is_url_supported
+from ..core.control_api import DEFAULT_PORT, ControlServer
 from ..core.download_manager import DownloadManager
-from ..core.download_types import DownloadTask, DownloadStatus
+from ..core.playlist import is_collection_url
+from ..core.download_types import DownloadTask, DownloadStatus, RESOLUTIONS, VIDEO_FORMATS
 from .download_manager_frame import DownloadManagerFrame
 
 class VideoDownloaderGUI:
@@ -36,8 +37,11 @@ class VideoDownloaderGUI:
         self._configure_window_theme()
 
         # Initialize managers
-        self.downloader = YouTubeDownloader()
+        # Downloaders for each platform are loaded as URLs need them
         self.download_manager = DownloadManager()
+
+        # Local control API for scripts and other tools on this machine
+        self.control_server = self._start_control_server()
         
         # Get supported sites
         self.supported_sites = get_supported_sites()
@@ -148,7 +152,7 @@ class VideoDownloaderGUI:
         format_frame.pack(fill=X, pady=5)
         ttk.Label(format_frame, text="Format:").pack(side=LEFT)
         self.format_var = ttk.StringVar(value="mp4")
-        formats = ["mp4", "webm", "avi"]
+        formats = VIDEO_FORMATS
         self.format_dropdown = ttk.Combobox(
             format_frame, 
             textvariable=self.format_var, 
@@ -163,7 +167,7 @@ class VideoDownloaderGUI:
         resolution_frame.pack(fill=X, pady=5)
         ttk.Label(resolution_frame, text="Resolution:").pack(side=LEFT)
         self.resolution_var = ttk.StringVar(value="720p")
-        resolutions = ["360p", "480p", "720p", "1080p"]
+        resolutions = RESOLUTIONS
         self.resolution_dropdown = ttk.Combobox(
             resolution_frame, 
             textvariable=self.resolution_var, 
@@ -246,15 +250,25 @@ class VideoDownloaderGUI:
             self.path_entry.delete(0, END)
             self.path_entry.insert(0, directory)
 
+    def _start_control_server(self):
+        """Serve the control API on its usual port, or any free one if taken."""
+        for port in (DEFAULT_PORT, 0):
+            try:
+                return ControlServer(self.download_manager, port=port).start()
+            except OSError as e:
+                print(f"Control API could not listen on port {port}: {e}")
+        return None
+
     def _create_download_task(self, url: str, scheduled_time: datetime = None) -> DownloadTask:
         """Create a download task from the current UI state."""
+        site = get_site_by_url(url)
         return DownloadTask(
             url=url,
             download_path=self.path_entry.get(),
             video_format=self.format_var.get(),
             resolution=self.resolution_var.get(),
             scheduled_time=scheduled_time,
-            platform=get_site_by_url(url).name if get_site_by_url(url) else None
+            platform=site.name if site else None
         )
 
     def _start_download(self):
@@ -281,10 +295,14 @@ class VideoDownloaderGUI:
             )
             return
 
-        # Create and add download tasks
+        # Create and add download tasks; playlists and channels are expanded
+        # in the background as the queue drains
         for url in urls:
             task = self._create_download_task(url)
-            self.download_manager.add_download(task)
+            if is_collection_url(url):
+                self.download_manager.add_collection(task)
+            else:
+                self.download_manager.add_download(task)
 
         # Clear URL input
         self.url_text.delete(1.0, END)
@@ -502,4 +520,8 @@ class VideoDownloaderGUI:
             traceback.print_exc()
 
     def run(self):
-        self.master.mainloop()
+        try:
+            self.master.mainloop()
+        finally:
+            if self.control_server is not None:
+                self.control_server.stop()